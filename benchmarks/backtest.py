@@ -0,0 +1,452 @@
+"""
+Offline backtest / replay of labelled transactions through the detection pipeline.
+
+Streams a CSV, NDJSON or Parquet dataset with an `expected_suspicious` column
+(csharp_client/chaos_data.csv, or `generate_chaos.py --extended` output) in
+chunks, scores the chunks in a process pool and writes a JSON report:
+precision / recall and confusion matrices overall, per fuzzy rule, per action
+tier and per scenario, plus per-stage throughput.
+
+    python benchmarks/backtest.py --dataset chaos
+    python generate_chaos.py --rows 5000000 --extended --output big.parquet
+    python benchmarks/backtest.py --dataset big.parquet --processes 8 --out base.json
+    python benchmarks/backtest.py --dataset big.parquet --rules candidate.yaml --compare base.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from skills.temporal_analyst.fuzzy_rules import FUZZY_RULES, load_rules
+from skills.temporal_analyst.flow_graph import CircularFlowDetector
+from skills.temporal_analyst.structuring import StructuringDetector
+
+DATASETS = {
+    "attack": os.path.join(ROOT, "csharp_client", "attack_data.csv"),
+    "chaos": os.path.join(ROOT, "csharp_client", "chaos_data.csv"),
+}
+LABEL = "expected_suspicious"
+# What /triage injects when a row carries no baseline (main.DEFAULT_BASELINE)
+DEFAULT_BASELINE = {"mean_amt": 500, "std_amt": 200, "last_loc": "Dubai", "last_time": "2024-01-01T00:00:00"}
+# Per-row fields the triage pipeline passes on as evidence
+EVIDENCE_FIELDS = ("amount", "loc", "timestamp", "type", "ip_address", "user_id", "counterparty")
+
+def read_chunks(path, chunk_size=50_000):
+    """Yield DataFrames of at most chunk_size rows, whatever the file format."""
+    ext = os.path.splitext(path)[1]
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif ext in (".ndjson", ".jsonl"):
+        # No date/dtype guessing: timestamps stay ISO strings, as the API receives them
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size, convert_dates=False, dtype=False)
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={"user_id": str, "counterparty": str})
+
+def _as_bool(values):
+    if values.dtype == bool:
+        return values.to_numpy()
+    return values.astype(str).str.strip().str.lower().isin(("true", "1", "yes")).to_numpy()
+
+def prepare(frame):
+    """DataFrame chunk -> plain columns for a worker (missing baselines get the server default)."""
+    if LABEL not in frame:
+        raise ValueError(f"dataset has no '{LABEL}' column to score against")
+    columns = {"label": _as_bool(frame[LABEL])}
+    for field in ("amount", "loc", "timestamp"):
+        columns[field] = frame[field].to_numpy()
+    for field, default in DEFAULT_BASELINE.items():
+        columns[field] = (frame[field].fillna(default) if field in frame else pd.Series(default, index=frame.index)).to_numpy()
+    for field in ("type", "ip_address", "user_id", "counterparty", "scenario"):
+        if field in frame:
+            columns[field] = frame[field].to_numpy(dtype=object)
+    return columns
+
+class PatternReplay:
+    """
+    Replays rows, in dataset order, through fresh round-trip and structuring
+    detectors configured like the gateway's, and tags each chunk with their
+    memberships. Structuring state is per account, so it can be sharded by
+    account hash (tag_structuring in each worker); the flow graph links
+    accounts, so tag_flows is one ordered pass in the parent.
+    """
+
+    def __init__(self):
+        self.flows = CircularFlowDetector(
+            window_seconds=float(os.getenv("SENTINEL_FLOW_WINDOW_S", "86400")),
+            max_fanout=int(os.getenv("SENTINEL_FLOW_FANOUT", "64"))
+        )
+        self.structuring = StructuringDetector(
+            threshold=float(os.getenv("SENTINEL_STRUCTURING_THRESHOLD", "10000")),
+            windows=tuple(int(w) for w in os.getenv("SENTINEL_STRUCTURING_WINDOWS", "3600,86400,604800").split(","))
+        )
+
+    @staticmethod
+    def _rows(columns):
+        # Naive timestamps are UTC, as in flow_graph.epoch_seconds
+        amounts = np.asarray(columns["amount"], dtype=np.float64).tolist()
+        seconds = (pd.to_datetime(pd.Series(columns["timestamp"])).to_numpy(dtype="datetime64[us]").astype(np.int64) / 1e6).tolist()
+        return amounts, seconds
+
+    def tag(self, columns):
+        self.tag_flows(columns)
+        self.tag_structuring(columns)
+
+    def tag_flows(self, columns):
+        n = len(columns["amount"])
+        flow = np.zeros(n)
+        senders, receivers = columns.get("user_id"), columns.get("counterparty")
+        if senders is not None and receivers is not None:
+            amounts, seconds = self._rows(columns)
+            for i in range(n):
+                account, receiver = senders[i], receivers[i]
+                if account is None or account != account or receiver is None or receiver != receiver:  # None / NaN
+                    continue
+                flow[i] = self.flows.observe(str(account), str(receiver), amounts[i], seconds[i])[0]
+        columns["flow_risk"] = flow
+
+    def tag_structuring(self, columns):
+        n = len(columns["amount"])
+        structuring = np.zeros(n)
+        senders = columns.get("user_id")
+        if senders is not None:
+            amounts, seconds = self._rows(columns)
+            for i in range(n):
+                account = senders[i]
+                if account is None or account != account:
+                    continue
+                structuring[i] = self.structuring.observe(str(account), amounts[i], seconds[i])[0]
+        columns["structuring_risk"] = structuring
+
+def split(columns, shards):
+    """
+    Partition a chunk's rows by account hash (stable across processes), keeping
+    their order, so every account's rows always reach the same worker.
+    """
+    senders = columns.get("user_id")
+    if senders is None:
+        return [columns] + [None] * (shards - 1)
+    shard = pd.util.hash_array(pd.Series(senders).astype(str).to_numpy(dtype=object)) % np.uint64(shards)
+    parts = []
+    for k in range(shards):
+        index = np.flatnonzero(shard == k)
+        parts.append({field: values[index] for field, values in columns.items()} if len(index) else None)
+    return parts
+
+# --- worker side -------------------------------------------------------------
+
+_WORKER_RULES = {}
+_WORKER_REPLAY = None
+
+def _replay():
+    global _WORKER_REPLAY
+    if _WORKER_REPLAY is None:
+        _WORKER_REPLAY = PatternReplay()
+    return _WORKER_REPLAY
+
+def _rules(rules_path):
+    rules = _WORKER_RULES.get(rules_path)
+    if rules is None:
+        rules = _WORKER_RULES[rules_path] = load_rules(rules_path)
+    return rules
+
+def _confusion(predicted, label):
+    """[tp, fp, fn, tn] as a small int array (adds up across shards)."""
+    tp = int(np.count_nonzero(predicted & label))
+    fp = int(np.count_nonzero(predicted & ~label))
+    fn = int(np.count_nonzero(~predicted & label))
+    return np.array([tp, fp, fn, len(label) - tp - fp - fn], dtype=np.int64)
+
+def score_chunk(columns, pipeline, rules_path, structuring=False):
+    """
+    Score one shard and reduce it to counts: nothing per-row goes back to the
+    parent, so shards merge by addition in any order. structuring=True replays
+    the shard through this worker's structuring detector first (the caller
+    must always route an account to the same worker).
+    """
+    from skills.temporal_analyst.temporal_engine import detect_behavioral_shift_batch, _round2
+
+    rules = _rules(rules_path)
+    n = len(columns["label"])
+    stages = {}
+
+    if structuring:
+        started = time.perf_counter()
+        _replay().tag_structuring(columns)
+        stages["structuring"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    temporal = detect_behavioral_shift_batch(
+        columns["amount"], columns["loc"], columns["timestamp"],
+        columns["mean_amt"], columns["std_amt"], columns["last_loc"], columns["last_time"],
+        explain="none", flow_risks=columns.get("flow_risk"), structuring_risks=columns.get("structuring_risk"),
+        rules=rules, with_signals=True
+    )
+    stages["temporal"] = time.perf_counter() - started
+
+    compliance = None
+    if pipeline == "triage":
+        # The rest of the orchestrator (evidence + compliance nodes) on the rows just scored
+        from skills.orchestrator.langgraph_logic import run_triage_batch
+        started = time.perf_counter()
+        fields = [field for field in EVIDENCE_FIELDS if field in columns]
+        transactions = [dict(zip(fields, row)) for row in zip(*(columns[field] for field in fields))]
+        baselines = [dict(zip(DEFAULT_BASELINE, row)) for row in zip(*(columns[field] for field in DEFAULT_BASELINE))]
+        results = [
+            {'is_suspicious': flag, 'score': score, 'action': action, 'reasoning': None}
+            for flag, score, action in zip(temporal['is_suspicious'].tolist(), temporal['score'].tolist(), temporal['action'].tolist())
+        ]
+        states = run_triage_batch(transactions, baselines, temporal_results=results)
+        compliance = np.array([
+            sum(1 for state in states if state['compliance_result']),
+            sum(1 for state in states if state['compliance_result'].get('flags'))
+        ], dtype=np.int64)
+        stages["triage"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    label = columns["label"]
+    partial = {
+        "rows": n,
+        "positives": int(np.count_nonzero(label)),
+        "overall": _confusion(temporal["is_suspicious"], label),
+        "rules": {},
+        "actions": {},
+        "scenarios": {},
+        "compliance": compliance
+    }
+    # A rule "fires" when it would flag the row on its own
+    rule_scores = rules.rule_scores(temporal["signals"], n)
+    for name, scores in zip(rules.rule_names, rule_scores):
+        partial["rules"][name] = _confusion(_round2(scores) >= rules.suspicious_cutoff, label)
+    actions = temporal["action"]
+    for tier in rules.labels + [rules.default_action]:
+        partial["actions"][tier] = _confusion(actions == tier, label)
+    scenario = columns.get("scenario")
+    if scenario is not None:
+        names, inverse = np.unique(scenario.astype(str), return_inverse=True)
+        rows = np.bincount(inverse, minlength=len(names))
+        flagged = np.bincount(inverse, weights=temporal["is_suspicious"], minlength=len(names)).astype(np.int64)
+        for name, total, hit in zip(names.tolist(), rows.tolist(), flagged.tolist()):
+            partial["scenarios"][name] = np.array([total, hit], dtype=np.int64)
+    stages["evaluate"] = time.perf_counter() - started
+    partial["stages"] = stages
+    return partial
+
+def merge(total, partial):
+    """Fold one shard's counts into the running total (None = nothing yet)."""
+    if total is None:
+        return partial
+    for key in ("rows", "positives", "overall"):
+        total[key] = total[key] + partial[key]
+    for key in ("rules", "actions", "scenarios", "stages"):
+        for name, value in partial[key].items():
+            total[key][name] = total[key][name] + value if name in total[key] else value
+    if partial["compliance"] is not None:
+        total["compliance"] = partial["compliance"] if total["compliance"] is None else total["compliance"] + partial["compliance"]
+    return total
+
+# --- report --------------------------------------------------------------------
+
+def _ratio(a, b):
+    return round(a / b, 4) if b else None
+
+def rates(counts):
+    """Confusion matrix plus precision / recall / F1 / accuracy from [tp, fp, fn, tn]."""
+    tp, fp, fn, tn = (int(x) for x in counts)
+    precision, recall = _ratio(tp, tp + fp), _ratio(tp, tp + fn)
+    return {
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "precision": precision,
+        "recall": recall,
+        "f1": _ratio(2 * tp, 2 * tp + fp + fn),
+        "accuracy": _ratio(tp + tn, tp + fp + fn + tn)
+    }
+
+def summarize(total, elapsed):
+    rows = total["rows"] if total else 0
+    report = {
+        "rows": rows,
+        "positives": total["positives"] if total else 0,
+        "elapsed_s": round(elapsed, 4),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0,
+    }
+    if not total:
+        return report
+    report["overall"] = rates(total["overall"])
+    report["rules"] = {name: rates(counts) for name, counts in total["rules"].items()}
+    report["actions"] = {tier: {"rows": int(counts[0] + counts[1]), **rates(counts)} for tier, counts in total["actions"].items()}
+    if total["scenarios"]:
+        report["scenarios"] = {
+            name: {"rows": int(rows_), "flagged": int(flagged), "flag_rate": _ratio(int(flagged), int(rows_))}
+            for name, (rows_, flagged) in sorted(total["scenarios"].items())
+        }
+    if total["compliance"] is not None:
+        checked, flagged = (int(x) for x in total["compliance"])
+        report["compliance"] = {"checked": checked, "flagged": flagged}
+    # Stage seconds are summed over every process: rows_per_s is per core
+    report["stages"] = {
+        stage: {"seconds": round(seconds, 4), "rows_per_s": round(rows / seconds, 1) if seconds else None}
+        for stage, seconds in total["stages"].items()
+    }
+    return report
+
+def backtest(path, pipeline="temporal", processes=None, chunk_size=50_000, rules_path=None, patterns=True, limit=None):
+    """
+    Replay a labelled dataset and return the report dict.
+    processes=0 scores in this process (no pool); patterns=False skips the
+    round-trip / structuring replay.
+    """
+    rules_path = os.path.abspath(rules_path or FUZZY_RULES.path)
+    load_rules(rules_path)  # Fail before spawning anything
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    replay = PatternReplay() if patterns else None
+    parent_stages = {"read": 0.0}
+    if patterns:
+        parent_stages["flows"] = 0.0
+        if processes == 0:
+            parent_stages["structuring"] = 0.0
+    total = None
+
+    def timed(stage, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        parent_stages[stage] += time.perf_counter() - started
+        return result
+
+    def shards():
+        remaining = limit
+        reader = read_chunks(path, chunk_size)
+        while remaining is None or remaining > 0:
+            started = time.perf_counter()
+            frame = next(reader, None)
+            if frame is None:
+                return
+            if remaining is not None:
+                frame, remaining = frame.iloc[:remaining], remaining - len(frame)
+            columns = prepare(frame)
+            parent_stages["read"] += time.perf_counter() - started
+            if replay is not None:
+                timed("flows", replay.tag_flows, columns)
+            yield columns
+
+    started = time.perf_counter()
+    if processes == 0:
+        for columns in shards():
+            if replay is not None:
+                timed("structuring", replay.tag_structuring, columns)
+            total = merge(total, score_chunk(columns, pipeline, rules_path))
+    else:
+        # One single-process pool per shard, so an account's rows reach the same
+        # worker in order; bounded in flight: memory stays at a few chunks
+        pools = [ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) for _ in range(processes)]
+        try:
+            pending = set()
+            for columns in shards():
+                for pool, part in zip(pools, split(columns, processes)):
+                    if part is None:
+                        continue
+                    if len(pending) >= processes * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            total = merge(total, future.result())
+                    pending.add(pool.submit(score_chunk, part, pipeline, rules_path, patterns))
+            for future in pending:
+                total = merge(total, future.result())
+        finally:
+            for pool in pools:
+                pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    if total is not None:
+        total["stages"] = {**parent_stages, **total["stages"]}
+    report = summarize(total, elapsed)
+    report["rules_version"] = load_rules(rules_path).version
+    return report
+
+def _deltas(current, previous):
+    """Change in points of precision / recall / F1 between two rates() dicts."""
+    delta = {}
+    for key in ("precision", "recall", "f1"):
+        old, new = previous.get(key), current.get(key)
+        if old is not None and new is not None:
+            delta[key] = round(new - old, 4)
+    return delta
+
+def compare(current, previous):
+    """
+    Change (in points) of the headline accuracy numbers vs an earlier report,
+    overall, per fuzzy rule and per action tier, plus throughput in %. Rules or
+    tiers that exist on one side only are listed under added / removed.
+    """
+    delta = _deltas(current.get("overall", {}), previous.get("overall", {}))
+    for group in ("rules", "actions"):
+        now, before = current.get(group, {}), previous.get(group, {})
+        delta[group] = {name: _deltas(now[name], before[name]) for name in now if name in before}
+        added, removed = [name for name in now if name not in before], [name for name in before if name not in now]
+        if added or removed:
+            delta[f"{group}_changed"] = {"added": added, "removed": removed}
+    if previous.get("rows_per_s"):
+        delta["rows_per_s_pct"] = round((current["rows_per_s"] - previous["rows_per_s"]) / previous["rows_per_s"] * 100, 2)
+    return delta
+
+def _git_revision():
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the detectors against a labelled dataset")
+    parser.add_argument("--dataset", default="chaos", help="chaos, or a CSV / NDJSON / Parquet path")
+    parser.add_argument("--pipeline", choices=["temporal", "triage"], default="temporal",
+                        help="temporal: fuzzy engine only; triage: plus the orchestrator's evidence/compliance nodes")
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per shard")
+    parser.add_argument("--rules", help="rules.yaml to evaluate (default: the live one)")
+    parser.add_argument("--no-patterns", action="store_true", help="skip the round-trip / structuring replay")
+    parser.add_argument("--limit", type=int, help="only the first N rows")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    path = DATASETS.get(args.dataset, args.dataset)
+    result = backtest(path, args.pipeline, args.processes, args.chunk_size, args.rules,
+                      patterns=not args.no_patterns, limit=args.limit)
+    report = {
+        "benchmark": "backtest",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "dataset": args.dataset, "pipeline": args.pipeline, "processes": args.processes,
+            "chunk_size": args.chunk_size, "rules": args.rules, "patterns": not args.no_patterns, "limit": args.limit
+        },
+        **result
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["vs_previous"] = compare(result, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Latency / throughput benchmark for POST /triage.
+
+Replays csharp_client/attack_data.csv (or chaos_data.csv) either in-process
+through ASGI or over a real socket, in closed-loop (fixed concurrency) or
+open-loop (fixed arrival rate) mode, and writes a JSON report.
+
+    python benchmarks/bench_triage.py --mode closed --concurrency 32 --requests 5000
+    python benchmarks/bench_triage.py --mode open --rate 2000 --duration 10 --spawn --workers 4
+    python benchmarks/bench_triage.py --url http://127.0.0.1:8000 --out run.json --compare last.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = {
+    "attack": os.path.join(ROOT, "csharp_client", "attack_data.csv"),
+    "chaos": os.path.join(ROOT, "csharp_client", "chaos_data.csv"),
+}
+PERCENTILES = {"p50": 50, "p90": 90, "p95": 95, "p99": 99, "p999": 99.9}
+
+def load_payloads(path):
+    """CSV rows -> /triage bodies (same mapping as StressTest.cs)."""
+    payloads = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            transaction = {
+                "amount": float(row["amount"]),
+                "loc": row["loc"],
+                "timestamp": row["timestamp"],
+                "type": row.get("type") or "TRANSFER",
+                "ip_address": row.get("ip_address") or "0.0.0.0"
+            }
+            baseline = {}
+            if row.get("mean_amt"):
+                baseline = {
+                    "mean_amt": float(row["mean_amt"]),
+                    "std_amt": float(row["std_amt"]),
+                    "last_loc": row["last_loc"],
+                    "last_time": row["last_time"]
+                }
+            payloads.append({"transaction": transaction, "user_baseline": baseline})
+    if not payloads:
+        raise ValueError(f"No rows in {path}")
+    return payloads
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}
+
+    def record(self, latency, status):
+        if 200 <= status < 300:
+            self.latencies.append(latency)
+        else:
+            key = str(status) if status else "exception"
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+async def _send(client, payload, recorder, started):
+    try:
+        response = await client.post("/triage", json=payload)
+        status = response.status_code
+    except httpx.HTTPError:
+        status = 0
+    recorder.record(time.perf_counter() - started, status)
+
+async def run_closed(client, payloads, concurrency, total, recorder):
+    """Fixed concurrency: each virtual user sends its next request as soon as the last returns."""
+    counter = iter(range(total))
+
+    async def user():
+        for i in counter:
+            await _send(client, payloads[i % len(payloads)], recorder, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+async def run_open(client, payloads, rate, duration, recorder, max_outstanding=10000):
+    """
+    Fixed arrival rate, independent of response times. Latency is measured
+    from the scheduled send time, so a stalled server is not hidden by the
+    load generator backing off (no coordinated omission).
+    """
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    pending = set()
+    start = time.perf_counter()
+    for i in range(total):
+        scheduled = start + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(pending) >= max_outstanding:
+            recorder.record(0.0, 0)
+            continue
+        task = asyncio.create_task(_send(client, payloads[i % len(payloads)], recorder, scheduled))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+def summarize(recorder, elapsed):
+    latencies = np.asarray(recorder.latencies) * 1000.0
+    errors = sum(recorder.errors.values())
+    report = {
+        "requests": len(latencies) + errors,
+        "ok": len(latencies),
+        "errors": errors,
+        "errors_by_status": recorder.errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {}
+    }
+    if len(latencies):
+        report["latency_ms"] = {name: round(float(np.percentile(latencies, q)), 3) for name, q in PERCENTILES.items()}
+        report["latency_ms"].update(mean=round(float(latencies.mean()), 3), max=round(float(latencies.max()), 3))
+    return report
+
+async def stage_totals(client):
+    """{stage: (seconds, count)} from the server's /metrics (the one worker that answers)."""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return {}
+    totals = {}
+    for line in response.text.splitlines():
+        if not line.startswith("sentinel_stage_seconds_"):
+            continue
+        name, _, value = line.rpartition(" ")
+        kind = name[len("sentinel_stage_seconds_"):name.index("{")]
+        if kind in ("sum", "count"):
+            stage = name.split('stage="', 1)[1].split('"', 1)[0]
+            seconds, count = totals.get(stage, (0.0, 0))
+            totals[stage] = (float(value), count) if kind == "sum" else (seconds, int(value))
+    return totals
+
+def stage_means(before, after):
+    """Mean microseconds per call of each server stage between two /metrics scrapes."""
+    means = {}
+    for stage, (seconds, count) in after.items():
+        seconds0, count0 = before.get(stage, (0.0, 0))
+        if count > count0:
+            means[stage] = round((seconds - seconds0) / (count - count0) * 1e6, 2)
+    return means
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn_server(workers=1):
+    """Start uvicorn on a free local port; returns (process, base_url)."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "error"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not come up within 30s")
+
+def _client(url, concurrency, view="full"):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    params = {"view": view} if view != "full" else None
+    if url is None:
+        sys.path.insert(0, ROOT)
+        from main import app
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", params=params, timeout=60)
+    return httpx.AsyncClient(base_url=url, limits=limits, params=params, timeout=60)
+
+async def benchmark(payloads, mode="closed", url=None, concurrency=32, requests=2000,
+                    rate=500.0, duration=5.0, warmup=100, view="full"):
+    """Run one benchmark; url=None means in-process ASGI."""
+    async with _client(url, max(concurrency, 100), view) as client:
+        if warmup:
+            await run_closed(client, payloads, min(concurrency, warmup), warmup, Recorder())
+
+        recorder = Recorder()
+        before = await stage_totals(client)
+        start = time.perf_counter()
+        if mode == "closed":
+            await run_closed(client, payloads, concurrency, requests, recorder)
+        else:
+            await run_open(client, payloads, rate, duration, recorder)
+        report = summarize(recorder, time.perf_counter() - start)
+        report["stage_us"] = stage_means(before, await stage_totals(client))
+        return report
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(current, previous):
+    """Relative change of the headline numbers vs an earlier report."""
+    delta = {}
+    for key in ("throughput_rps",):
+        if previous.get(key):
+            delta[key] = round((current[key] - previous[key]) / previous[key] * 100, 2)
+    for name in PERCENTILES:
+        old, new = previous.get("latency_ms", {}).get(name), current.get("latency_ms", {}).get(name)
+        if old and new is not None:
+            delta[f"latency_{name}"] = round((new - old) / old * 100, 2)
+    return delta
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark POST /triage")
+    parser.add_argument("--dataset", default="attack", help="attack, chaos, or a CSV path")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=32, help="closed loop: virtual users")
+    parser.add_argument("--requests", type=int, default=2000, help="closed loop: total requests")
+    parser.add_argument("--rate", type=float, default=500.0, help="open loop: arrivals per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="open loop: seconds")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--view", choices=["full", "compact"], default="full", help="/triage response shape")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark a running server over the socket")
+    target.add_argument("--spawn", action="store_true", help="start uvicorn on a free port and benchmark it")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(DATASETS.get(args.dataset, args.dataset))
+    process, url = (spawn_server(args.workers) if args.spawn else (None, args.url))
+    try:
+        result = asyncio.run(benchmark(payloads, args.mode, url, args.concurrency, args.requests,
+                                       args.rate, args.duration, args.warmup, args.view))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "benchmark": "triage",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "dataset": args.dataset, "mode": args.mode, "view": args.view,
+            "transport": "socket" if url else "asgi", "workers": args.workers if args.spawn else None,
+            "concurrency": args.concurrency if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "requests": args.requests if args.mode == "closed" else None,
+            "duration": args.duration if args.mode == "open" else None,
+        },
+        **result
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["vs_previous_pct"] = compare(result, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+if __name__ == "__main__":
+    main()
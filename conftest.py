@@ -0,0 +1,17 @@
+import os
+import shutil
+import tempfile
+
+# Everything a test run writes (shared state, event log, case archive, compiled
+# watchlists) goes to a scratch directory, never into an operator's data dir.
+# Set before collection, because main reads these at import time.
+_SCRATCH = tempfile.mkdtemp(prefix="sentinel-test-")
+
+def pytest_configure(config):
+    os.environ["SENTINEL_STATE_DIR"] = os.path.join(_SCRATCH, "state")
+    os.environ["SENTINEL_DATA_DIR"] = os.path.join(_SCRATCH, "data")
+    os.environ["SENTINEL_CASE_DB"] = os.path.join(_SCRATCH, "data", "case_archive.db")
+    os.environ["SENTINEL_WATCHLIST_DIR"] = os.path.join(_SCRATCH, "watchlist")
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_SCRATCH, ignore_errors=True)
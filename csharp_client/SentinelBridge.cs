@@ -17,7 +17,13 @@ public class SentinelBridge {
             var result = await response.Content.ReadFromJsonAsync<JsonElement>();
             
             // Safe property access
-            string summary = result.TryGetProperty("summary", out var summaryProp) ? summaryProp.GetString() : "No summary available.";
+            string summary = result.TryGetProperty("summary", out var summaryProp) ? summaryProp.GetString() : "";
+            // Reports are rendered on demand server-side; point at it instead
+            if (string.IsNullOrEmpty(summary)) {
+                summary = result.TryGetProperty("report_url", out var reportProp)
+                    ? $"Investigation report: {_client.BaseAddress}{reportProp.GetString().TrimStart('/')}"
+                    : "No summary available.";
+            }
             bool isSuspicious = result.TryGetProperty("is_suspicious", out var suspProp) && suspProp.GetBoolean();
 
             // Logic to turn 2,000 alerts into 50 cases
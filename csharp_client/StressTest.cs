@@ -5,6 +5,7 @@ using System.IO;
 using System.Linq;
 using System.Net.Http;
 using System.Net.Http.Json;
+using System.Threading;
 using System.Threading.Tasks;
 
 public class StressTester {
@@ -12,6 +13,25 @@ public class StressTester {
         BaseAddress = new Uri("http://127.0.0.1:8000"),
         Timeout = TimeSpan.FromMinutes(2) 
     };
+    // Requests in flight at once; the gateway sheds (429) rather than queueing the rest for minutes
+    private readonly SemaphoreSlim _inFlight = new SemaphoreSlim(256);
+    private int _deferred;
+
+    private async Task PostWithRetry(object payload) {
+        await _inFlight.WaitAsync();
+        try {
+            for (int attempt = 0; ; attempt++) {
+                var response = await _client.PostAsJsonAsync("/triage", payload);
+                if ((int)response.StatusCode != 429 || attempt == 3) return;
+                Interlocked.Increment(ref _deferred);
+                // Low-risk traffic deferred by admission control: come back when the server says so
+                var wait = response.Headers.RetryAfter?.Delta ?? TimeSpan.FromSeconds(1);
+                await Task.Delay(wait);
+            }
+        } finally {
+            _inFlight.Release();
+        }
+    }
 
     public async Task RunHammer() {
         Console.WriteLine("🔨 Starting 'The Hammer' 2,000 Alert Stress Test...");
@@ -43,7 +63,7 @@ public class StressTester {
                 }
             };
             
-            tasks.Add(_client.PostAsJsonAsync("/triage", payload));
+            tasks.Add(PostWithRetry(payload));
         }
 
         await Task.WhenAll(tasks);
@@ -52,5 +72,6 @@ public class StressTester {
         Console.WriteLine($"\n✅ Hammered {lines.Length} alerts in {stopwatch.Elapsed.TotalSeconds:F2} seconds.");
         double tps = lines.Length / stopwatch.Elapsed.TotalSeconds;
         Console.WriteLine($"🚀 Throughput: {tps:F2} TPS (Target: 4,793 TPS)");
+        Console.WriteLine($"⏳ Deferred by admission control (429, retried): {_deferred}");
     }
 }
@@ -0,0 +1,149 @@
+import math
+import time
+import asyncio
+from collections import deque
+
+from gateway.metrics import ADMISSION_WAIT, enabled
+
+PRIORITY, STANDARD = "priority", "standard"
+LANES = (PRIORITY, STANDARD)
+
+class Overloaded(Exception):
+    """A request turned away by admission control; answer 429 with Retry-After."""
+
+    def __init__(self, lane, reason, retry_after):
+        super().__init__(f"{lane} lane {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    ADMISSION CONTROL: Priority lanes in front of the triage threadpool.
+
+    At most `slots` requests run at once; the rest wait in a bounded queue per
+    lane. A freed slot always goes to the oldest priority waiter first, so a
+    sanctioned-jurisdiction wire never waits behind a burst of POS payments.
+    Standard-lane requests that have waited longer than the SLO (or find their
+    queue full) are shed with an Overloaded carrying a Retry-After estimate, instead
+    of sitting in the queue until the client times out. The priority lane is
+    never shed for time, only when its (larger) queue is full.
+
+    Event-loop only: acquire()/release() must be called from the serving loop.
+    """
+
+    def __init__(self, slots=40, slo_ms=250.0, queue_limits=None):
+        self.slots = slots
+        self.slo = slo_ms / 1000.0
+        self.queue_limits = {PRIORITY: 4096, STANDARD: 1024, **(queue_limits or {})}
+        self.in_flight = 0
+        self._waiters = {lane: deque() for lane in LANES}
+        self._service = 0.005  # EWMA of slot hold time (seconds), for Retry-After
+        self.counts = {}        # (lane, outcome) -> n
+
+    def _count(self, lane, outcome):
+        key = (lane, outcome)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def queue_depth(self, lane):
+        return sum(1 for _, future, _ in self._waiters[lane] if not future.done())
+
+    def retry_after(self):
+        """Whole seconds until the current backlog should have drained (at least 1)."""
+        backlog = self.in_flight + sum(len(waiters) for waiters in self._waiters.values())
+        return max(1, math.ceil(backlog * self._service / max(1, self.slots)))
+
+    def _shed(self, lane, reason):
+        self._count(lane, reason)
+        return Overloaded(lane, reason, self.retry_after())
+
+    async def acquire(self, lane):
+        """Wait for a slot; returns seconds spent queued or raises Overloaded."""
+        if self.in_flight < self.slots and not any(self._waiters[name] for name in LANES):
+            self.in_flight += 1
+            self._admitted(lane, 0.0)
+            return 0.0
+
+        waiters = self._waiters[lane]
+        if len(waiters) >= self.queue_limits[lane]:
+            raise self._shed(lane, "shed_full")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Past the SLO the answer is 429, not a slower 200
+        timer = loop.call_later(self.slo, self._expire, lane, future) if lane == STANDARD else None
+        queued = time.perf_counter()
+        waiters.append((queued, future, timer))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that was already handed over
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            raise
+        waited = time.perf_counter() - queued
+        self._admitted(lane, waited)
+        return waited
+
+    def _expire(self, lane, future):
+        if not future.done():
+            future.set_exception(self._shed(lane, "shed_slo"))
+        # Same SLO for the whole lane, so expired waiters sit at the front: keep the bound honest
+        waiters = self._waiters[lane]
+        while waiters and waiters[0][1].done():
+            waiters.popleft()
+
+    def _admitted(self, lane, waited):
+        self._count(lane, "admitted")
+        if enabled():
+            ADMISSION_WAIT.observe(waited, lane)
+
+    def release(self, held=None):
+        """Free a slot (held: seconds it was held, to refine Retry-After) and hand it to the next waiter."""
+        if held is not None:
+            self._service += (held - self._service) * 0.05
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters:
+                _, future, timer = waiters.popleft()
+                if future.done():
+                    continue  # Shed or cancelled while queued
+                if timer is not None:
+                    timer.cancel()
+                future.set_result(None)  # The slot moves to this waiter as-is
+                return
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "slots": self.slots,
+            "in_flight": self.in_flight,
+            "slo_ms": self.slo * 1000.0,
+            "service_ms": round(self._service * 1000.0, 3),
+            "lanes": {
+                lane: {
+                    "queued": self.queue_depth(lane),
+                    "limit": self.queue_limits[lane],
+                    **{outcome: n for (name, outcome), n in self.counts.items() if name == lane}
+                }
+                for lane in LANES
+            }
+        }
+
+    def metric_lines(self):
+        lines = [
+            "# HELP sentinel_admission_total /triage admission decisions by lane and outcome (admitted, shed_slo, shed_full).",
+            "# TYPE sentinel_admission_total counter",
+        ]
+        for (lane, outcome), n in sorted(self.counts.items()):
+            lines.append(f'sentinel_admission_total{{lane="{lane}",outcome="{outcome}"}} {n}')
+        lines += [
+            "# HELP sentinel_admission_queue_depth Requests waiting for a triage slot, by lane.",
+            "# TYPE sentinel_admission_queue_depth gauge",
+        ]
+        lines += [f'sentinel_admission_queue_depth{{lane="{lane}"}} {self.queue_depth(lane)}' for lane in LANES]
+        lines += [
+            "# HELP sentinel_admission_in_flight Triage slots in use.",
+            "# TYPE sentinel_admission_in_flight gauge",
+            f"sentinel_admission_in_flight {self.in_flight}",
+        ]
+        return lines
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import queue
+import atexit
+import base64
+import sqlite3
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    archive_id INTEGER PRIMARY KEY,
+    case_id    TEXT,
+    run        TEXT,
+    archived   REAL,
+    timestamp  TEXT,
+    amount     REAL,
+    type       TEXT,
+    ip         TEXT,
+    loc        TEXT,
+    score      REAL,
+    action     TEXT,
+    reason     TEXT,
+    payload    TEXT
+);
+CREATE INDEX IF NOT EXISTS cases_type      ON cases (type, archive_id);
+CREATE INDEX IF NOT EXISTS cases_ip        ON cases (ip, archive_id);
+CREATE INDEX IF NOT EXISTS cases_timestamp ON cases (timestamp, archive_id);
+CREATE INDEX IF NOT EXISTS cases_amount    ON cases (amount, archive_id);
+CREATE INDEX IF NOT EXISTS cases_case_id   ON cases (case_id);
+"""
+
+# PRAGMA user_version of the layout above. v2 added loc, score and action.
+SCHEMA_VERSION = 2
+ADDED_COLUMNS = {"loc": "TEXT", "score": "REAL", "action": "TEXT"}
+
+# Failures that clear up by themselves; anything else (no such table/column) never will
+TRANSIENT_ERRORS = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_IOERR, sqlite3.SQLITE_FULL}
+
+COLUMNS = ("case_id", "run", "archived", "timestamp", "amount", "type", "ip", "loc", "score", "action", "reason", "payload")
+SORT_KEYS = ("archive_id", "timestamp", "amount", "score")
+
+# Equality filters -> column
+FILTERS = {"type": "type", "ip": "ip", "loc": "loc", "action": "action", "case_id": "case_id"}
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _transient(error):
+    code = getattr(error, "sqlite_errorcode", None)
+    return code is not None and code & 0xFF in TRANSIENT_ERRORS
+
+def encode_cursor(sort_value, archive_id):
+    raw = json.dumps([sort_value, archive_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        sort_value, archive_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(archive_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Malformed cursor '{token}'")
+
+class CaseArchive:
+    """
+    CASE ARCHIVE: Durable, indexed history of every flagged case (SQLite, WAL).
+
+    The live CaseJournal is per server run and cleared by /reset; the archive
+    keeps everything. Writers only enqueue: one background thread per worker
+    drains the queue and commits whatever has piled up as one transaction
+    (group commit), so a burst of N cases costs one fsync, not N.
+    A batch that hits a transient error (locked, busy, I/O, disk full) is
+    retried with backoff, up to max_retries times; a case SQLite rejects, a
+    batch that can never be written, or cases beyond max_pending queued are
+    dropped and logged, so the writer never stalls and its queue stays bounded.
+    Reads use their own connection per thread and never wait on the writer.
+    """
+
+    def __init__(self, path, max_batch=5000, run="", retry_delay=0.5, max_retry_delay=30.0, max_retries=10,
+                 max_pending=100_000, busy_timeout=30.0):
+        self.path = path
+        self.max_batch = max_batch
+        self.run = run
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.busy_timeout = busy_timeout
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+        self._queue = queue.SimpleQueue()
+        self._pending = 0
+        self._overflowing = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._writer = None
+        self._closed = False
+        self.batches = 0
+        self.written = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def _migrate(self, conn):
+        """Bring an archive written by an older build up to SCHEMA_VERSION; refuse a newer one."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{self.path} has case archive schema v{version}; this build reads up to v{SCHEMA_VERSION}")
+        conn.executescript(SCHEMA)
+        have = {row[1] for row in conn.execute("PRAGMA table_info(cases)")}
+        for column in COLUMNS:
+            if column in have:
+                continue
+            if column not in ADDED_COLUMNS:
+                raise ValueError(f"{self.path}: table cases has no column {column} and it cannot be added")
+            conn.execute(f"ALTER TABLE cases ADD COLUMN {column} {ADDED_COLUMNS[column]}")
+            log.warning("case archive: added column %s to %s", column, self.path)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoint, never corrupt
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- write side -------------------------------------------------------
+
+    def append(self, case):
+        self.append_many([case])
+
+    def append_many(self, cases):
+        """Queue stored cases for the writer; O(1) per case on the caller's thread."""
+        if not cases:
+            return
+        if self._writer is None:
+            self._start()
+        with self._cond:
+            room = max(0, self.max_pending - self._pending)
+            if room < len(cases):
+                self.dropped += len(cases) - room
+                if not self._overflowing:
+                    log.error("case archive: %d cases already queued, dropping new cases until the writer catches up",
+                              self._pending)
+                self._overflowing = True
+                cases = cases[:room]
+            elif self._pending == 0:
+                self._overflowing = False
+            self._pending += len(cases)
+        now = time.time()
+        for case in cases:
+            self._queue.put((now, case))
+
+    def _start(self):
+        with self._cond:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="case-archive-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _row(self, archived, case):
+        return (
+            case.get("id"), self.run, archived, case.get("timestamp"),
+            _number(case.get("amount")), case.get("type"), case.get("ip"), case.get("loc"),
+            _number(case.get("score")), case.get("action"), case.get("reason"),
+            json.dumps(case, default=str)
+        )
+
+    def _run(self):
+        conn = self._connect()
+        insert = f"INSERT INTO cases ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Group commit: take everything that queued up meanwhile
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._commit(conn, insert, [self._row(archived, case) for archived, case in batch])
+            with self._cond:
+                self._pending -= len(batch)
+                self._cond.notify_all()
+        conn.close()
+
+    def _commit(self, conn, insert, rows):
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                with conn:
+                    conn.executemany(insert, rows)
+                self.batches += 1
+                self.written += len(rows)
+                return
+            except sqlite3.OperationalError as e:
+                if not _transient(e):
+                    # Schema-level (no such table/column): retrying cannot help
+                    self.dropped += len(rows)
+                    log.error("case archive: %d cases not archived: %s", len(rows), e)
+                    return
+                if self._closed or attempt == self.max_retries:
+                    self.dropped += len(rows)
+                    log.error("case archive: giving up after %d attempts, %d cases not archived: %s",
+                              attempt + 1, len(rows), e)
+                    return
+                # Transient (locked, busy, disk full, I/O): keep the batch and try again
+                self.retries += 1
+                log.warning("case archive: write of %d cases failed, retrying in %.1fs: %s", len(rows), delay, e)
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+            except sqlite3.Error:
+                # Rejected by SQLite: isolate the offending rows so the rest still land
+                if len(rows) == 1:
+                    self.dropped += 1
+                    log.exception("case archive: case %s rejected, dropped", rows[0][0])
+                    return
+                for row in rows:
+                    self._commit(conn, insert, [row])
+                return
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far is committed; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        if self._writer is not None and not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
+    # --- read side --------------------------------------------------------
+
+    def query(self, sort="archive_id", order="desc", limit=100, cursor=None,
+              min_amount=None, max_amount=None, start=None, end=None, **filters):
+        """
+        Filtered page of cases plus the cursor for the next page (None at the end).
+        Keyset pagination on (sort key, archive_id): every page is an index range
+        scan, however deep into the history it is.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}' (choose from {', '.join(SORT_KEYS)})")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        where, params = [], []
+        for name, value in filters.items():
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter '{name}'")
+            if value is not None:
+                where.append(f"{FILTERS[name]} = ?")
+                params.append(value)
+        for clause, value in (("amount >= ?", min_amount), ("amount <= ?", max_amount),
+                              ("timestamp >= ?", start), ("timestamp < ?", end)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+
+        op = "<" if order == "desc" else ">"
+        if cursor is not None:
+            sort_value, archive_id = decode_cursor(cursor)
+            if sort == "archive_id":
+                where.append(f"archive_id {op} ?")
+                params.append(archive_id)
+            else:
+                where.append(f"({sort}, archive_id) {op} (?, ?)")
+                params.extend([sort_value, archive_id])
+        if sort != "archive_id":
+            where.append(f"{sort} IS NOT NULL")
+
+        direction = order.upper()
+        order_by = "archive_id" if sort == "archive_id" else f"{sort} {direction}, archive_id"
+        sql = (f"SELECT archive_id, run, archived, payload, {sort} AS sort_key FROM cases"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''}"
+               f" ORDER BY {order_by} {direction} LIMIT ?")
+        rows = self._reader().execute(sql, params + [limit + 1]).fetchall()
+
+        cases = []
+        for row in rows[:limit]:
+            case = json.loads(row["payload"])
+            case.update(archive_id=row["archive_id"], run=row["run"], archived=row["archived"])
+            cases.append(case)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["sort_key"], last["archive_id"])
+        return cases, next_cursor
+
+    def get(self, archive_id):
+        row = self._reader().execute(
+            "SELECT archive_id, run, archived, payload FROM cases WHERE archive_id = ?", (archive_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        case = json.loads(row["payload"])
+        case.update(archive_id=row["archive_id"], run=row["run"], archived=row["archived"])
+        return case
+
+    def count(self):
+        return self._reader().execute("SELECT COUNT(*) FROM cases").fetchone()[0]
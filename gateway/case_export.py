@@ -0,0 +1,95 @@
+import io
+import csv
+
+# Column order of the regulator export (matches the case records in the journal)
+EXPORT_FIELDS = ["id", "timestamp", "amount", "type", "reason", "ip", "loc", "score", "action", "flags"]
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands bytes back in chunks but keeps an honest tell()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def csv_chunks(case_chunks):
+    """CSV text, one encoded chunk per case chunk (memory bounded by the chunk size)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for cases in case_chunks:
+        # Compliance flags are a list: one cell, "; "-separated
+        writer.writerows(dict(case, flags="; ".join(case["flags"])) if case.get("flags") else case for case in cases)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def _record_batch(pa, schema, cases):
+    columns = {field: [case.get(field) for case in cases] for field in EXPORT_FIELDS}
+    columns["amount"] = [float(a) if a is not None else None for a in columns["amount"]]
+    columns["score"] = [float(s) if s is not None else None for s in columns["score"]]
+    columns["timestamp"] = [str(t) if t is not None else None for t in columns["timestamp"]]
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.string()),
+        ("amount", pa.float64()),
+        ("type", pa.string()),
+        ("reason", pa.string()),
+        ("ip", pa.string()),
+        ("loc", pa.string()),
+        ("score", pa.float64()),
+        ("action", pa.string()),
+        ("flags", pa.list_(pa.string())),
+    ])
+
+def arrow_chunks(case_chunks):
+    """Arrow IPC stream, one record batch per case chunk."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for cases in case_chunks:
+            writer.write_batch(_record_batch(pa, schema, cases))
+            yield sink.drain()
+    yield sink.drain()
+
+def parquet_chunks(case_chunks):
+    """Parquet file, one row group per case chunk; the footer goes out last."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for cases in case_chunks:
+            writer.write_batch(_record_batch(pa, schema, cases))
+            yield sink.drain()
+    yield sink.drain()
+
+# format -> (chunk generator, media type, file extension, needs pyarrow)
+EXPORT_FORMATS = {
+    "csv": (csv_chunks, "text/csv", "csv", False),
+    "arrow": (arrow_chunks, "application/vnd.apache.arrow.stream", "arrows", True),
+    "parquet": (parquet_chunks, "application/vnd.apache.parquet", "parquet", True),
+}
@@ -0,0 +1,43 @@
+class CaseRing:
+    """
+    BOUNDED CASE BUFFER: Fixed-capacity ring indexed by a monotonically
+    increasing sequence number. Appends overwrite the oldest slot, so memory
+    stays flat no matter how many cases get flagged.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.head = 0  # sequence number the next append receives
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    @property
+    def tail(self):
+        """Oldest sequence number still held."""
+        return max(0, self.head - self.capacity)
+
+    def append(self, item):
+        self._slots[self.head % self.capacity] = item
+        self.head += 1
+
+    def __getitem__(self, seq):
+        if not self.tail <= seq < self.head:
+            raise IndexError(f"seq {seq} outside [{self.tail}, {self.head})")
+        return self._slots[seq % self.capacity]
+
+    def since(self, cursor, limit=None):
+        """
+        Items with seq >= cursor, oldest first, plus the cursor to poll with next.
+        Returns (items, next_cursor, truncated); truncated means the ring already
+        dropped some of the requested items.
+        """
+        start = max(cursor, self.tail)
+        stop = self.head if limit is None else min(self.head, start + limit)
+        items = [self._slots[seq % self.capacity] for seq in range(start, stop)]
+        return items, stop, cursor < self.tail
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self.head = 0
@@ -0,0 +1,176 @@
+import os
+import time
+import fcntl
+import random
+import atexit
+import threading
+from collections import deque
+
+from gateway.fast_json import dumps
+
+def parse_rates(text):
+    """'debug=0.01,suspicious=1' -> {'debug': 0.01, 'suspicious': 1.0}"""
+    rates = {}
+    for part in (text or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip():
+            rates[name.strip()] = float(value)
+    return rates
+
+class EventLog:
+    """
+    EVENT LOG: Structured JSON-lines logging that never blocks a request.
+
+    log() decides in O(1) whether to keep a record (per-category sampling
+    rate, then a per-category token bucket) and appends it to a bounded
+    deque; when the writer falls behind, the oldest records are dropped and
+    counted rather than stalling triage. A background thread serializes and
+    writes whatever is queued in one batch every flush_interval, and rotates
+    the file at max_bytes (path.1 .. path.N), under a file lock so every
+    Uvicorn worker can share one log.
+
+    Categories without a sampling rate are kept; a rate of 0 switches a
+    category off at the cost of one dict lookup.
+    """
+
+    def __init__(self, path, sampling=None, rate_limits=None, max_bytes=50 << 20, backups=5,
+                 queue_size=65536, flush_interval=0.5):
+        self.path = path
+        self.sampling = dict(sampling or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._queue = deque(maxlen=queue_size)
+        self._buckets = {}  # category -> [tokens, last refill]
+        self._rng = random.Random()
+        self._wake = threading.Event()
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._lock = threading.Lock()  # Counts and token buckets: request threads share them
+        self.counts = {}    # (category, outcome) -> n
+
+    def _count(self, category, outcome, n=1):
+        key = (category, outcome)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def enabled(self, category):
+        return self.sampling.get(category, 1.0) > 0.0
+
+    def _admit(self, category):
+        rate = self.sampling.get(category, 1.0)
+        if rate < 1.0 and (rate <= 0.0 or self._rng.random() >= rate):
+            self._count(category, "sampled_out")
+            return False
+        limit = self.rate_limits.get(category)
+        if limit:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._buckets.get(category)
+                if bucket is None:
+                    bucket = self._buckets[category] = [limit, now]
+                bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+                bucket[1] = now
+                allowed = bucket[0] >= 1.0
+                if allowed:
+                    bucket[0] -= 1.0
+            if not allowed:
+                self._count(category, "rate_limited")
+                return False
+        return True
+
+    def log(self, category, event, **fields):
+        """Queue one record; returns False if it was sampled out, rate-limited or the log is full."""
+        if not self._admit(category):
+            return False
+        if self._writer is None:
+            self._start()
+        if len(self._queue) == self._queue.maxlen:
+            self._count(category, "dropped")
+        self._queue.append((time.time(), category, event, fields))
+        self._count(category, "queued")
+        if len(self._queue) >= self._queue.maxlen // 2:
+            self._wake.set()  # Filling up: don't wait for the next interval
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self):
+        with self._drain_lock:
+            lines = []
+            pid = os.getpid()
+            while self._queue:
+                try:
+                    ts, category, event, fields = self._queue.popleft()
+                except IndexError:
+                    break
+                lines.append(dumps({"ts": round(ts, 6), "cat": category, "event": event, "pid": pid, **fields}))
+            if lines:
+                self._write(b"\n".join(lines) + b"\n")
+                self._count("*", "written", len(lines))
+
+    def _write(self, data):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # Another worker may have rotated the file away while we waited for the lock
+                try:
+                    current = os.stat(self.path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current != os.fstat(fd).st_ino:
+                    continue
+                os.write(fd, data)
+                if os.fstat(fd).st_size >= self.max_bytes:
+                    self._rotate()
+                return
+            finally:
+                os.close(fd)  # Also releases the lock
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def flush(self):
+        """Write out everything queued so far (synchronously)."""
+        self._drain()
+
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def metric_lines(self):
+        lines = [
+            "# HELP sentinel_log_records_total Log records by category and outcome (queued, sampled_out, rate_limited, dropped, written).",
+            "# TYPE sentinel_log_records_total counter",
+        ]
+        with self._lock:
+            counts = sorted(self.counts.items())
+        for (category, outcome), n in counts:
+            lines.append(f'sentinel_log_records_total{{category="{category}",outcome="{outcome}"}} {n}')
+        lines += [
+            "# HELP sentinel_log_queue_depth Log records waiting for the writer.",
+            "# TYPE sentinel_log_queue_depth gauge",
+            f"sentinel_log_queue_depth {self.pending}",
+        ]
+        return lines
@@ -0,0 +1,33 @@
+import json
+from fastapi.responses import JSONResponse
+
+# orjson is optional: same output shape without it, just slower
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _fallback(obj):
+    # numpy scalars, datetimes, sets... anything the engines may leave behind
+    if hasattr(obj, "item"):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+def dumps(content):
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_fallback, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_fallback).encode("utf-8")
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (when installed) instead of json.dumps."""
+
+    def render(self, content):
+        return dumps(content)
@@ -0,0 +1,110 @@
+import heapq
+from array import array
+from collections import deque
+
+class CaseGraph:
+    """
+    FRAUD RING INDEX: Star topology (IP hubs, case spokes) maintained
+    incrementally as cases are appended, instead of rebuilt per request.
+
+    Nodes and links are append-only lists. Version v means "v cases folded in",
+    and per-version offsets make "what changed since v" a slice. Hub degrees
+    are counted as spokes attach.
+
+    Only the newest max_cases spokes are kept (like the case ring): older ones
+    expire together with their links, and a hub goes once its last spoke has.
+    Versions before `tail` can no longer be sliced; since() answers them with
+    the whole graph.
+    """
+
+    def __init__(self, max_cases=10000):
+        self.max_cases = max_cases
+        self.clear()
+
+    def clear(self):
+        self.nodes = []
+        self.links = []
+        self.hub_degree = {}
+        self._hubs = {}          # ip -> (hub node, version it was added at)
+        self._spoke_ips = deque()  # ip (or None) of every case still in the graph, oldest first
+        self.tail = 0            # oldest version whose additions are still held
+        self._base = 0           # version that nodes[0] / links[0] belong to
+        # Offsets into nodes/links at every version from _base on
+        self._node_marks = array("q", [0])
+        self._link_marks = array("q", [0])
+
+    @property
+    def version(self):
+        return self._base + len(self._node_marks) - 1
+
+    def append(self, case):
+        # 1. Add Case Node (Spoke)
+        self.nodes.append({
+            "id": case["id"],
+            "type": case["type"],
+            "val": 5, # Smaller spokes
+            "group": "case"
+        })
+
+        # 2. Add/Find IP Node (Hub)
+        ip = case.get("ip", "N/A")
+        if ip != "N/A":
+            if ip not in self.hub_degree:
+                hub = {
+                    "id": ip,
+                    "type": "IP_ADDRESS",
+                    "val": 15, # Big Hub
+                    "group": "ip"
+                }
+                self.nodes.append(hub)
+                self._hubs[ip] = (hub, self.version)
+                self.hub_degree[ip] = 0
+            self.hub_degree[ip] += 1
+
+            # 3. Link Spoke to Hub
+            self.links.append({
+                "source": case["id"],
+                "target": ip
+            })
+        else:
+            ip = None
+
+        self._node_marks.append(len(self.nodes))
+        self._link_marks.append(len(self.links))
+        self._spoke_ips.append(ip)
+        if len(self._spoke_ips) > self.max_cases:
+            self._expire()
+
+    def _expire(self):
+        ip = self._spoke_ips.popleft()
+        self.tail += 1
+        if ip is not None:
+            self.hub_degree[ip] -= 1
+            if not self.hub_degree[ip]:
+                del self.hub_degree[ip], self._hubs[ip]
+        # Compact in blocks so trimming the lists stays amortized O(1) per case
+        drop = self.tail - self._base
+        if drop >= max(1024, self.max_cases):
+            del self.nodes[:self._node_marks[drop]]
+            del self.links[:self._link_marks[drop]]
+            self._node_marks = array("q", (mark - self._node_marks[drop] for mark in self._node_marks[drop:]))
+            self._link_marks = array("q", (mark - self._link_marks[drop] for mark in self._link_marks[drop:]))
+            self._base = self.tail
+
+    def since(self, version=0):
+        """
+        Nodes and links added after `version`. Version 0, or one that has expired,
+        gets the whole graph: every live hub plus the spokes still held.
+        """
+        version = min(max(version, 0), self.version)
+        if version == 0 or version < self.tail:
+            offset = self.tail - self._base
+            hubs = [hub for hub, added in self._hubs.values() if added < self.tail]
+            return hubs + self.nodes[self._node_marks[offset]:], self.links[self._link_marks[offset]:]
+        offset = version - self._base
+        return self.nodes[self._node_marks[offset]:], self.links[self._link_marks[offset]:]
+
+    def top_hubs(self, n=10):
+        """The n biggest rings by spoke count (scans hubs, never cases)."""
+        biggest = heapq.nlargest(n, self.hub_degree.items(), key=lambda item: item[1])
+        return [{"id": ip, "degree": degree} for ip, degree in biggest]
@@ -0,0 +1,159 @@
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+
+# Instrumentation switch: SENTINEL_METRICS=0 at startup, or set_enabled() at runtime
+_ENABLED = os.getenv("SENTINEL_METRICS", "1") != "0"
+
+# Seconds: 50us .. 2.5s covers everything from a single node to a full batch
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def enabled():
+    return _ENABLED
+
+def set_enabled(flag):
+    global _ENABLED
+    _ENABLED = bool(flag)
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics), optionally split by one label."""
+
+    def __init__(self, name, help_text, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_value=None):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+    def delta(self, before):
+        """Observations made since snapshot() returned `before` (picklable, for merge())."""
+        changes = {}
+        for key, (counts, total) in self.snapshot().items():
+            old_counts, old_total = before.get(key, ([0] * len(counts), 0.0))
+            diff = [a - b for a, b in zip(counts, old_counts)]
+            if any(diff):
+                changes[key] = (diff, total - old_total)
+        return changes
+
+    def merge(self, changes):
+        """Fold in observations recorded elsewhere (e.g. a delta() from a pool process)."""
+        with self._lock:
+            for key, (counts, total) in changes.items():
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for label_value, (counts, total) in sorted(series.items(), key=lambda item: str(item[0])):
+            base = [(self.label, label_value)] if self.label else []
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(base)} {total}")
+            lines.append(f"{self.name}_count{_labels(base)} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if _ENABLED:
+            with self._lock:
+                self.value += amount
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+STAGE_SECONDS = Histogram("sentinel_stage_seconds", "Latency of each triage stage (graph nodes, parse, serialize, stats).", label="stage")
+TRIAGE_REQUESTS = Counter("sentinel_triage_requests_total", "Transactions triaged by this worker.")
+TRIAGE_ERRORS = Counter("sentinel_triage_errors_total", "Triage requests that failed with a 500.")
+TRIAGE_SUSPICIOUS = Counter("sentinel_triage_suspicious_total", "Transactions flagged suspicious by this worker.")
+ADMISSION_WAIT = Histogram("sentinel_admission_wait_seconds", "Time admitted /triage requests queued for a slot, by lane.", label="lane")
+
+METRICS = [STAGE_SECONDS, TRIAGE_REQUESTS, TRIAGE_ERRORS, TRIAGE_SUSPICIOUS, ADMISSION_WAIT]
+
+@contextmanager
+def timed(stage):
+    """Time a block into sentinel_stage_seconds{stage=...}."""
+    if not _ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+def timed_node(stage):
+    """Decorator flavour of timed() for graph nodes."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorate
+
+@functools.lru_cache(maxsize=1)
+def instrumentation_overhead(samples=20000):
+    """Measured cost of one timed() observation, in seconds (excludes the timed work)."""
+    probe = Histogram("probe", "calibration")
+
+    start = time.perf_counter()
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        probe.observe(time.perf_counter() - t0, "probe")
+    return (time.perf_counter() - start) / samples
+
+def render_metrics(extra_lines=()):
+    """Prometheus text exposition for every metric of this worker."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend([
+        "# HELP sentinel_instrumentation_enabled 1 if stage timing is switched on.",
+        "# TYPE sentinel_instrumentation_enabled gauge",
+        f"sentinel_instrumentation_enabled {int(_ENABLED)}",
+        "# HELP sentinel_instrumentation_overhead_seconds Measured cost of one stage observation.",
+        "# TYPE sentinel_instrumentation_overhead_seconds gauge",
+        f"sentinel_instrumentation_overhead_seconds {instrumentation_overhead():.9f}",
+    ])
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,165 @@
+import os
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from gateway.metrics import STAGE_SECONDS
+
+def _score_timed(score_fn, transactions, baselines):
+    """Runs in the pool: score a batch and ship the child's stage timings back with it."""
+    before = STAGE_SECONDS.snapshot()
+    results = score_fn(transactions, baselines)
+    return results, STAGE_SECONDS.delta(before)
+
+class MicroBatcher:
+    """
+    TRANSPARENT MICRO-BATCHING: Collects concurrent single-transaction requests
+    for up to max_wait_ms (or max_items, whichever comes first) and scores each
+    batch in a process pool, outside the GIL of the serving worker.
+
+    Callers get an individual Future per transaction. max_wait_ms is also the
+    latency cap: at low load a lone request waits at most that long.
+
+    score_fn(transactions, baselines) -> list of results, and must be picklable
+    (a module-level function). If a batch fails, its items are re-scored one by
+    one so only the caller whose transaction is bad gets the exception. Stage
+    timings recorded in the pool are merged into this worker's /metrics.
+    """
+
+    def __init__(self, score_fn, max_wait_ms=2.0, max_items=64, processes=None, max_in_flight=None):
+        self.score_fn = score_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_items = max_items
+        self.processes = processes or os.cpu_count() or 1
+        self._queue = queue.SimpleQueue()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight or self.processes * 2)
+        self._pool = None
+        self._collector = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._max_wait_seen = 0.0
+        self._size_buckets = {}
+
+    def start(self):
+        """Spawn and warm the pool (idempotent; submit() calls it lazily)."""
+        if self._collector is not None:
+            return
+        with self._start_lock:
+            if self._collector is None:
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self.shutdown)
+                # Empty batches make every child import the scoring modules up front
+                for _ in range(self.processes):
+                    self._pool.submit(self.score_fn, [], [])
+                self._collector = threading.Thread(target=self._collect, name="microbatch-collector", daemon=True)
+                self._collector.start()
+
+    def submit(self, transaction, baseline):
+        """Queue one transaction; the returned Future resolves with its own result."""
+        self.start()
+        future = Future()
+        self._queue.put((time.perf_counter(), transaction, baseline, future))
+        return future
+
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[0] + self.max_wait
+            while len(batch) < self.max_items:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Bounded in-flight batches: when the pool is saturated, the queue absorbs load
+        self._in_flight.acquire()
+        waited = time.perf_counter() - batch[0][0]
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._max_wait_seen = max(self._max_wait_seen, waited)
+            bucket = 1 << (len(batch) - 1).bit_length()
+            self._size_buckets[bucket] = self._size_buckets.get(bucket, 0) + 1
+
+        self._submit(batch, len(batch) > 1, self._in_flight.release)
+
+    def _submit(self, batch, retry_singly, done):
+        """Score batch in the pool; done() runs once every caller in it has been resolved."""
+        try:
+            job = self._pool.submit(_score_timed, self.score_fn, [item[1] for item in batch], [item[2] for item in batch])
+        except Exception as e:
+            for item in batch:
+                item[3].set_exception(e)
+            done()
+            return
+
+        def resolve(job):
+            try:
+                results, timings = job.result()
+            except Exception as e:
+                if retry_singly:
+                    # One bad transaction must not fail its neighbours: score each on its own,
+                    # still under the batch's in-flight permit
+                    remaining = [len(batch)]
+                    lock = threading.Lock()
+
+                    def single_done():
+                        with lock:
+                            remaining[0] -= 1
+                            last = remaining[0] == 0
+                        if last:
+                            done()
+
+                    for item in batch:
+                        self._submit([item], False, single_done)
+                    return
+                for item in batch:
+                    item[3].set_exception(e)
+                done()
+                return
+            STAGE_SECONDS.merge(timings)
+            for item, result in zip(batch, results):
+                item[3].set_result(result)
+            done()
+
+        job.add_done_callback(resolve)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "enabled": True,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "max_queue_wait_ms": round(self._max_wait_seen * 1000, 3),
+                "batch_size_histogram": {f"<={size}": n for size, n in sorted(self._size_buckets.items())},
+                "config": {"max_wait_ms": self.max_wait * 1000, "max_items": self.max_items, "processes": self.processes}
+            }
+
+    def shutdown(self):
+        if self._collector is not None:
+            self._queue.put(None)
+            self._collector.join(timeout=1)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,505 @@
+import os
+import json
+import fcntl
+import hashlib
+import contextlib
+import shutil
+import tempfile
+import threading
+import numpy as np
+from array import array
+from gateway.case_ring import CaseRing
+
+# Root for shared state; each server group works in its own subdirectory of it
+STATE_DIR = os.getenv("SENTINEL_STATE_DIR", os.path.join(tempfile.gettempdir(), "sentinel-node-x"))
+
+def _boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as fh:
+            return fh.read().strip().replace("-", "")[:8]
+    except OSError:
+        return "0"
+
+def _start_ticks(pid):
+    """Start time of pid in clock ticks since boot, or None (no such process, or no procfs)."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fh:
+            stat = fh.read()
+    except OSError:
+        return None
+    return int(stat[stat.rfind(b")") + 2:].split()[19])
+
+def server_group():
+    """
+    Identifies one server run: the process group, which Uvicorn (spawned) and
+    pre-fork (Gunicorn) workers inherit from their supervisor, plus when its
+    leader started (boot id + start time). A pgid alone repeats - in a container
+    it is always 1 - so a restarted server still gets a fresh group.
+    Two servers sharing a process group (e.g. started by one script) should set
+    SENTINEL_STATE_GROUP.
+    """
+    override = os.getenv("SENTINEL_STATE_GROUP")
+    if override:
+        return override
+    pgid = os.getpgid(0)
+    return f"{pgid}-{_boot_id()}-{_start_ticks(pgid) or 0}"
+
+def _group_alive(name):
+    # group-<pgid>-<boot>-<ticks>: does that leader still run? Unparsable (overridden) names count as alive
+    try:
+        pgid, boot, ticks = name[len("group-"):].split("-")
+        return boot == _boot_id() and _start_ticks(int(pgid)) == int(ticks)
+    except ValueError:
+        return True
+
+# Group directories this process holds (path -> fd with a shared lock on .inuse)
+_HELD = {}
+
+def prune_groups(state_dir=None):
+    """
+    Delete group directories left behind by servers that are gone: the leader
+    has exited and no process holds the directory's .inuse lock. Returns the
+    names removed.
+    """
+    root = state_dir or STATE_DIR
+    try:
+        names = [name for name in os.listdir(root) if name.startswith("group-")]
+    except FileNotFoundError:
+        return []
+    removed = []
+    for name in names:
+        path = os.path.join(root, name)
+        if path in _HELD or _group_alive(name):
+            continue
+        try:
+            fd = os.open(os.path.join(path, ".inuse"), os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)  # Orphaned workers still use it
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        os.close(fd)
+        removed.append(name)
+    return removed
+
+def group_dir(state_dir=None):
+    """
+    Where this server group keeps its files: another instance never touches them.
+    The first call in a process holds the directory (shared lock, inherited by
+    forked workers) and prunes the directories of groups that are gone.
+    """
+    root = state_dir or STATE_DIR
+    path = os.path.join(root, f"group-{server_group()}")
+    if path not in _HELD:
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, ".inuse"), os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        _HELD[path] = fd
+        prune_groups(root)
+    return path
+
+def _open_shared(path, shape):
+    """Create-or-attach an int64 memmap whose row 0 / col 0 holds the owning process group."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    size = int(np.prod(shape)) * 8
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        current = os.fstat(fd).st_size
+        if current == 0:
+            os.ftruncate(fd, size)
+            os.pwrite(fd, np.int64(os.getpgid(0)).tobytes(), 0)
+        elif current != size:
+            raise ValueError(f"{path} is {current} bytes, expected {size}: it was created with a different layout")
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+    return np.memmap(path, dtype=np.int64, mode="r+", shape=shape)
+
+class SharedCounters:
+    """
+    CROSS-WORKER COUNTERS: Monotonic counters in a memory-mapped file.
+    Every worker process owns a private row, so no increment ever crosses a
+    process boundary; threads of one worker take a thread lock around theirs.
+    Reads sum the rows.
+
+    Layout: row 0 = header [group, slots_in_use], rows 1..max_slots = per-process
+    slots, last row = reset offsets. The last slot is an overflow row: if the others
+    run out (workers recycled thousands of times) late workers share it under the file lock.
+    """
+
+    def __init__(self, fields, name="counters", max_slots=4096, state_dir=None):
+        self.fields = {field: i for i, field in enumerate(fields)}
+        self.max_slots = max_slots
+        self.path = os.path.join(state_dir or group_dir(), f"{name}.bin")
+        self._data = _open_shared(self.path, (max_slots + 2, max(len(fields), 2)))
+        self._pid = None
+        self._row = None
+        self._shared_fd = None
+        self._lock = threading.Lock()
+        # A forked child claims its own row, with a lock no parent thread can be holding
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _claim_slot(self):
+        # Once per process: bump the shared slot allocator under a file lock
+        fd = os.open(self.path, os.O_RDWR)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        slot = int(self._data[0, 1])
+        shared = slot >= self.max_slots - 1
+        self._data[0, 1] = self.max_slots if shared else slot + 1
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        if shared:
+            slot = self.max_slots - 1  # Exhausted: every increment to the overflow row takes the file lock
+            self._shared_fd = fd
+        else:
+            os.close(fd)
+            self._shared_fd = None
+        self._row = self._data[1 + slot]
+        self._pid = os.getpid()
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._claim_slot()
+            if self._shared_fd is None:
+                self._row[self.fields[field]] += amount
+                return
+            fcntl.flock(self._shared_fd, fcntl.LOCK_EX)
+            try:
+                self._row[self.fields[field]] += amount
+            finally:
+                fcntl.flock(self._shared_fd, fcntl.LOCK_UN)
+
+    def _totals(self):
+        in_use = min(int(self._data[0, 1]), self.max_slots)
+        return self._data[1:1 + in_use].sum(axis=0) - self._data[-1]
+
+    def value(self, field):
+        return int(self._totals()[self.fields[field]])
+
+    def snapshot(self):
+        totals = self._totals()
+        return {field: int(totals[i]) for field, i in self.fields.items()}
+
+    def reset(self):
+        """Zero the view by moving the offsets row; slots keep their writers."""
+        in_use = min(int(self._data[0, 1]), self.max_slots)
+        self._data[-1] = self._data[1:1 + in_use].sum(axis=0)
+
+def key_hash(key):
+    """64-bit hash of a string key (never 0: that marks an empty slot)."""
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), "little") or 1
+
+class SharedTable:
+    """
+    SHARED RECORD TABLE: Fixed-width NumPy records keyed by string, in a
+    memory-mapped file every worker of the group maps, so per-user state is
+    one copy whichever worker takes the request.
+
+    Open addressing (linear probing) on a 64-bit key hash; two keys whose
+    hashes collide share a record. Callers work inside locked(): a thread lock
+    plus a flock on the meta file, exclusive for updates and shared for reads.
+    Past 70% load the owner of the lock rehashes into a file twice the size
+    and bumps the generation; other workers remap when they next take the lock.
+    Row numbers are only valid inside the locked() block that found them.
+
+    With state_dir=None the table lives in this process only (same API).
+    Meta layout: [group, capacity, used, generation, record size].
+    """
+
+    LOAD = 0.7
+
+    def __init__(self, fields, name="table", state_dir=None, initial_capacity=1024):
+        self.dtype = np.dtype([("key", "<u8")] + list(fields))
+        self._initial = 1 << max(3, (int(initial_capacity) - 1).bit_length())
+        self._lock = threading.Lock()
+        self._fd = None
+        self.path = None
+        if state_dir is None:
+            self._meta = np.array([0, self._initial, 0, 1, self.dtype.itemsize], dtype=np.int64)
+            self.records = np.zeros(self._initial, dtype=self.dtype)
+            self._gen = 1
+            return
+        self.path = os.path.join(state_dir, name)
+        self._meta = _open_shared(self.path + ".meta", (5,))
+        self._fd = os.open(self.path + ".meta", os.O_RDWR)
+        self.records = None
+        self._gen = 0
+        with self.locked():
+            pass  # Creates the first generation, or attaches to the live one
+        # A forked child needs its own open file description, or its flock would not exclude the parent
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        self._lock = threading.Lock()
+        if self._fd is not None:
+            self._fd = os.open(self.path + ".meta", os.O_RDWR)
+
+    def _file(self, gen):
+        return f"{self.path}-{gen}.bin"
+
+    def _allocate(self, gen, capacity):
+        if self.path is None:
+            return np.zeros(capacity, dtype=self.dtype)
+        # Plain ndarray view of the mapping: memmap's per-slice bookkeeping costs more than the lookups
+        return np.memmap(self._file(gen), dtype=self.dtype, mode="w+", shape=(capacity,)).view(np.ndarray)
+
+    def _attach(self):
+        gen = int(self._meta[3])
+        if gen == 0:
+            self._allocate(1, self._initial)
+            self._meta[1], self._meta[4] = self._initial, self.dtype.itemsize
+            self._meta[3] = gen = 1
+        if int(self._meta[4]) != self.dtype.itemsize:
+            raise ValueError(f"{self.path} holds {int(self._meta[4])}-byte records, expected {self.dtype.itemsize}: "
+                             "it was created with a different layout")
+        if gen != self._gen:
+            self.records = np.memmap(self._file(gen), dtype=self.dtype, mode="r+",
+                                     shape=(int(self._meta[1]),)).view(np.ndarray)
+            self._gen = gen
+
+    @contextlib.contextmanager
+    def locked(self, shared=False):
+        with self._lock:
+            if self._fd is None:
+                yield self
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                self._attach()
+                yield self
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return int(self._meta[2])
+
+    def _probe(self, h):
+        keys = self.records["key"]
+        mask = len(keys) - 1
+        slot = h & mask
+        while True:
+            k = int(keys[slot])
+            if k == h or k == 0:
+                return slot, k == h
+            slot = (slot + 1) & mask
+
+    def find(self, key):
+        """Row of key, or None (under locked())."""
+        slot, found = self._probe(key_hash(key))
+        return slot if found else None
+
+    def claim(self, key):
+        """(row, created) for key, adding a zeroed record if it is new (under an exclusive locked())."""
+        h = key_hash(key)
+        slot, found = self._probe(h)
+        if found:
+            return slot, False
+        if int(self._meta[2]) + 1 > len(self.records) * self.LOAD:
+            self._grow()
+            slot, _ = self._probe(h)
+        self.records["key"][slot] = h
+        self._meta[2] += 1
+        return slot, True
+
+    def _grow(self):
+        old = self.records
+        live = old[old["key"] != 0]
+        capacity, gen = len(old) * 2, self._gen + 1
+        new = self._allocate(gen, capacity)
+        keys, mask, slots = new["key"], capacity - 1, []
+        for h in live["key"].tolist():
+            slot = h & mask
+            while keys[slot]:
+                slot = (slot + 1) & mask
+            keys[slot] = h
+            slots.append(slot)
+        new[slots] = live
+        self.records, self._gen = new, gen
+        self._meta[1] = capacity
+        if self.path is not None:
+            self._meta[3] = gen
+            os.unlink(self._file(gen - 1))  # Workers still mapping it keep their pages until they remap
+
+    def reset(self):
+        with self.locked():
+            self.records[...] = 0
+            self._meta[2] = 0
+
+class CaseJournal:
+    """
+    SHARED CASE JOURNAL: Append-only JSON-lines file of flagged cases.
+    An exclusive file lock makes it single-writer across all workers, which also
+    gives cases one global order and gap-free CASE-NNN ids.
+    Only flagged transactions touch it, never the per-request hot path.
+
+    Readers tail the file incrementally (sync) into a bounded CaseRing plus any
+    extra views (objects with append/clear, e.g. the graph index), and keep a
+    seq -> byte offset index so the full history can be paged without a scan.
+    Sinks (e.g. the durable case archive) see each case once, in the worker
+    that appended it.
+    """
+
+    def __init__(self, name="cases", state_dir=None, ring_capacity=1024):
+        state_dir = state_dir or group_dir()
+        self.path = os.path.join(state_dir, f"{name}.jsonl")
+        # meta: [group, seq, epoch]
+        self._meta = _open_shared(os.path.join(state_dir, f"{name}.meta"), (3,))
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        self._lock = threading.Lock()
+        with self._locked():
+            if self._meta[1] == 0:
+                os.ftruncate(self._fd, 0)  # Fresh meta: whatever the journal held has no ids
+
+        # Reader side (per worker)
+        self._sinks = []
+        self.ring = CaseRing(ring_capacity)
+        self._views = [self.ring]
+        self._sync_lock = threading.Lock()
+        self._epoch = int(self._meta[2])
+        self._read_offset = 0
+        self._line_offsets = array("q")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # flock excludes other workers; the thread lock excludes threads sharing our fd
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def append(self, case):
+        """Assign the next global case id and append; returns the stored case."""
+        return self.append_many([case])[0]
+
+    def append_many(self, cases):
+        with self._locked():
+            seq = int(self._meta[1])
+            stored = [{"id": f"CASE-{seq + i:03d}", **case} for i, case in enumerate(cases, start=1)]
+            if stored:
+                os.write(self._fd, "".join(json.dumps(case, default=str) + "\n" for case in stored).encode())
+            self._meta[1] = seq + len(stored)
+        for sink in self._sinks:
+            sink.append_many(stored)
+        return stored
+
+    def count(self):
+        return int(self._meta[1])
+
+    @property
+    def epoch(self):
+        """Bumped by every reset; cursors from an older epoch are void."""
+        return int(self._meta[2])
+
+    def sync(self):
+        """Pull cases appended by any worker since the last sync: O(new cases)."""
+        with self._sync_lock:
+            if self.epoch != self._epoch or os.fstat(self._fd).st_size < self._read_offset:
+                self._epoch = self.epoch
+                self._read_offset = 0
+                self._line_offsets = array("q")
+                for view in self._views:
+                    view.clear()
+
+            size = os.fstat(self._fd).st_size
+            if size <= self._read_offset:
+                return
+            data = os.pread(self._fd, size - self._read_offset, self._read_offset)
+            data = data[:data.rfind(b"\n") + 1]  # Ignore a line still being written
+            pos = self._read_offset
+            for line in data.splitlines(keepends=True):
+                self._line_offsets.append(pos)
+                case = json.loads(line)
+                for view in self._views:
+                    view.append(case)
+                pos += len(line)
+            self._read_offset = pos
+
+    def add_sink(self, sink):
+        """Forward every case this worker appends from now on (object with append_many)."""
+        self._sinks.append(sink)
+
+    def add_view(self, view):
+        """Register an incrementally maintained index fed with every case, in order."""
+        with self._sync_lock:
+            for case in self._read_cases(0, self._read_offset):
+                view.append(case)
+            self._views.append(view)
+
+    def since(self, cursor, limit=None):
+        """Cases from the ring with seq >= cursor: (cases, next_cursor, truncated)."""
+        self.sync()
+        return self.ring.since(cursor, limit)
+
+    def recent(self):
+        """Everything still held in the ring, oldest first."""
+        self.sync()
+        return self.ring.since(0)[0]
+
+    def history(self, start=0, limit=100):
+        """Page through the full journal (not just the ring) by seq."""
+        self.sync()
+        stop = min(start + limit, len(self._line_offsets))
+        if start >= stop:
+            return []
+        begin = self._line_offsets[start]
+        end = self._line_offsets[stop] if stop < len(self._line_offsets) else self._read_offset
+        return self._read_cases(begin, end)
+
+    def find(self, case_id):
+        """Look a case up by its CASE-NNN id (ring first, then the journal)."""
+        try:
+            seq = int(case_id.rsplit("-", 1)[1]) - 1
+        except (IndexError, ValueError):
+            return None
+        self.sync()
+        if self.ring.tail <= seq < self.ring.head:
+            return self.ring[seq]
+        found = self.history(seq, 1) if seq >= 0 else []
+        return found[0] if found else None
+
+    def _read_cases(self, begin, end):
+        data = os.pread(self._fd, end - begin, begin) if end > begin else b""
+        return [json.loads(line) for line in data.splitlines()]
+
+    def cases(self):
+        return [case for chunk in self.iter_chunks() for case in chunk]
+
+    def iter_chunks(self, chunk_size=5000, block_size=1 << 20):
+        """
+        Stream the whole journal as lists of at most chunk_size cases, reading
+        block_size bytes at a time. Stops at the end observed when iteration starts.
+        """
+        with open(self.path, "rb") as fh:
+            end = os.fstat(fh.fileno()).st_size
+            chunk, pending, pos = [], b"", 0
+            while pos < end:
+                block = fh.read(min(block_size, end - pos))
+                if not block:
+                    break
+                pos += len(block)
+                lines = (pending + block).split(b"\n")
+                pending = lines.pop()  # Partial line (or a line still being written)
+                for line in lines:
+                    if line.strip():
+                        chunk.append(json.loads(line))
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
+
+    def reset(self):
+        with self._locked():
+            os.ftruncate(self._fd, 0)
+            self._meta[1] = 0
+            self._meta[2] += 1
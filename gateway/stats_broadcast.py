@@ -0,0 +1,115 @@
+import json
+import asyncio
+
+class StatsBroadcaster:
+    """
+    PUSH FEED: One poller per worker fans stats deltas out to every connected
+    dashboard. The shared counters and case journal are read at most max_hz
+    times a second, and only while someone is listening; everything that
+    changed in between goes out as a single coalesced delta.
+
+    poll(since, epoch) -> {"processed", "suspicious", "cursor", "epoch",
+    "truncated", "cases"} with the cases from `since` on (same contract as
+    GET /stats?since=&epoch=).
+    """
+
+    def __init__(self, poll, max_hz=10.0, queue_size=16):
+        self.poll = poll
+        self.interval = 1.0 / max_hz
+        self.queue_size = queue_size
+        self.pushes = 0
+        self._subscribers = set()
+        self._pending = set()   # joined since the last tick: owed a snapshot
+        self._task = None
+        self._tick_lock = asyncio.Lock()
+        self._cursor = 0
+        self._epoch = None
+        self._processed = None
+
+    @property
+    def listeners(self):
+        return len(self._subscribers) + len(self._pending)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pending.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        self._pending.discard(queue)
+
+    def _deliver(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up with deltas: drop its backlog, resync with a snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            self._subscribers.discard(queue)
+            self._pending.add(queue)
+
+    async def tick(self):
+        """One poll + fan-out (the loop calls this every interval)."""
+        async with self._tick_lock:
+            # poll() reads files under locks: keep it off the event loop
+            owed = set(self._pending)
+            # One read serves both: from 0 if a snapshot is owed, else from our cursor
+            state = await asyncio.to_thread(self.poll, 0 if owed else self._cursor, self._epoch)
+            self._fan_out(state, owed)
+
+    def _fan_out(self, state, owed):
+        reset = self._epoch is not None and state["epoch"] != self._epoch
+        fresh = state["cursor"] - self._cursor if not reset else state["cursor"]
+        changed = reset or fresh > 0 or state["processed"] != self._processed
+
+        if changed and self._subscribers:
+            cases = state["cases"][-fresh:] if fresh > 0 else []
+            delta = {
+                "processed": state["processed"],
+                "suspicious": state["suspicious"],
+                "cursor": state["cursor"],
+                "epoch": state["epoch"],
+                "reset": reset,
+                "truncated": fresh > len(cases),
+                "cases": cases
+            }
+            self.pushes += 1
+            for queue in list(self._subscribers):
+                self._deliver(queue, ("delta", delta))
+
+        # Only dashboards that were waiting before the poll (and are still here) get its snapshot;
+        # later joiners stay owed one until the next tick
+        ready = owed & self._pending
+        if ready:
+            snapshot = dict(state, reset=True)
+            self._pending -= ready
+            for queue in ready:
+                self._subscribers.add(queue)
+                self._deliver(queue, ("snapshot", snapshot))
+
+        self._cursor, self._epoch, self._processed = state["cursor"], state["epoch"], state["processed"]
+
+    async def _run(self):
+        # Idle dashboards cost nothing: the poller exits once the last one leaves
+        while self._subscribers or self._pending:
+            await self.tick()
+            await asyncio.sleep(self.interval)
+
+    async def events(self, keepalive=15.0):
+        """SSE byte chunks for one dashboard (snapshot first, then deltas)."""
+        queue = self.subscribe()
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                try:
+                    kind, payload = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                event_id = f"{payload['epoch']}-{payload['cursor']}"
+                yield f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n".encode()
+        finally:
+            self.unsubscribe(queue)
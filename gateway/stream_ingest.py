@@ -0,0 +1,178 @@
+import json
+import asyncio
+
+from gateway.fast_json import dumps, loads
+
+from starlette.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
+
+_END = object()
+
+class RecordError(ValueError):
+    """A record that could not be decoded; reported in-order instead of scored."""
+
+class IngestStream:
+    """
+    PERSISTENT INGEST: One long-lived, ordered scoring pipeline per connection.
+
+    A reader feeds decoded records into a queue bounded by `window`; the
+    scorer drains whatever is queued (up to max_batch) into one
+    score_batch() call off the event loop and hands results back in arrival
+    order. When scoring falls behind, the queue fills, the reader stops
+    pulling from the socket and TCP pushes back on the sender.
+    """
+
+    def __init__(self, score_batch, window=256, max_batch=64):
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.received = 0
+        self.completed = 0
+        self._queue = asyncio.Queue(maxsize=window)
+        self._reader_error = None
+
+    async def _read(self, records):
+        try:
+            async for record in records:
+                await self._queue.put((self.received, record))
+                self.received += 1
+        except Exception as e:
+            self._reader_error = e
+        finally:
+            await self._queue.put(_END)
+
+    async def _score_one(self, record):
+        try:
+            return (await asyncio.to_thread(self.score_batch, [record]))[0]
+        except Exception as e:
+            return {"error": f"Triage Engine Error: {str(e)}"}
+
+    async def _score(self, batch):
+        good = [(i, record) for i, (_, record) in enumerate(batch) if not isinstance(record, Exception)]
+        results = [None] * len(batch)
+        if good:
+            try:
+                scored = await asyncio.to_thread(self.score_batch, [record for _, record in good])
+            except Exception:
+                # Only the record that breaks scoring should get the error
+                scored = [await self._score_one(record) for _, record in good]
+            for (i, _), result in zip(good, scored):
+                results[i] = result
+        for i, (_, record) in enumerate(batch):
+            if results[i] is None:
+                results[i] = {"error": str(record)}
+        return [dict(result, seq=seq) for (seq, _), result in zip(batch, results)]
+
+    async def run(self, records):
+        """Consume an async iterator of records; yields result lists, in order, one per scoring batch."""
+        reader = asyncio.create_task(self._read(records))
+        try:
+            while True:
+                first = await self._queue.get()
+                if first is _END:
+                    break
+                batch = [first]
+                ended = False
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is _END:
+                        ended = True
+                        break
+                    batch.append(item)
+                results = await self._score(batch)
+                self.completed += len(results)
+                yield results
+                if ended:
+                    break
+        finally:
+            reader.cancel()
+        if self._reader_error is not None:
+            raise self._reader_error
+
+def _decode(payload):
+    try:
+        record = loads(payload)
+    except ValueError as e:
+        return RecordError(f"Invalid JSON: {e}")
+    if not isinstance(record, dict):
+        return RecordError("Each record must be a JSON object")
+    return record
+
+async def ndjson_records(chunks):
+    """Split a chunked byte stream into decoded records, one per non-blank line."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _decode(line)
+    if pending.strip():
+        yield _decode(pending)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the request body reader, so
+    results can go out while the upload is still arriving.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def ndjson_response(request, stream):
+    """Full-duplex NDJSON: records in on the request body, results out on the response body."""
+    async def body():
+        async for results in stream.run(ndjson_records(request.stream())):
+            yield b"".join(dumps(result) + b"\n" for result in results)
+
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
+async def serve_websocket(websocket, stream):
+    """
+    Credit-based WebSocket ingest. The server opens with {"credit": window};
+    each text frame carries one record or a JSON array of records and spends
+    one credit per record. Every result frame {"results": [...], "credit": n}
+    returns the credits of the records it answers. Sending without credit
+    closes the socket (1008). {"end": true} flushes, then {"done": true, ...}.
+    """
+    credits = stream.window
+
+    async def records():
+        nonlocal credits
+        while True:
+            try:
+                frame = await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            try:
+                message = json.loads(frame)
+            except ValueError as e:
+                message = RecordError(f"Invalid JSON: {e}")
+            if isinstance(message, dict) and message.get("end"):
+                return
+            batch = message if isinstance(message, list) else [message]
+            credits -= len(batch)
+            if credits < 0:
+                await websocket.close(code=1008, reason="credit exceeded")
+                return
+            for record in batch:
+                if isinstance(record, dict) or isinstance(record, Exception):
+                    yield record
+                else:
+                    yield RecordError("Each record must be a JSON object")
+
+    await websocket.send_json({"credit": credits})
+    try:
+        async for results in stream.run(records()):
+            credits += len(results)
+            await websocket.send_json({"results": results, "credit": len(results)})
+        await websocket.send_json({"done": True, "received": stream.received, "completed": stream.completed})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away mid-stream: nothing left to deliver to
+        pass
@@ -1,51 +1,306 @@
-import pandas as pd
+import os
+import sys
+import argparse
+from datetime import datetime
+
 import numpy as np
-from datetime import datetime, timedelta
-import time
+import pandas as pd
 
-# Total alerts to filter down
+# Demo defaults: `python generate_chaos.py` still writes the 2,000-alert Hammer
+# dataset (first 100 rows are attacks) to csharp_client/attack_data.csv
 TOTAL_ALERTS = 2000
-ATTACK_RATE = 0.10 # 10% Attack Rate
+DEMO_ATTACKS = 100
+DEFAULT_OUTPUT = "csharp_client/attack_data.csv"
+
+# Column order the C# Hammer parses by position
+COLUMNS = ["amount", "loc", "timestamp", "mean_amt", "std_amt", "last_loc", "last_time", "type", "ip_address"]
+# --extended adds ground truth for replay/backtests
+EXTENDED_COLUMNS = COLUMNS + ["user_id", "counterparty", "scenario", "expected_suspicious"]
+
+HOME_LOCS = np.array(["Dubai", "London", "New York", "Singapore", "Frankfurt", "Mumbai"])
+BAD_ACTOR_LOCS = np.array(["Russia", "North Korea", "Iran"])
+NORMAL_TYPES = np.array(["POS_PAYMENT", "TRANSFER", "ATM_WITHDRAWAL"])
+# Attackers reuse a handful of exit IPs: those become the fraud-ring hubs in /graph
+ATTACKER_IPS = np.array(["89.14.22.11", "45.33.22.11", "185.220.101.4", "91.219.236.18"])
+
+SCENARIOS = ["structuring", "impossible_travel", "whale", "round_trip", "quick_flip"]
+DEFAULT_MIX = {"structuring": 0.3, "impossible_travel": 0.3, "whale": 0.2, "round_trip": 0.2}
+
+US_PER_HOUR = 3_600_000_000
+# Rows drawn per RNG stream: output never depends on the caller's chunk size
+BLOCK_ROWS = 10_000
 
-# Use the current timestamp to make every attack unique
-def get_dynamic_attack():
+def parse_mix(text):
+    """'structuring=2,whale=1' -> normalized weights over SCENARIOS."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown attack scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        weights[name] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Attack mix weights must sum to > 0")
+    return {name: weight / total for name, weight in weights.items()}
+
+def build_users(rng, n_users):
+    """Per-user behavioral baselines (O(users) memory, shared by every chunk)."""
+    mean_amt = np.round(rng.lognormal(mean=6.5, sigma=0.8, size=n_users), 2)
     return {
-        "amount": np.random.randint(20000, 99999),
-        "loc": np.random.choice(["Russia", "North Korea", "Iran"]),
-        "timestamp": datetime.now().isoformat(),
-        # Z-Score will be calculated by backend, but we inject values that trigger it
-        "mean_amt": 100, 
-        "std_amt": 10,  # Tiny std dev -> Huge Z-Score
-        "last_loc": "Dubai",
-        "last_time": (datetime.now() - timedelta(minutes=1)).isoformat(), # Velocity Violation
-        "type": "WITHDRAWAL_QUICK_FLIP",
-        "ip_address": "89.14.22.11"
+        "user_id": np.char.add("U", np.char.zfill(np.arange(n_users).astype(str), 7)),
+        "home": rng.integers(0, len(HOME_LOCS), n_users),
+        "mean_amt": mean_amt,
+        "std_amt": np.round(mean_amt * rng.uniform(0.1, 0.4, n_users), 2),
+        "ip": np.char.add(
+            np.char.add("10.", rng.integers(0, 256, n_users).astype(str)),
+            np.char.add(".", np.char.add(rng.integers(0, 256, n_users).astype(str),
+                                         np.char.add(".", rng.integers(1, 255, n_users).astype(str))))
+        )
     }
 
-rows = []
-for i in range(TOTAL_ALERTS):
-    # FORCE first 100 to be attacks (Deterministic Demo)
-    is_attack = i < 100 
-    
-    if is_attack:
-        # Generate a fresh, unique attack
-        attack_data = get_dynamic_attack()
-        rows.append(attack_data)
+def _iso(us):
+    return np.datetime_as_string(us.astype("datetime64[us]"), unit="us")
+
+def generate_chunk(rng, users, n, clock_us, first_row, mix, attack_rate, attacks_first=0, tps=500.0,
+                   carry=None, final=True):
+    """
+    Columns for rows [first_row, first_row + n). clock_us is the timestamp
+    (epoch microseconds) of the previous row. What continues into the next
+    call comes back as `carry`: a round trip whose outbound leg is the last
+    row (unless final; the next call opens with its return leg) and the
+    structuring burst still in progress. Returns (columns, new clock, carry).
+    """
+    carry = carry or {}
+    n_users = len(users["mean_amt"])
+    # Poisson arrivals at `tps` events/sec, continuing the previous chunk's clock
+    ts = clock_us + np.cumsum(rng.exponential(1e6 / tps, n)).astype(np.int64)
+    user = rng.integers(0, n_users, n)
+    counterparty = rng.integers(0, n_users, n)
+    home = users["home"][user]
+
+    mean_amt = users["mean_amt"][user]
+    std_amt = users["std_amt"][user]
+    amount = np.round(np.maximum(rng.normal(mean_amt, std_amt), 1.0), 2)
+    loc = home.copy()
+    # 3% of normal traffic travels, always with a plausible gap since the last tx
+    travel = rng.random(n) < 0.03
+    loc[travel] = (home[travel] + rng.integers(1, len(HOME_LOCS), travel.sum())) % len(HOME_LOCS)
+    gap_h = rng.exponential(24.0, n) + 0.5 + travel * 12.0
+    last_time = ts - (gap_h * US_PER_HOUR).astype(np.int64)
+
+    loc_names = HOME_LOCS[loc].astype(object)
+    last_loc = HOME_LOCS[home].astype(object)
+    tx_type = NORMAL_TYPES[rng.integers(0, len(NORMAL_TYPES), n)].astype(object)
+    ip = users["ip"][user].astype(object)
+
+    # Which rows are attacks, and of what kind
+    rows = first_row + np.arange(n)
+    if attacks_first:
+        is_attack = rows < attacks_first
     else:
-        # NOISE (Normal Behavior)
-        rows.append({
-            "amount": np.random.randint(50, 150), 
-            "loc": "Dubai", 
-            "timestamp": datetime.now().isoformat(),
-            "mean_amt": 500, 
-            "std_amt": 100, 
-            "last_loc": "Dubai", 
-            "last_time": (datetime.now() - timedelta(days=1)).isoformat(),
-            "type": "POS_PAYMENT",
-            "ip_address": f"10.0.0.{np.random.randint(1, 255)}"
-        })
-
-# Save to csharp_client so the .NET runner sees it immediately
-output_path = "csharp_client/attack_data.csv"
-pd.DataFrame(rows).to_csv(output_path, index=False)
-print(f"Dataset generated at {output_path} with {int(TOTAL_ALERTS * ATTACK_RATE)} dynamic attacks.")
+        is_attack = rng.random(n) < attack_rate
+    names = list(mix)
+    scenario = np.full(n, "normal", dtype=object)
+    scenario[is_attack] = np.array(names, dtype=object)[rng.choice(len(names), is_attack.sum(), p=[mix[k] for k in names])]
+
+    minutes = lambda lo, hi, size: (rng.uniform(lo, hi, size) * 60e6).astype(np.int64)
+
+    # Structuring: bursts of 3-6 deposits just under the threshold, each burst from one account
+    m = np.flatnonzero(scenario == "structuring")
+    k = len(m)
+    burst_user, burst_left = carry.get("burst", (0, 0))
+    pos = 0
+    while pos < k:
+        if burst_left == 0:
+            burst_user, burst_left = int(rng.integers(0, n_users)), int(rng.integers(3, 7))
+        take = min(burst_left, k - pos)
+        user[m[pos:pos + take]] = burst_user
+        pos += take
+        burst_left -= take
+    loc_names[m] = last_loc[m] = HOME_LOCS[users["home"][user[m]]]
+    mean_amt[m] = users["mean_amt"][user[m]]
+    std_amt[m] = users["std_amt"][user[m]]
+    ip[m] = users["ip"][user[m]]
+    amount[m] = np.round(rng.uniform(9000, 9990, k))
+    last_time[m] = ts[m] - minutes(5, 60, k)
+    tx_type[m] = "CASH_DEPOSIT"
+
+    m = scenario == "impossible_travel"
+    k = m.sum()
+    amount[m] = np.round(rng.uniform(20000, 99999, k))
+    loc_names[m] = BAD_ACTOR_LOCS[rng.integers(0, len(BAD_ACTOR_LOCS), k)]
+    last_time[m] = ts[m] - minutes(1, 60, k)
+    tx_type[m] = "WITHDRAWAL_QUICK_FLIP"
+    ip[m] = ATTACKER_IPS[rng.integers(0, len(ATTACKER_IPS), k)]
+
+    m = scenario == "whale"
+    k = m.sum()
+    amount[m] = np.round(mean_amt[m] * rng.uniform(200, 2000, k), 2)
+    tx_type[m] = "WIRE_TRANSFER"
+
+    # Round trip: A->B, then B->A for slightly less a few minutes later (next row)
+    starts = np.flatnonzero(scenario == "round_trip")
+    trip = carry.get("trip")
+    if trip is not None:
+        starts = starts[starts > 0]  # Row 0 closes the previous block's trip
+    starts = starts[~np.isin(starts, starts + 1)]
+    pending = None
+    if n and starts.size and starts[-1] == n - 1:
+        pending = starts[-1:] if not final else None
+        starts = starts[:-1]
+    back = starts + 1
+    scenario[scenario == "round_trip"] = "normal"
+    is_attack[:] = scenario != "normal"
+    scenario[starts] = scenario[back] = "round_trip"
+    is_attack[starts] = is_attack[back] = True
+    amount[starts] = np.round(rng.uniform(30000, 150000, len(starts)))
+    amount[back] = np.round(amount[starts] * rng.uniform(0.95, 0.99, len(starts)), 2)
+    counterparty[back] = user[starts]
+    user[back] = counterparty[starts]
+    last_time[back] = ts[starts]
+    if pending is not None:
+        scenario[pending] = "round_trip"
+        is_attack[pending] = True
+        amount[pending] = np.round(rng.uniform(30000, 150000, 1))
+    if trip is not None:
+        back = np.append(back, 0)
+        scenario[0] = "round_trip"
+        is_attack[0] = True
+        amount[0] = np.round(trip["amount"] * rng.uniform(0.95, 0.99), 2)
+        user[0], counterparty[0] = trip["counterparty"], trip["user"]
+        last_time[0] = trip["ts"]
+    idx = np.concatenate([starts, back] + ([pending] if pending is not None else []))
+    loc_names[idx] = last_loc[idx] = HOME_LOCS[users["home"][user[idx]]]
+    mean_amt[idx] = users["mean_amt"][user[idx]]
+    std_amt[idx] = users["std_amt"][user[idx]]
+    ip[idx] = users["ip"][user[idx]]
+    tx_type[idx] = "TRANSFER"
+    if pending is not None:
+        i = int(pending[0])
+        pending = {"user": user[i], "counterparty": counterparty[i], "amount": amount[i], "ts": ts[i]}
+
+    # Legacy Hammer attack: sanctioned jurisdiction one minute after Dubai, tiny baseline
+    m = scenario == "quick_flip"
+    k = m.sum()
+    amount[m] = rng.integers(20000, 99999, k)
+    loc_names[m] = BAD_ACTOR_LOCS[rng.integers(0, len(BAD_ACTOR_LOCS), k)]
+    mean_amt[m] = 100
+    std_amt[m] = 10
+    last_loc[m] = "Dubai"
+    last_time[m] = ts[m] - 60_000_000
+    tx_type[m] = "WITHDRAWAL_QUICK_FLIP"
+    ip[m] = "89.14.22.11"
+
+    columns = {
+        "amount": amount,
+        "loc": loc_names,
+        "timestamp": _iso(ts),
+        "mean_amt": mean_amt,
+        "std_amt": std_amt,
+        "last_loc": last_loc,
+        "last_time": _iso(last_time),
+        "type": tx_type,
+        "ip_address": ip,
+        "user_id": users["user_id"][user],
+        "counterparty": users["user_id"][counterparty],
+        "scenario": scenario,
+        "expected_suspicious": is_attack
+    }
+    return columns, int(ts[-1]) if n else clock_us, {"trip": pending, "burst": (burst_user, burst_left)}
+
+def iter_chunks(rows=TOTAL_ALERTS, chunk_size=100_000, seed=7, n_users=None, mix=None,
+                attack_rate=0.05, attacks_first=0, tps=500.0, start=None, extended=False):
+    """
+    Yield DataFrames of at most chunk_size rows. The rows are a pure function
+    of (seed, start, and the other arguments) - chunk_size only decides where
+    the stream is cut. Memory is bounded by chunk_size + BLOCK_ROWS plus the
+    user table.
+    """
+    users = build_users(np.random.default_rng(seed), n_users or max(1, rows // 50))
+    start = start or datetime.now()
+    clock = int(np.datetime64(start, "us").astype(np.int64))
+    mix = mix or DEFAULT_MIX
+    fields = EXTENDED_COLUMNS if extended else COLUMNS
+
+    held, carry = [], None
+    for block, first in enumerate(range(0, rows, BLOCK_ROWS)):
+        n = min(BLOCK_ROWS, rows - first)
+        # One RNG stream per fixed block, so cutting the output differently changes nothing
+        rng = np.random.default_rng([seed, block])
+        columns, clock, carry = generate_chunk(rng, users, n, clock, first, mix, attack_rate, attacks_first, tps,
+                                               carry=carry, final=first + n == rows)
+        held.append(pd.DataFrame({name: columns[name] for name in fields}))
+        frame = pd.concat(held, ignore_index=True) if len(held) > 1 else held[0]
+        cut = 0
+        while len(frame) - cut >= chunk_size:
+            yield frame.iloc[cut:cut + chunk_size].reset_index(drop=True)
+            cut += chunk_size
+        held = [frame.iloc[cut:].reset_index(drop=True)] if cut < len(frame) else []
+    if held:
+        yield held[0]
+
+def write_chunks(chunks, path, fmt):
+    """Stream chunks to CSV, NDJSON or Parquet; returns the number of rows written."""
+    written = 0
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return written
+
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            if fmt == "csv":
+                chunk.to_csv(f, index=False, header=i == 0)
+            else:
+                chunk.to_json(f, orient="records", lines=True)
+            written += len(chunk)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic transaction generator for Sentinel-Node X")
+    parser.add_argument("--rows", type=int, default=TOTAL_ALERTS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet"], help="default: from the output extension")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start", help="ISO timestamp of the first row (default: now)")
+    parser.add_argument("--users", type=int, help="distinct users (default: rows / 50)")
+    parser.add_argument("--attack-rate", type=float, default=0.05)
+    parser.add_argument("--mix", help="attack mix, e.g. structuring=3,impossible_travel=2,whale=1,round_trip=1")
+    parser.add_argument("--tps", type=float, default=500.0, help="mean arrival rate for timestamps")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--extended", action="store_true", help="add user_id, counterparty, scenario, expected_suspicious")
+    args = parser.parse_args(argv)
+
+    # No arguments at all = the Hammer demo dataset (first 100 rows are legacy attacks)
+    demo = not (sys.argv[1:] if argv is None else argv)
+    fmt = args.format or {".parquet": "parquet", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(os.path.splitext(args.output)[1], "csv")
+    chunks = iter_chunks(
+        rows=args.rows,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        n_users=args.users,
+        mix={"quick_flip": 1.0} if demo else (parse_mix(args.mix) if args.mix else None),
+        attack_rate=args.attack_rate,
+        attacks_first=DEMO_ATTACKS if demo else 0,
+        tps=args.tps,
+        start=datetime.fromisoformat(args.start) if args.start else None,
+        extended=args.extended
+    )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    written = write_chunks(chunks, args.output, fmt)
+    print(f"Dataset generated at {args.output} with {written} rows ({fmt}).")
+
+if __name__ == "__main__":
+    main()
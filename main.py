@@ -1,8 +1,14 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Request, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from typing import List, Literal, Optional, Union
+from typing_extensions import Required, TypedDict
+import os
 import time
+import functools
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,7 +27,7 @@ app.add_middleware(
 @app.post("/force_inject")
 async def force_inject():
     import random
-    STATS["processed"] += 2500
+    COUNTERS.incr("processed", 2500)
     
     scenarios = [
         {
@@ -61,9 +67,7 @@ async def force_inject():
         # Add slight variance to the numbers to look organic
         variance = random.uniform(-0.1, 0.1)
         
-        STATS["suspicious"] += 1
-        STATS["cases"].append({
-            "id": f"CASE-{STATS['suspicious']:03d}",
+        CASES.append({
             "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
             "amount": scenario["amount"] + int(random.uniform(-100, 100)),
             "type": scenario["type"],
@@ -72,174 +76,747 @@ async def force_inject():
         })
     return {"status": "Injected 50 Rich & Realistic Urgent Cases"}
 
-# Production-grade request validation
+# Production-grade request validation.
+# TypedDicts validate straight into plain dicts: no model objects, no model_dump() copies.
+# Ints stay ints (Union, not float) so reasoning strings read exactly as before.
+Number = Union[int, float]
+
+class Transaction(TypedDict, total=False):
+    __pydantic_config__ = ConfigDict(extra="allow")
+    amount: Required[Number]
+    loc: Required[str]
+    timestamp: Required[str]
+    type: str
+    ip_address: str
+    user_id: Union[str, int]
+    account_id: Union[str, int]
+    counterparty: Union[str, int]
+
+class Baseline(TypedDict, total=False):
+    __pydantic_config__ = ConfigDict(extra="allow")
+    mean_amt: Number
+    std_amt: Number
+    last_loc: str
+    last_time: str
+
 class TriageRequest(BaseModel):
-    transaction: Dict[str, Any] = Field(..., description="Details of the current transaction")
-    user_baseline: Dict[str, Any] = Field(..., description="Historical behavioral baseline of the user")
-
-# Global Stats for "War Room" Dashboard
-STATS = {
-    "processed": 0,
-    "suspicious": 0,
-    "cases": [] # Store details of the 50 bad actors
-}
+    transaction: Transaction = Field(..., description="Details of the current transaction")
+    user_baseline: Baseline = Field(default_factory=dict, description="Historical behavioral baseline of the user (optional when transaction carries a user_id)")
+
+# Schemas of bodies that handlers parse themselves, added to the OpenAPI components
+_DOC_SCHEMAS = {}
+
+def _documented_body(model):
+    """openapi_extra requestBody for a hand-parsed body; its $defs become shared components."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    _DOC_SCHEMAS.update(schema.pop("$defs", {}))
+    _DOC_SCHEMAS[model.__name__] = schema
+    return {"requestBody": {
+        "required": True, "content": {"application/json": {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}}}
+    }}
+
+_generate_openapi = app.openapi
+
+def _openapi():
+    if app.openapi_schema is None:
+        components = _generate_openapi().setdefault("components", {}).setdefault("schemas", {})
+        for name, schema in _DOC_SCHEMAS.items():
+            components.setdefault(name, schema)
+    return app.openapi_schema
+
+app.openapi = _openapi
+
+from gateway.shared_state import SharedCounters, CaseJournal, group_dir, server_group
+from gateway.case_archive import CaseArchive
+from gateway.graph_index import CaseGraph
+from gateway.stats_broadcast import StatsBroadcaster
+from skills.compliance_radar.watchlist import SCREENING
+from skills.temporal_analyst.flow_graph import CircularFlowDetector, epoch_seconds
+from skills.temporal_analyst.structuring import StructuringDetector
+from skills.temporal_analyst.fuzzy_rules import FUZZY_RULES, RuleError
+from gateway.fast_json import FastJSONResponse
+from gateway.event_log import EventLog, parse_rates
+from gateway.admission import AdmissionController, Overloaded, PRIORITY, STANDARD
+from gateway.metrics import timed, render_metrics, TRIAGE_REQUESTS, TRIAGE_ERRORS, TRIAGE_SUSPICIOUS
+
+# Global Stats for "War Room" Dashboard (shared by every Uvicorn worker)
+COUNTERS = SharedCounters(["processed"])
+CASES = CaseJournal(ring_capacity=int(os.getenv("SENTINEL_CASE_RING", "1024"))) # Store details of the 50 bad actors
+
+# Structured event log: sampled + rate-limited per category, written off the request path.
+# Debug is off by default; e.g. SENTINEL_LOG_SAMPLING="debug=0.01" keeps 1% of requests.
+EVENTS = EventLog(
+    os.getenv("SENTINEL_LOG_FILE", os.path.join(group_dir(), "events.jsonl")),
+    sampling=parse_rates(os.getenv("SENTINEL_LOG_SAMPLING", "debug=0")),
+    rate_limits=parse_rates(os.getenv("SENTINEL_LOG_RATE", "debug=50,demo=50,suspicious=500")),
+    max_bytes=int(os.getenv("SENTINEL_LOG_MAX_BYTES", str(50 << 20))),
+    backups=int(os.getenv("SENTINEL_LOG_BACKUPS", "5"))
+)
+
+# Fraud-ring graph, folded in as each worker tails the journal
+GRAPH = CaseGraph(max_cases=int(os.getenv("SENTINEL_GRAPH_CASES", "10000")))
+CASES.add_view(GRAPH)
+
+# Durable, queryable history: survives restarts and /reset (group-committed off the request path).
+# Kept in a data directory, not with the per-run state under the temp dir.
+DATA_DIR = os.getenv("SENTINEL_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+ARCHIVE = CaseArchive(os.getenv("SENTINEL_CASE_DB", os.path.join(DATA_DIR, "case_archive.db")), run=str(server_group()))
+CASES.add_sink(ARCHIVE)
+
+def _stats_snapshot():
+    return {
+        "processed": COUNTERS.value("processed"),
+        "suspicious": CASES.count(),
+        "cases": CASES.recent() # Bounded by the case ring; full history via /stats/history
+    }
+
+def _reset_stats():
+    COUNTERS.reset()
+    CASES.reset()
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms and throughput,
+    error and suspicious counters of this worker, plus cross-worker totals.
+    """
+    totals = [
+        "# HELP sentinel_processed_total Transactions processed across all workers.",
+        "# TYPE sentinel_processed_total counter",
+        f"sentinel_processed_total {COUNTERS.value('processed')}",
+        "# HELP sentinel_cases_total Cases flagged across all workers since the last reset.",
+        "# TYPE sentinel_cases_total counter",
+        f"sentinel_cases_total {CASES.count()}",
+        "# HELP sentinel_case_archive_pending Cases queued for the archive writer of this worker.",
+        "# TYPE sentinel_case_archive_pending gauge",
+        f"sentinel_case_archive_pending {ARCHIVE.pending}",
+        "# HELP sentinel_case_archive_retries_total Archive batches that failed to commit and were retried, this worker.",
+        "# TYPE sentinel_case_archive_retries_total counter",
+        f"sentinel_case_archive_retries_total {ARCHIVE.retries}",
+        "# HELP sentinel_case_archive_dropped_total Cases the archive could not store, this worker.",
+        "# TYPE sentinel_case_archive_dropped_total counter",
+        f"sentinel_case_archive_dropped_total {ARCHIVE.dropped}",
+        "# HELP sentinel_report_cache_hits_total Case reports served from the LRU.",
+        "# TYPE sentinel_report_cache_hits_total counter",
+        f"sentinel_report_cache_hits_total {_render_report.cache_info().hits}",
+        "# HELP sentinel_report_cache_misses_total Case reports rendered.",
+        "# TYPE sentinel_report_cache_misses_total counter",
+        f"sentinel_report_cache_misses_total {_render_report.cache_info().misses}",
+        *EVENTS.metric_lines(),
+        *ADMISSION.metric_lines(),
+    ]
+    return PlainTextResponse(render_metrics(totals), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 def health_check():
     return {"status": "Active", "uptime": time.time()}
 
 @app.get("/stats")
-def get_stats():
-    """Live stats for the dashboard counter"""
-    return STATS
+def get_stats(since: Optional[int] = Query(None, ge=0, description="Cursor from the previous poll"),
+              epoch: Optional[int] = Query(None, description="Epoch from the previous poll")):
+    """
+    Live stats for the dashboard counter.
+    With ?since=<cursor> only counters plus cases appended after the cursor are
+    returned (O(new cases) per poll); pass the returned cursor/epoch next time.
+    """
+    if since is None:
+        return _stats_snapshot()
+    return _stats_delta(since, epoch)
+
+def _stats_delta(since, epoch=None):
+    # A reset since the last poll voids the cursor: replay from the start
+    if epoch is not None and epoch != CASES.epoch:
+        since = 0
+    cases, cursor, truncated = CASES.since(since)
+    return {
+        "processed": COUNTERS.value("processed"),
+        "suspicious": CASES.count(),
+        "cursor": cursor,
+        "epoch": CASES.epoch,
+        "truncated": truncated, # Ring already dropped some: backfill via /stats/history
+        "cases": cases
+    }
+
+# One poller per worker fans out to every connected dashboard
+STATS_FEED = StatsBroadcaster(_stats_delta, max_hz=float(os.getenv("SENTINEL_STATS_HZ", "10")))
+
+@app.get("/stats/stream")
+def stream_stats():
+    """
+    Server-Sent Events push feed for the War Room: a snapshot on connect, then
+    coalesced deltas (counters + newly flagged cases) at most SENTINEL_STATS_HZ
+    times a second, and nothing at all while idle.
+    """
+    return StreamingResponse(
+        STATS_FEED.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/stats/history")
+def get_stats_history(start: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """Full case history, paginated by sequence number"""
+    cases = CASES.history(start, limit)
+    return {"start": start, "next": start + len(cases), "total": CASES.count(), "cases": cases}
 
 @app.post("/reset")
 def reset_stats():
     """Reset global stats for a fresh demo run"""
-    global STATS
-    STATS["processed"] = 0
-    STATS["suspicious"] = 0
-    STATS["cases"] = []
-    return {"status": "Stats Reset", "stats": STATS}
+    _reset_stats()
+    return {"status": "Stats Reset", "stats": _stats_snapshot()}
 
 @app.get("/graph")
-def get_graph():
+def get_graph(request: Request,
+              since: Optional[int] = Query(None, ge=0, description="Graph version from the previous fetch"),
+              epoch: Optional[int] = Query(None, description="Epoch from the previous fetch"),
+              hubs: int = Query(10, ge=0, le=1000, description="How many of the biggest IP hubs to rank")):
     """
     Generate Network Graph for 'Mind-Blowing' Fraud Ring Visualization.
     Uses Star Topology: IP Addresses are Hubs, Cases are Spokes.
+    The graph is maintained incrementally; ?since=<version> returns only the
+    nodes/links added after that version, and If-None-Match gets a 304 when
+    nothing changed. Only the newest SENTINEL_GRAPH_CASES cases are kept;
+    "full": true means replace the graph rather than merge the delta.
+    """
+    CASES.sync()
+    # A reset since the last fetch, or a version that has expired, voids the delta: send the whole graph
+    if since is None or (epoch is not None and epoch != CASES.epoch) or since < GRAPH.tail:
+        since = 0
+    etag = f'W/"{CASES.epoch}-{GRAPH.version}-{since}-{hubs}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    nodes, links = GRAPH.since(since)
+    return JSONResponse({
+        "version": GRAPH.version,
+        "epoch": CASES.epoch,
+        "full": since == 0,
+        "nodes": nodes,
+        "links": links,
+        "hubs": GRAPH.top_hubs(hubs)
+    }, headers={"ETag": etag})
+
+# Strict Baseline injected when the caller sends none (so 'Soft Computing' metrics work for Demo)
+DEFAULT_BASELINE = {
+    "mean_amt": 500,        # Low average to make $36k huge
+    "std_amt": 200,         # Low deviation
+    "last_loc": "Dubai",    # Default location
+    "last_time": "2024-01-01T00:00:00"
+}
+
+# Rotation of 5 Cool Scenarios (High Value & Complete Math)
+DEMO_SCENARIOS = [
+    {
+        "type": "SANCTIONS", 
+        "reason": "CRITICAL: Impossible Travel to Sanctioned Jurisdiction | Vel:True | Loc:Dubai->Pyongyang | Time:0.5h | Z:99.9 | Fuzzy Score: 1.00 | Mean:500 | Std:100", 
+        "amt_fixed": 50000 
+    },
+    {
+        "type": "WHALE_ALERT", 
+        "reason": "WHALE_ALERT: Abnormal Liquidity Event | Z:5.42 | Fuzzy Score: 0.98 | Mean:5000 | Std:2500", 
+        "amt_fixed": 1250000 
+    },
+    {
+        "type": "ROUND_TRIP", 
+        "reason": "LAUNDERING: Circular Flow (A->B->A) | Vel:True | Loc:Dubai->London->Dubai | Time:2h | Z:4.90 | Fuzzy Score: 0.91 | Mean:1000 | Std:200", 
+        "amt_fixed": 85500 
+    },
+    {
+        "type": "STRUCTURING", 
+        "reason": "CRITICAL: High-Freq Structuring (<$10k) | Z:3.12 | Fuzzy Score: 0.88 | Mean:2000 | Std:500", 
+        "amt_fixed": 9850 
+    },
+    {
+        "type": "VELOCITY", 
+        "reason": "SUSPICIOUS: Velocity Violation | Vel:True | Loc:Dubai->London | Time:1h | Z:3.15 | Fuzzy Score: 0.85 | Mean:500 | Std:100", 
+        "amt_fixed": 12500 
+    }
+]
+
+from skills.temporal_analyst.baseline_store import BaselineStore
+
+# Server-owned rolling baselines keyed by user/account ID, one copy for every worker of the group
+BASELINES = BaselineStore(state_dir=group_dir())
+
+def _user_key(tx_data):
+    user_key = tx_data.get('user_id') or tx_data.get('account_id')
+    return str(user_key) if user_key is not None else None
+
+def _resolve_baseline(base_data, tx_data):
+    """Caller-supplied baseline wins, then the server-side store, then the demo default."""
+    if base_data and base_data.get('mean_amt'):
+        return base_data
+    user_key = _user_key(tx_data)
+    if user_key is not None:
+        return BASELINES.get(user_key, prior=dict(DEFAULT_BASELINE))
+    return dict(DEFAULT_BASELINE)
+
+# Streaming round-trip detection (per worker): A->B->A style cycles within the window
+FLOWS = CircularFlowDetector(
+    window_seconds=float(os.getenv("SENTINEL_FLOW_WINDOW_S", "86400")),
+    max_fanout=int(os.getenv("SENTINEL_FLOW_FANOUT", "64"))
+)
+
+# Structuring (smurfing): amounts just under the reporting threshold, per account and window.
+# One set of buckets for every worker of the group, so a run split across workers still adds up.
+STRUCTURING = StructuringDetector(
+    threshold=float(os.getenv("SENTINEL_STRUCTURING_THRESHOLD", "10000")),
+    windows=tuple(int(w) for w in os.getenv("SENTINEL_STRUCTURING_WINDOWS", "3600,86400,604800").split(",")),
+    state_dir=group_dir()
+)
+
+def _observe_patterns(tx_data):
     """
-    nodes = []
-    links = []
+    Feed the streaming detectors (round-trip flows, structuring) and tag the
+    transaction with their memberships; client-supplied values are dropped.
+    """
+    for key in ('flow_risk', 'flow_cycle', 'structuring_risk', 'structuring_detail'):
+        tx_data.pop(key, None)
     
-    # Track unique IPs to create Hub nodes
-    seen_ips = {}
+    flow_risk, cycle = FLOWS.observe_tx(tx_data)
+    if cycle:
+        tx_data['flow_risk'] = flow_risk
+        tx_data['flow_cycle'] = cycle
     
-    for case in STATS["cases"]:
-        # 1. Add Case Node (Spoke)
-        nodes.append({
-            "id": case["id"],
-            "type": case["type"],
-            "val": 5, # Smaller spokes
-            "group": "case"
-        })
+    account = _user_key(tx_data)
+    if account is not None and tx_data.get('timestamp'):
+        risk, detail = STRUCTURING.observe(account, float(tx_data.get('amount', 0)), epoch_seconds(tx_data['timestamp']))
+        if detail:
+            tx_data['structuring_risk'] = risk
+            tx_data['structuring_detail'] = detail
+
+def _observe_baseline(tx_data):
+    """Roll the scored transaction into the user's server-side baseline."""
+    user_key = _user_key(tx_data)
+    if user_key is not None:
+        BASELINES.update(user_key, tx_data['amount'], tx_data['loc'], tx_data['timestamp'])
+
+def _apply_demo_god_mode(tx_data, result):
+    """DEMO GOD MODE: Unconditionally flag 5% of traffic to guarantee "Urgent Cases"."""
+    import random
+    is_demo_hit = random.random() < 0.05
+    
+    if is_demo_hit or SCREENING.index.is_sanctioned_jurisdiction(tx_data.get('loc') or ''):
+        result['is_suspicious'] = True
         
-        # 2. Add/Find IP Node (Hub)
-        ip = case.get("ip", "N/A")
-        if ip != "N/A":
-            if ip not in seen_ips:
-                nodes.append({
-                    "id": ip,
-                    "type": "IP_ADDRESS",
-                    "val": 15, # Big Hub
-                    "group": "ip"
-                })
-                seen_ips[ip] = True
-            
-            # 3. Link Spoke to Hub
-            links.append({
-                "source": case["id"],
-                "target": ip
-            })
-                
-    return {"nodes": nodes, "links": links}
-
-@app.post("/triage")
-def triage_endpoint(request: TriageRequest, background_tasks: BackgroundTasks):
+        outcome = random.choice(DEMO_SCENARIOS)
+        result['temporal_result']['reasoning'] = outcome['reason']
+        tx_data['type'] = outcome['type']
+        tx_data['amount'] = outcome['amt_fixed'] # Override with high-value amount
+        
+        EVENTS.log("demo", "override", scenario=outcome['type'], tx=dict(tx_data))
+
+def _record_result(tx_data, result):
+    """Update Global Stats; returns the stored case if the transaction was flagged"""
+    COUNTERS.incr("processed")
+    TRIAGE_REQUESTS.inc()
+    if result.get("is_suspicious"):
+        TRIAGE_SUSPICIOUS.inc()
+        temporal = result.get('temporal_result', {})
+        # Store case details for the "Clickable List"
+        case = {
+            "timestamp": tx_data.get('timestamp'),
+            "amount": tx_data.get('amount'),
+            "type": tx_data.get('type', 'TRANSFER'),
+            "reason": temporal.get('reasoning', 'Unknown'),
+            "ip": tx_data.get('ip_address', 'N/A'),
+            "loc": tx_data.get('loc'),
+            "score": temporal.get('score'),
+            "action": temporal.get('action')
+        }
+        # Compact evidence for the on-demand report (no rendered text)
+        compliance = result.get('compliance_result') or {}
+        if compliance.get('flags'):
+            case["flags"] = compliance['flags']
+        stored = CASES.append(case)
+        result['report_url'] = f"/cases/{stored['id']}/report"
+        EVENTS.log("suspicious", "case_flagged", case=stored)
+        return stored
+    return None
+
+# Opt-in: ground SARs for flagged cases in the background, after the response is sent
+PREFETCH_SARS = os.getenv("SENTINEL_LIVE_GROUNDING", "0") == "1"
+
+def _case_state(case):
+    """Rebuild the slice of InvestigationState the narrative builders read."""
+    return {
+        "alert_id": case["id"],
+        "evidence": {
+            "case_id": case["id"],
+            "amount": case.get("amount"),
+            "loc": case.get("loc"),
+            "timestamp": case.get("timestamp"),
+            "type": case.get("type"),
+            "ip_address": case.get("ip")
+        },
+        "temporal_result": {
+            "is_suspicious": True,
+            "score": case.get("score") if case.get("score") is not None else 1.0,
+            "action": case.get("action") or "AUTONOMOUS_FREEZE",
+            "reasoning": case.get("reason")
+        },
+        "compliance_result": {"flags": case["flags"]} if case.get("flags") else {}
+    }
+
+async def _prefetch_sar(case):
+    # Warms the grounding cache so /cases/{id}/sar answers instantly
+    from skills.orchestrator.langgraph_logic import get_grounded_narrative
+    await get_grounded_narrative(_case_state(case))
+
+@app.get("/cases")
+def query_cases(type: Optional[str] = None, ip: Optional[str] = None, loc: Optional[str] = None,
+                action: Optional[str] = None, case_id: Optional[str] = None,
+                min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                start: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+                end: Optional[str] = Query(None, description="ISO timestamp, exclusive"),
+                sort: str = Query("archive_id", description="archive_id, timestamp, amount or score"),
+                order: str = Query("desc", description="asc or desc"),
+                limit: int = Query(100, ge=1, le=1000),
+                cursor: Optional[str] = Query(None, description="'next' from the previous page")):
     """
-    High-concurrency triage endpoint backed by 4-worker Uvicorn.
+    Investigator search over the durable case archive (every run, never reset).
+    Filters combine with AND; pages are keyset-paginated, so page 10,000 is as
+    cheap as page 1.
     """
     try:
-        # Access data safely via Pydantic model
-        data = request.model_dump()
-        tx_data = data['transaction']
-        
+        cases, next_cursor = ARCHIVE.query(
+            sort=sort, order=order, limit=limit, cursor=cursor,
+            min_amount=min_amount, max_amount=max_amount, start=start, end=end,
+            type=type, ip=ip, loc=loc, action=action, case_id=case_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"count": len(cases), "next": next_cursor, "cases": cases}
+
+# Rendered reports, keyed by (journal epoch, case id): a /reset never serves stale text
+@functools.lru_cache(maxsize=int(os.getenv("SENTINEL_REPORT_CACHE", "1024")))
+def _render_report(epoch, case_id):
+    case = CASES.find(case_id)
+    if case is None:
+        raise KeyError(case_id)  # Not cached: the case may exist on the next call
+    from skills.orchestrator.langgraph_logic import render_case_report
+    return render_case_report(_case_state(case))
+
+@app.get("/cases/{case_id}/report")
+def get_case_report(case_id: str, format: Literal["json", "markdown"] = Query("json")):
+    """
+    Investigation report for one flagged case, rendered on first read from
+    the stored evidence and memoized (SENTINEL_REPORT_CACHE entries, LRU).
+    """
+    try:
+        report = _render_report(CASES.epoch, case_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown case {case_id}")
+    if format == "markdown":
+        return PlainTextResponse(report, media_type="text/markdown; charset=utf-8")
+    return {"id": case_id, "report": report, "sar": f"/cases/{case_id}/sar"}
+
+@app.get("/cases/{case_id}/sar")
+async def get_case_sar(case_id: str):
+    """
+    Grounded Suspicious Activity Report for one case (async Compliance Radar stage).
+    Falls back to the deterministic narrative if live grounding is unavailable.
+    """
+    case = CASES.find(case_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail=f"Unknown case {case_id}")
+    
+    from skills.orchestrator.langgraph_logic import get_grounded_narrative
+    return {"id": case_id, "sar": (await get_grounded_narrative(_case_state(case))).strip()}
+
+@app.get("/watchlist")
+def get_watchlist():
+    """Version and size of the compiled sanctions/watchlist index this worker is using"""
+    return SCREENING.index.manifest
+
+@app.post("/watchlist/reload")
+def reload_watchlist():
+    """Recompile the watchlist source now; other workers swap it in within a few seconds"""
+    return SCREENING.reload()
+
+@app.get("/rules")
+def get_rules():
+    """Version, signals, rules and action cutoffs of the fuzzy rule set this worker is scoring with"""
+    return FUZZY_RULES.manifest
+
+@app.post("/rules/reload")
+def reload_rules():
+    """Recompile rules.yaml now; a file that does not compile is rejected and the live rules stay"""
+    try:
+        return FUZZY_RULES.reload()
+    except RuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/watchlist/screen")
+def screen_watchlist(name: Optional[str] = None, loc: Optional[str] = None, ip: Optional[str] = None,
+                     text: Optional[str] = None):
+    """Ad-hoc screening for analysts: exact/alias/fuzzy name, jurisdiction, IP range, free text"""
+    index = SCREENING.index
+    hits = []
+    if name:
+        hits.extend(index.screen_name(name))
+    if loc:
+        hits.extend(index.lookup(loc))
+    if ip:
+        hit = index.match_ip(ip)
+        if hit is not None:
+            hits.append(hit)
+    if text:
+        hits.extend(index.scan(text))
+    return {"version": index.manifest.get("version"), "hits": [hit._asdict() for hit in hits]}
+
+@app.get("/baselines/{user_id}")
+def get_baseline(user_id: str):
+    """Server-side rolling baseline for one user/account"""
+    baseline = BASELINES.get(user_id)
+    if baseline is None:
+        raise HTTPException(status_code=404, detail=f"No baseline for {user_id}")
+    return baseline
+
+@app.get("/accounts/{account_id}/aggregates")
+def get_account_aggregates(account_id: str, at: Optional[str] = Query(None, description="ISO timestamp (default: now)")):
+    """Rolling count / sum / just-below-threshold aggregates per window for one account"""
+    aggregates = STRUCTURING.aggregates(account_id, epoch_seconds(at) if at else time.time())
+    if aggregates is None:
+        raise HTTPException(status_code=404, detail=f"No activity for {account_id}")
+    return {"account": account_id, "threshold": STRUCTURING.threshold, "windows": aggregates}
+
+# Opt-in server-side micro-batching: concurrent /triage calls share one process-pool batch
+BATCHER = None
+if os.getenv("SENTINEL_MICROBATCH", "0") == "1":
+    from gateway.micro_batch import MicroBatcher
+    from skills.orchestrator.langgraph_logic import run_triage_batch
+    BATCHER = MicroBatcher(
+        run_triage_batch,
+        max_wait_ms=float(os.getenv("SENTINEL_MICROBATCH_WAIT_MS", "2")),
+        max_items=int(os.getenv("SENTINEL_MICROBATCH_MAX_ITEMS", "64")),
+        processes=int(os.getenv("SENTINEL_MICROBATCH_PROCESSES", "0")) or None
+    )
+    BATCHER.start()
+
+# Admission control for /triage: high-risk traffic jumps the queue, low-risk traffic is shed past the SLO
+ADMISSION = AdmissionController(
+    slots=int(os.getenv("SENTINEL_ADMISSION_SLOTS", "40")), # Starlette's default threadpool size
+    slo_ms=float(os.getenv("SENTINEL_TRIAGE_SLO_MS", "250")),
+    queue_limits={
+        PRIORITY: int(os.getenv("SENTINEL_PRIORITY_QUEUE", "4096")),
+        STANDARD: int(os.getenv("SENTINEL_STANDARD_QUEUE", "1024"))
+    }
+)
+PRIORITY_AMOUNT = float(os.getenv("SENTINEL_PRIORITY_AMOUNT", "10000"))
+
+def _lane(tx_data):
+    """Cheap pre-classification (cached lookups only): big amounts, sanctioned places and listed IPs go first."""
+    index = SCREENING.index
+    ip = tx_data.get('ip_address')
+    if (tx_data['amount'] >= PRIORITY_AMOUNT
+            or index.is_sanctioned_jurisdiction(tx_data.get('loc') or '')
+            or (ip and index.match_ip(str(ip)) is not None)):
+        return PRIORITY
+    return STANDARD
+
+@app.get("/stats/admission")
+def get_admission_stats():
+    """Slots, queue depth and admitted/shed counts per lane of this worker"""
+    return ADMISSION.stats()
+
+@app.get("/stats/microbatch")
+def get_microbatch_stats():
+    """Queue depth and batch-size stats of the micro-batching scheduler"""
+    return BATCHER.stats() if BATCHER is not None else {"enabled": False}
+
+def _compact_view(result, case):
+    """Just the decision: flag, score, action and the case to look up for detail."""
+    temporal = result.get('temporal_result', {})
+    return {
+        "is_suspicious": bool(result.get('is_suspicious')),
+        "score": temporal.get('score'),
+        "action": temporal.get('action'),
+        "case_id": case['id'] if case else None
+    }
+
+def _triage_one(tx_data, base_data, background_tasks, view):
+    try:
         # Inject Strict Baseline if missing (to ensure 'Soft Computing' metrics work for Demo)
-        base_data = data['user_baseline']
-        if not base_data or not base_data.get('mean_amt'):
-            base_data = {
-                "mean_amt": 500,        # Low average to make $36k huge
-                "std_amt": 200,         # Low deviation
-                "last_loc": "Dubai",    # Default location
-                "last_time": "2024-01-01T00:00:00"
-            }
-        
-        # Log the event asynchronously (DISABLED FOR MAX TPS)
-        # print(f"DEBUG INCOMING: Tx={tx_data} | Base={base_data}")
-        # background_tasks.add_task(print, f"Processing Event: {tx_data.get('timestamp', 'NOW')}")
+        base_data = _resolve_baseline(base_data, tx_data)
         
-        # Trigger the LangGraph State Machine
-        from skills.orchestrator.langgraph_logic import run_triage
-        result = run_triage(tx_data, base_data)
+        # Sampled debug trace (off unless SENTINEL_LOG_SAMPLING enables "debug")
+        if EVENTS.enabled("debug"):
+            EVENTS.log("debug", "incoming", tx=dict(tx_data), baseline=dict(base_data))
         
-        # DEMO GOD MODE: Unconditionally flag 5% of traffic to guarantee "Urgent Cases"
-        import random
-        is_demo_hit = random.random() < 0.05
+        _observe_patterns(tx_data)
         
-        if is_demo_hit or tx_data.get('loc') in ['North Korea', 'Iran', 'Russia']:
-            result['is_suspicious'] = True
-            
-            # Rotation of 5 Cool Scenarios (High Value & Complete Math)
-            scenarios = [
-                {
-                    "type": "SANCTIONS", 
-                    "reason": "CRITICAL: Impossible Travel to Sanctioned Jurisdiction | Vel:True | Loc:Dubai->Pyongyang | Time:0.5h | Z:99.9 | Fuzzy Score: 1.00 | Mean:500 | Std:100", 
-                    "amt_fixed": 50000 
-                },
-                {
-                    "type": "WHALE_ALERT", 
-                    "reason": "WHALE_ALERT: Abnormal Liquidity Event | Z:5.42 | Fuzzy Score: 0.98 | Mean:5000 | Std:2500", 
-                    "amt_fixed": 1250000 
-                },
-                {
-                    "type": "ROUND_TRIP", 
-                    "reason": "LAUNDERING: Circular Flow (A->B->A) | Vel:True | Loc:Dubai->London->Dubai | Time:2h | Z:4.90 | Fuzzy Score: 0.91 | Mean:1000 | Std:200", 
-                    "amt_fixed": 85500 
-                },
-                {
-                    "type": "STRUCTURING", 
-                    "reason": "CRITICAL: High-Freq Structuring (<$10k) | Z:3.12 | Fuzzy Score: 0.88 | Mean:2000 | Std:500", 
-                    "amt_fixed": 9850 
-                },
-                {
-                    "type": "VELOCITY", 
-                    "reason": "SUSPICIOUS: Velocity Violation | Vel:True | Loc:Dubai->London | Time:1h | Z:3.15 | Fuzzy Score: 0.85 | Mean:500 | Std:100", 
-                    "amt_fixed": 12500 
-                }
-            ]
-            
-            outcome = random.choice(scenarios)
-            result['temporal_result']['reasoning'] = outcome['reason']
-            tx_data['type'] = outcome['type']
-            tx_data['amount'] = outcome['amt_fixed'] # Override with high-value amount
-                 
-            print(f"🚨 DETECTED SUSPICIOUS: {tx_data}") # DEBUG PRINT
+        # Trigger the LangGraph State Machine (micro-batched in the process pool when enabled)
+        if BATCHER is not None:
+            result = BATCHER.submit(tx_data, base_data).result()
+            result['evidence'] = tx_data  # The pool scored a pickled copy; demo overrides below go to this one
+        else:
+            from skills.orchestrator.langgraph_logic import run_triage
+            result = run_triage(tx_data, base_data)
+        _observe_baseline(tx_data)
         
-        # Update Global Stats
-        STATS["processed"] += 1
-        if result.get("is_suspicious"):
-            STATS["suspicious"] += 1
-            # Store case details for the "Clickable List"
-            STATS["cases"].append({
-                "id": f"CASE-{STATS['suspicious']:03d}",
-                "timestamp": tx_data.get('timestamp'),
-                "amount": tx_data.get('amount'),
-                "type": tx_data.get('type', 'TRANSFER'),
-                "reason": result.get('temporal_result', {}).get('reasoning', 'Unknown'),
-                "ip": tx_data.get('ip_address', 'N/A')
-            })
+        _apply_demo_god_mode(tx_data, result)
+        with timed("stats"):
+            case = _record_result(tx_data, result)
+        if case and PREFETCH_SARS:
+            background_tasks.add_task(_prefetch_sar, case)
         
-        return result
+        with timed("serialize"):
+            body = result if view == "full" else _compact_view(result, case)
+            return FastJSONResponse(body, background=background_tasks)
         
     except Exception as e:
         # Graceful error handling for the client
+        TRIAGE_ERRORS.inc()
+        raise HTTPException(status_code=500, detail=f"Triage Engine Error: {str(e)}")
+
+@app.post("/triage", openapi_extra=_documented_body(TriageRequest))
+async def triage_endpoint(request: Request, background_tasks: BackgroundTasks,
+                          view: Literal["full", "compact"] = Query("full", description="compact: flag, score, action, case_id only")):
+    """
+    High-concurrency triage endpoint backed by 4-worker Uvicorn.
+    The body is validated straight from bytes into the typed schema (one pass,
+    no intermediate dicts), and the response is rendered with orjson.
+    Under overload high-risk transactions are admitted first and low-risk ones
+    get a 429 with Retry-After once they have queued past SENTINEL_TRIAGE_SLO_MS.
+    """
+    body = await request.body()
+    with timed("parse"):
+        try:
+            data = TriageRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    
+    try:
+        await ADMISSION.acquire(_lane(data.transaction))
+    except Overloaded as e:
+        raise HTTPException(status_code=429, detail=f"Overloaded: {e.lane} traffic deferred ({e.reason}), retry later",
+                            headers={"Retry-After": str(e.retry_after)})
+    started = time.perf_counter()
+    try:
+        return await run_in_threadpool(_triage_one, data.transaction, data.user_baseline, background_tasks, view)
+    finally:
+        ADMISSION.release(time.perf_counter() - started)
+
+def _triage_items(items):
+    """
+    Score TriageRequests in one vectorized pass.
+    Returns (results in order, case per result: the stored case or None).
+    A transaction that cannot be scored gets {"error": ...} in its slot; the rest are unaffected.
+    """
+    from skills.orchestrator.langgraph_logic import run_triage_batch
+    
+    n = len(items)
+    tx_list = [item.transaction for item in items]
+    base_list = [None] * n
+    errors = {}
+    # Baselines are snapshotted at batch start; updates are folded in afterwards, in order
+    for i, item in enumerate(items):
+        try:
+            base_list[i] = _resolve_baseline(item.user_baseline, item.transaction)
+            _observe_patterns(tx_list[i])
+        except Exception as e:
+            errors[i] = e
+    
+    ok = [i for i in range(n) if i not in errors]
+    scored = {}
+    try:
+        scored = dict(zip(ok, run_triage_batch([tx_list[i] for i in ok], [base_list[i] for i in ok])))
+    except Exception:
+        # One bad row fails the vectorized pass: fall back to scoring the rest one by one
+        for i in ok:
+            try:
+                scored[i] = run_triage_batch([tx_list[i]], [base_list[i]])[0]
+            except Exception as e:
+                errors[i] = e
+    
+    results, cases = [], []
+    for i, tx_data in enumerate(tx_list):
+        if i in errors:
+            TRIAGE_ERRORS.inc()
+            results.append({"error": f"Triage Engine Error: {str(errors[i])}"})
+            cases.append(None)
+            continue
+        result = scored[i]
+        _observe_baseline(tx_data)
+        _apply_demo_god_mode(tx_data, result)
+        results.append(result)
+        cases.append(_record_result(tx_data, result))
+    return results, cases
+
+class TriageBatchRequest(BaseModel):
+    items: List[TriageRequest] = Field(..., description="Transaction/baseline pairs, scored and returned in order")
+
+@app.post("/triage/batch")
+def triage_batch_endpoint(request: TriageBatchRequest, background_tasks: BackgroundTasks,
+                          view: Literal["full", "compact"] = Query("full", description="compact: flag, score, action, case_id only")):
+    """
+    Bulk triage for gateway bursts: one HTTP round trip and one vectorized
+    temporal pass for thousands of alerts. Results come back in request order.
+    """
+    try:
+        results, cases = _triage_items(request.items)
+        if PREFETCH_SARS:
+            for case in cases:
+                if case:
+                    background_tasks.add_task(_prefetch_sar, case)
+        
+        if view == "compact":
+            results = [result if "error" in result else _compact_view(result, case) for result, case in zip(results, cases)]
+        return FastJSONResponse({
+            "count": len(results),
+            "suspicious": sum(1 for result in results if result.get("is_suspicious")),
+            "errors": sum(1 for result in results if "error" in result),
+            "results": results
+        }, background=background_tasks)
+        
+    except Exception as e:
+        TRIAGE_ERRORS.inc()
         raise HTTPException(status_code=500, detail=f"Triage Engine Error: {str(e)}")
 
+# Streaming ingest: records in flight per connection, and the largest scoring batch
+INGEST_WINDOW = int(os.getenv("SENTINEL_INGEST_WINDOW", "256"))
+INGEST_MAX_BATCH = int(os.getenv("SENTINEL_INGEST_MAX_BATCH", "64"))
+
+def _triage_stream_batch(records):
+    """Validate and score one batch of streamed records; bad records get an in-order error."""
+    items, results = [], []
+    for record in records:
+        try:
+            items.append(TriageRequest.model_validate(record))
+            results.append(None)
+        except ValidationError as e:
+            results.append({"error": f"Invalid record: {e.errors()[0]['msg']}"})
+    
+    # _triage_items reports a record that fails scoring in its own slot
+    scored = iter(_triage_items(items)[0]) if items else iter(())
+    return [result if result is not None else next(scored) for result in results]
+
+@app.websocket("/ingest/ws")
+async def ingest_websocket(websocket: WebSocket):
+    """
+    Persistent ingest for the .NET gateway: transaction/baseline records in,
+    results out on the same socket, ordered, with credit-based flow control.
+    """
+    from gateway.stream_ingest import IngestStream, serve_websocket
+    
+    await websocket.accept()
+    await serve_websocket(websocket, IngestStream(_triage_stream_batch, INGEST_WINDOW, INGEST_MAX_BATCH))
+
+@app.post("/ingest/ndjson")
+async def ingest_ndjson(request: Request):
+    """
+    Chunked NDJSON upload (one TriageRequest per line); results stream back
+    as NDJSON in the same order while the upload is still arriving.
+    """
+    from gateway.stream_ingest import IngestStream, ndjson_response
+    
+    return ndjson_response(request, IngestStream(_triage_stream_batch, INGEST_WINDOW, INGEST_MAX_BATCH))
+
 @app.post("/reset")
 async def reset_system():
     """Clears the counters for a fresh live demo."""
-    STATS["processed"] = 0
-    STATS["suspicious"] = 0
-    STATS["cases"] = []
+    _reset_stats()
     return {"status": "System memory cleared for fresh scan"}
     """
     Triggers the C# 'Hammer' Stress Test from the UI.
@@ -259,27 +836,25 @@ async def reset_system():
         print("🛡️ Safety Net: Monitoring Simulation...")
         await asyncio.sleep(4) # Wait for C# to try
         
-        if STATS["suspicious"] == 0:
+        if CASES.count() == 0:
             print("⚠️ Safety Net Triggered: Injecting Synthetic High-Risk Cases for Demo.")
             
             # 1. Bump Processed Count
-            current = STATS["processed"]
+            current = COUNTERS.value("processed")
             if current < 1500:
-                STATS["processed"] = 2000
+                COUNTERS.incr("processed", 2000 - current)
             
             # 2. Inject 28 Urgent Cases (The "Winning" Number)
             for i in range(28):
                 idx = i + 1
-                STATS["suspicious"] += 1
-                STATS["cases"].append({
-                    "id": f"CASE-{STATS['suspicious']:03d}",
+                CASES.append({
                     "timestamp": datetime.now().isoformat(),
                     "amount": round(random.uniform(30000, 150000), 2),
                     "type": "WITHDRAWAL_QUICK_FLIP",
                     "reason": "SOFT COMPUTING: Score 1.0 | Impossible Travel (North Korea)",
                     "ip": "89.14.22.11"
                 })
-            print(f"✅ Safety Net: Injected {STATS['suspicious']} cases.")
+            print(f"✅ Safety Net: Injected {CASES.count()} cases.")
 
     def run_csharp_client():
         print("🔨 UI Triggered Simulation: Starting C# Client...")
@@ -306,13 +881,11 @@ async def reset_system():
     def sync_safety_net():
         import time
         time.sleep(4)
-        if STATS["suspicious"] == 0:
+        if CASES.count() == 0:
              print("⚠️ Safety Net Triggered: Injecting Data.")
-             STATS["processed"] = max(STATS["processed"], 1972)
+             COUNTERS.incr("processed", max(0, 1972 - COUNTERS.value("processed")))
              for i in range(28):
-                STATS["suspicious"] += 1
-                STATS["cases"].append({
-                    "id": f"CASE-{STATS['suspicious']:03d}",
+                CASES.append({
                     "timestamp": datetime.now().isoformat(),
                     "amount": 95000.00,
                     "type": "WITHDRAWAL_QUICK_FLIP",
@@ -324,26 +897,31 @@ async def reset_system():
 
     return {"status": "Simulation Started", "message": "The Hammer is striking... Watch the counter!"}
 
-from fastapi.responses import StreamingResponse
-import io
-import pandas as pd
+from gateway.case_export import EXPORT_FORMATS
 
 @app.get("/export-logs")
-def export_logs():
+def export_logs(format: str = Query("csv", description="csv, arrow (IPC stream) or parquet"),
+                chunk_size: int = Query(5000, ge=1, le=100000)):
     """
-    Exports high-risk case files as a CSV for regulatory submission.
+    Exports high-risk case files for regulatory submission.
+    Streams straight from the case journal in chunks, so memory stays bounded
+    by chunk_size regardless of how many cases exist.
     """
-    # STATS['cases'] contains all the suspicious transaction dictionaries
-    df = pd.DataFrame(STATS['cases']) 
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format '{format}'. Use one of {list(EXPORT_FORMATS)}")
     
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
+    writer, media_type, extension, needs_pyarrow = EXPORT_FORMATS[format]
+    if needs_pyarrow:
+        try:
+            import pyarrow # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"'{format}' export requires pyarrow")
     
     response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="text/csv"
+        writer(CASES.iter_chunks(chunk_size)),
+        media_type=media_type
     )
-    response.headers["Content-Disposition"] = "attachment; filename=sentinel_forensic_log.csv"
+    response.headers["Content-Disposition"] = f"attachment; filename=sentinel_forensic_log.{extension}"
     return response
 
 if __name__ == "__main__":
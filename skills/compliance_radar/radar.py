@@ -1,25 +1,46 @@
 import os
+import json
+import hashlib
+import time
+import asyncio
+import urllib.request
+from collections import OrderedDict
 import google.generativeai as genai
 from dotenv import load_dotenv
+from skills.compliance_radar.watchlist import SCREENING
 
 load_dotenv()
 # Use GOOGLE_API_KEY as requested, fallback to GEMINI_API_KEY if needed
 api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=api_key)
 
-def verify_compliance_live(transaction_data):
+class ComplianceRadar:
     """
-    REAL-TIME GROUNDING: Uses Gemini 1.5 Pro for UAE AML legal analysis.
+    DETERMINISTIC RADAR: Offline regulatory screen used by the orchestrator's
+    compliance node. Live Gemini grounding stays in verify_compliance_live.
     """
-    try:
-        # User requested 1.5-pro, but we'll fallback to flash if needed for robustness
-        model_name = 'gemini-1.5-flash' # Using Flash for speed/reliability in demo
-        try:
-           model = genai.GenerativeModel(model_name)
-        except:
-           model = genai.GenerativeModel('gemini-pro')
+    REPORTING_THRESHOLD = 55000  # UAE AML/CFT cash reporting threshold (AED)
+
+    def check_regulations(self, evidence):
+        flags = []
+        for hit in SCREENING.screen(evidence):
+            if hit.kind == "country":
+                flags.append(f"SANCTIONED_JURISDICTION: {evidence.get('loc')}")
+            elif hit.kind == "ip":
+                flags.append(f"WATCHLIST_IP: {hit.matched} in {hit.entry} ({hit.program})")
+            else:
+                flags.append(f"WATCHLIST_{hit.how.upper()}: {hit.matched} ~ {hit.entry} ({hit.program}, {hit.score:.2f})")
+        if evidence.get('amount', 0) >= self.REPORTING_THRESHOLD:
+            flags.append(f"REPORTING_THRESHOLD: {evidence.get('amount')} >= {self.REPORTING_THRESHOLD}")
+
+        return {
+            "is_compliant": not flags,
+            "flags": flags,
+            "grounding_source": f"UAE EOCN Sanctions List ({SCREENING.index.manifest.get('version', 'inline')}) & AML/CFT Thresholds (Offline Rule Set)"
+        }
 
-        prompt = f"""
+def _build_prompt(transaction_data):
+    return f"""
         Act as a Deriv Compliance Officer. Analyze this high-risk alert: {transaction_data}
         
         Check this against UAE EOCN AML regulations (Feb 2026).
@@ -29,11 +50,148 @@ def verify_compliance_live(transaction_data):
         
         Format as a formal Suspicious Activity Report (SAR).
         """
-        response = model.generate_content(prompt)
+
+_MODEL = None
+
+def _get_model():
+    """Build the GenerativeModel once per process instead of once per call."""
+    global _MODEL
+    if _MODEL is None:
+        # User requested 1.5-pro, but we'll fallback to flash if needed for robustness
+        model_name = 'gemini-1.5-flash' # Using Flash for speed/reliability in demo
+        try:
+           _MODEL = genai.GenerativeModel(model_name)
+        except Exception:
+           _MODEL = genai.GenerativeModel('gemini-pro')
+    return _MODEL
+
+def verify_compliance_live(transaction_data):
+    """
+    REAL-TIME GROUNDING: Uses Gemini 1.5 Pro for UAE AML legal analysis.
+    """
+    try:
+        response = _get_model().generate_content(_build_prompt(transaction_data))
         return response.text
     except Exception as e:
         return f"**Regulatory check offline**: {str(e)}. Proceeding with autonomous heuristic freeze."
 
+class GroundingUnavailable(Exception):
+    """Live grounding timed out, failed, or the circuit is open: use the deterministic narrative."""
+
+def sar_cache_key(prompt):
+    """
+    Cache key for a grounded SAR: a digest of the prompt, which quotes the whole
+    alert. The cache is per case - repeat requests for one case (prefetch, then
+    /sar) hit it, two different cases never share a SAR.
+    """
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+class LiveGrounding:
+    """
+    ASYNC GROUNDING STAGE: Non-blocking wrapper around the LLM call with
+    - a bounded concurrency pool (semaphore),
+    - a per-call timeout,
+    - a per-case TTL + LRU cache (sar_cache_key),
+    - a circuit breaker that fails fast after repeated errors.
+
+    llm_url points at any HTTP endpoint taking {"prompt"} and returning {"text"}
+    (e.g. a local stub server); without it the Gemini model is used.
+    """
+
+    def __init__(self, llm_url=None, timeout=8.0, max_concurrency=4, cache_size=512, cache_ttl=900.0,
+                 failure_threshold=3, cooldown=30.0):
+        self.llm_url = llm_url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._pool = None
+        self._cache = OrderedDict()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self.stats = {"calls": 0, "cache_hits": 0, "failures": 0, "short_circuits": 0}
+
+    def _call_llm(self, prompt):
+        # Runs in a worker thread
+        if self.llm_url:
+            request = urllib.request.Request(
+                self.llm_url,
+                data=json.dumps({"prompt": prompt}).encode(),
+                headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())["text"]
+        return _get_model().generate_content(prompt, request_options={"timeout": self.timeout}).text
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, text = entry
+        if expires < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _store(self, key, text):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def verify(self, transaction_data):
+        prompt = _build_prompt(transaction_data)
+        key = sar_cache_key(prompt)
+        text = self._cached(key)
+        if text is not None:
+            self.stats["cache_hits"] += 1
+            return text
+
+        # Circuit breaker: open -> fail fast; after the cooldown exactly one call probes (half-open)
+        probe = False
+        if self._failures >= self.failure_threshold:
+            if self._probing or time.monotonic() < self._open_until:
+                self.stats["short_circuits"] += 1
+                raise GroundingUnavailable("circuit open")
+            self._probing = probe = True
+
+        try:
+            if self._pool is None:
+                self._pool = asyncio.Semaphore(self.max_concurrency)
+            async with self._pool:
+                self.stats["calls"] += 1
+                try:
+                    text = await asyncio.wait_for(
+                        asyncio.to_thread(self._call_llm, prompt), self.timeout
+                    )
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    self._failures += 1
+                    if self._failures >= self.failure_threshold:
+                        self._open_until = time.monotonic() + self.cooldown
+                    raise GroundingUnavailable(str(e) or type(e).__name__) from e
+        finally:
+            if probe:
+                self._probing = False
+
+        self._failures = 0
+        self._store(key, text)
+        return text
+
+LIVE_GROUNDING = LiveGrounding(
+    llm_url=os.getenv("SENTINEL_LLM_URL"),
+    timeout=float(os.getenv("SENTINEL_LLM_TIMEOUT", "8")),
+    max_concurrency=int(os.getenv("SENTINEL_LLM_CONCURRENCY", "4"))
+)
+
+async def verify_compliance_async(transaction_data):
+    """Async, cached, rate-limited verify_compliance_live. Raises GroundingUnavailable."""
+    return await LIVE_GROUNDING.verify(transaction_data)
+
 if __name__ == "__main__":
     # Test
     print(verify_compliance_live({"amount": 50000, "loc": "London"}))
@@ -0,0 +1,510 @@
+import os
+import re
+import csv
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import threading
+import functools
+import ipaddress
+import unicodedata
+from collections import deque, namedtuple
+
+import numpy as np
+
+WATCHLIST_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watchlist.csv")
+# Compiled .npy arrays live here and are mmap'ed by every worker
+COMPILED_DIR = os.getenv("SENTINEL_WATCHLIST_DIR", os.path.join(tempfile.gettempdir(), "sentinel-node-x", "watchlist"))
+
+KINDS = ["country", "entity", "ip"]
+Hit = namedtuple("Hit", "entry kind program matched how score")
+
+_NON_WORD = re.compile(r"[\W_]+")
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_CP = 0x110000  # codepoint space: transition key = state * _CP + codepoint
+
+def normalize(text):
+    """Casefold, strip accents and punctuation, collapse whitespace."""
+    text = str(text)
+    if text.isascii():
+        return _NON_WORD.sub(" ", text.lower()).strip()
+    folded = unicodedata.normalize("NFKD", text).casefold()
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", folded).strip()
+
+def _name_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+def _grams(text):
+    """Character trigrams of ' text ' packed into one int (3 x 21-bit codepoints)."""
+    padded = f" {text} "
+    return {(ord(a) << 42) | (ord(b) << 21) | ord(c) for a, b, c in zip(padded, padded[1:], padded[2:])}
+
+def _slot(key, bits):
+    return ((key * _GOLDEN) & _MASK64) >> (64 - bits)
+
+def _strings(values):
+    encoded = [v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+def _csr(keys, values):
+    """Group values by key: (sorted unique keys, offsets, values ordered by key then value)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int32)
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    unique, starts = np.unique(keys, return_index=True)
+    offsets = np.append(starts, len(keys)).astype(np.int64)
+    return unique, offsets, values
+
+def compile_watchlist(rows):
+    """
+    Watchlist rows (kind, value, aliases, program) -> dict of flat NumPy arrays:
+    exact-name hash table, Aho-Corasick automaton, trigram postings and a
+    flattened longest-prefix IPv4 table. Nothing in it is a Python object,
+    so the compiled form can be saved as .npy and mmap'ed.
+    """
+    entry_kind, entry_value, entry_program = [], [], []
+    patterns, pattern_entry, pattern_alias = [], [], []
+    networks = []
+
+    for row in rows:
+        kind = row["kind"].strip().lower()
+        if kind not in KINDS:
+            raise ValueError(f"Unknown watchlist kind '{row['kind']}'")
+        value = row["value"].strip()
+        aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+        eid = len(entry_value)
+        entry_kind.append(KINDS.index(kind))
+        entry_value.append(value)
+        entry_program.append((row.get("program") or "").strip())
+
+        if kind == "ip":
+            for cidr in [value] + aliases:
+                net = ipaddress.ip_network(cidr, strict=False)
+                if net.version != 4:
+                    raise ValueError(f"Only IPv4 ranges are supported: {cidr}")
+                networks.append((int(net.network_address), int(net.broadcast_address), net.prefixlen, eid))
+            continue
+
+        seen = set()
+        for i, name in enumerate([value] + aliases):
+            text = normalize(name)
+            if text and text not in seen:
+                seen.add(text)
+                patterns.append(text)
+                pattern_entry.append(eid)
+                pattern_alias.append(i > 0)
+
+    arrays = {}
+    arrays["entry_kind"] = np.array(entry_kind, dtype=np.int8)
+    arrays["entry_value"], arrays["entry_value_off"] = _strings(entry_value)
+    arrays["entry_program"], arrays["entry_program_off"] = _strings(entry_program)
+    arrays["pattern_text"], arrays["pattern_text_off"] = _strings(patterns)
+    arrays["pattern_entry"] = np.array(pattern_entry, dtype=np.int32)
+    arrays["pattern_alias"] = np.array(pattern_alias, dtype=bool)
+
+    # 1. Exact names/aliases: sorted 64-bit hashes (binary search, verified against the text)
+    hashes = np.array([_name_hash(p) for p in patterns], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    arrays["exact_hash"] = hashes[order]
+    arrays["exact_pattern"] = order.astype(np.int32)
+
+    # 2. Aho-Corasick over ' pattern ' (padding = whole-word matches inside free text)
+    goto, out = [{}], [[]]
+    for pid, text in enumerate(patterns):
+        state = 0
+        for ch in f" {text} ":
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                out.append([])
+            state = nxt
+        out[state].append(pid)
+    fail = [0] * len(goto)
+    dict_link = [0] * len(goto)  # nearest suffix state with output (0 = none)
+    queue = deque(goto[0].values())
+    while queue:
+        r = queue.popleft()
+        for ch, s in goto[r].items():
+            queue.append(s)
+            f = fail[r]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[s] = goto[f].get(ch, 0)
+            dict_link[s] = fail[s] if out[fail[s]] else dict_link[fail[s]]
+    edges = [(state * _CP + ord(ch), nxt) for state, table in enumerate(goto) for ch, nxt in table.items()]
+    bits = max(4, (2 * len(edges)).bit_length())
+    edge_key = np.full(1 << bits, -1, dtype=np.int64)
+    edge_next = np.zeros(1 << bits, dtype=np.int32)
+    mask = (1 << bits) - 1
+    for key, nxt in edges:
+        slot = _slot(key, bits)
+        while edge_key[slot] != -1:
+            slot = (slot + 1) & mask
+        edge_key[slot] = key
+        edge_next[slot] = nxt
+    arrays["ac_edge_key"], arrays["ac_edge_next"] = edge_key, edge_next
+    arrays["ac_fail"] = np.array(fail, dtype=np.int32)
+    arrays["ac_dict"] = np.array(dict_link, dtype=np.int32)
+    out_counts = np.array([len(o) for o in out], dtype=np.int64)
+    arrays["ac_out_off"] = np.concatenate([[0], np.cumsum(out_counts)]).astype(np.int64)
+    arrays["ac_out"] = np.array([pid for o in out for pid in o], dtype=np.int32)
+
+    # 3. Trigram postings for fuzzy names
+    gram_keys, gram_pids, gram_counts = [], [], []
+    for pid, text in enumerate(patterns):
+        grams = _grams(text)
+        gram_counts.append(len(grams))
+        gram_keys.extend(grams)
+        gram_pids.extend([pid] * len(grams))
+    arrays["gram_key"], arrays["gram_off"], arrays["gram_post"] = _csr(gram_keys, gram_pids)
+    arrays["pattern_grams"] = np.array(gram_counts, dtype=np.int32)
+
+    # 4. IPv4: CIDRs flattened into disjoint intervals, labelled with the most specific entry
+    bounds = {0}
+    for start, end, _, _ in networks:
+        bounds.add(start)
+        if end + 1 < 1 << 32:
+            bounds.add(end + 1)
+    ip_start = np.array(sorted(bounds), dtype=np.int64)
+    ip_entry = np.full(len(ip_start), -1, dtype=np.int32)
+    for start, end, _, eid in sorted(networks, key=lambda net: net[2]):
+        ip_entry[np.searchsorted(ip_start, start):np.searchsorted(ip_start, end + 1)] = eid
+    arrays["ip_start"], arrays["ip_entry"] = ip_start, ip_entry
+    return arrays
+
+class WatchlistIndex:
+    """
+    SCREENING INDEX: Read-only view over compiled watchlist arrays (usually
+    np.load(..., mmap_mode='r'), so every worker shares one copy in the page
+    cache). Exact and IP lookups are a hash / binary search; fuzzy names go
+    through trigram postings with prefix-filter candidate pruning.
+    """
+
+    def __init__(self, arrays, manifest=None):
+        self.arrays = arrays
+        self.manifest = manifest or {}
+        for name, array in arrays.items():
+            setattr(self, "_" + name, array)
+        self._bits = int(len(self._ac_edge_key)).bit_length() - 1
+        # Screening sees the same few locations/IPs over and over
+        self.lookup = functools.lru_cache(maxsize=65536)(self._lookup)
+        self.match_ip = functools.lru_cache(maxsize=65536)(self._match_ip)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in manifest["arrays"]}
+        return cls(arrays, manifest)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(compile_watchlist(rows))
+
+    def __len__(self):
+        return len(self._entry_kind)
+
+    @staticmethod
+    def _string(blob, offsets, i):
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode()
+
+    def _hit(self, eid, matched, how, score=1.0):
+        return Hit(
+            entry=self._string(self._entry_value, self._entry_value_off, eid),
+            kind=KINDS[int(self._entry_kind[eid])],
+            program=self._string(self._entry_program, self._entry_program_off, eid),
+            matched=matched, how=how, score=round(float(score), 4)
+        )
+
+    def _pattern_hit(self, pid, how, score=1.0):
+        pid = int(pid)
+        text = self._string(self._pattern_text, self._pattern_text_off, pid)
+        if how == "exact" and self._pattern_alias[pid]:
+            how = "alias"
+        return self._hit(int(self._pattern_entry[pid]), text, how, score)
+
+    def _lookup(self, name):
+        """Exact name/alias hits (after normalization), as a tuple of Hits."""
+        text = normalize(name)
+        if not text:
+            return ()
+        key = np.uint64(_name_hash(text))
+        lo = int(np.searchsorted(self._exact_hash, key, side="left"))
+        hi = int(np.searchsorted(self._exact_hash, key, side="right"))
+        hits = []
+        for i in range(lo, hi):
+            pid = int(self._exact_pattern[i])
+            if self._string(self._pattern_text, self._pattern_text_off, pid) == text:
+                hits.append(self._pattern_hit(pid, "exact"))
+        return tuple(hits)
+
+    def is_sanctioned_jurisdiction(self, loc):
+        """
+        loc is a listed country's own name, exactly as the velocity/demo rules always
+        checked it. Aliases (e.g. capitals) are screening hits via screen(), not verdicts.
+        """
+        return any(hit.kind == "country" and hit.entry == loc for hit in self.lookup(loc))
+
+    def fuzzy(self, name, threshold=0.8, limit=5):
+        """Names whose trigram Dice similarity to `name` is >= threshold, best first."""
+        text = normalize(name)
+        grams = np.array(sorted(_grams(text)), dtype=np.int64) if text else np.empty(0, dtype=np.int64)
+        if not len(grams) or not len(self._gram_key):
+            return []
+        pos = np.minimum(np.searchsorted(self._gram_key, grams), len(self._gram_key) - 1)
+        pos = pos[self._gram_key[pos] == grams]
+        if not len(pos):
+            return []
+
+        # Prefix filter: a match shares >= need grams, so it must hit one of the
+        # (n - need + 1) rarest ones; the long, common posting lists are skipped
+        need = max(1, int(np.ceil(threshold * len(grams) / 2)))
+        lengths = self._gram_off[pos + 1] - self._gram_off[pos]
+        rare = pos[np.argsort(lengths, kind="stable")][:max(0, len(grams) - need + 1)]
+        if not len(rare):
+            return []
+        candidates = np.unique(np.concatenate([self._gram_post[self._gram_off[p]:self._gram_off[p + 1]] for p in rare]))
+
+        common = np.zeros(len(candidates), dtype=np.int64)
+        for p in pos:
+            postings = self._gram_post[self._gram_off[p]:self._gram_off[p + 1]]
+            idx = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+            common += postings[idx] == candidates
+        dice = 2.0 * common / (len(grams) + self._pattern_grams[candidates])
+        keep = np.flatnonzero(dice >= threshold)
+        best = keep[np.argsort(-dice[keep], kind="stable")][:limit]
+        return [self._pattern_hit(candidates[i], "fuzzy", dice[i]) for i in best.tolist()]
+
+    def screen_name(self, name, threshold=0.8):
+        """Exact/alias hits if any, otherwise fuzzy ones."""
+        return list(self.lookup(name)) or self.fuzzy(name, threshold)
+
+    def _goto(self, state, codepoint):
+        key = state * _CP + codepoint
+        mask = len(self._ac_edge_key) - 1
+        slot = _slot(key, self._bits)
+        while True:
+            found = int(self._ac_edge_key[slot])
+            if found == key:
+                return int(self._ac_edge_next[slot])
+            if found == -1:
+                return -1
+            slot = (slot + 1) & mask
+
+    def scan(self, text):
+        """Every whole-word watchlist name/alias occurring in free text (Aho-Corasick)."""
+        hits, seen = [], set()
+        state = 0
+        for ch in f" {normalize(text)} ":
+            codepoint = ord(ch)
+            while True:
+                nxt = self._goto(state, codepoint)
+                if nxt >= 0:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = int(self._ac_fail[state])
+            s = state
+            while s:
+                for pid in self._ac_out[self._ac_out_off[s]:self._ac_out_off[s + 1]].tolist():
+                    if pid not in seen:
+                        seen.add(pid)
+                        hits.append(self._pattern_hit(pid, "text"))
+                s = int(self._ac_dict[s])
+        return hits
+
+    def _match_ip(self, ip):
+        """Most specific listed range containing ip (None if unlisted or not IPv4)."""
+        try:
+            addr = ipaddress.ip_address(str(ip).strip())
+        except ValueError:
+            return None
+        if addr.version != 4:
+            return None
+        i = int(np.searchsorted(self._ip_start, int(addr), side="right")) - 1
+        eid = int(self._ip_entry[i])
+        return self._hit(eid, str(addr), "ip") if eid >= 0 else None
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+class WatchlistScreener:
+    """
+    Hot-reloadable handle on the compiled index. The source CSV is compiled
+    into a versioned directory of .npy files and published by atomically
+    replacing CURRENT; every worker notices within check_interval seconds and
+    swaps in the new mmap'ed index, no restart needed. Old versions are only
+    deleted once no worker holds them.
+    """
+
+    # Transaction fields screened as names, and as free text
+    NAME_FIELDS = ("counterparty", "beneficiary", "merchant", "name")
+    TEXT_FIELDS = ("memo", "description", "reference")
+
+    def __init__(self, source=WATCHLIST_CSV, compiled_dir=COMPILED_DIR, check_interval=2.0):
+        self.source = source
+        self.compiled_dir = compiled_dir
+        self.check_interval = check_interval
+        self._index = None
+        self._current = None
+        self._pinned = None  # fd holding the shared lock on the version in use
+        self._checked = 0.0
+        self._source_mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        if self._index is None or time.monotonic() - self._checked > self.check_interval:
+            with self._lock:
+                if self._index is None or time.monotonic() - self._checked > self.check_interval:
+                    self._refresh()
+        return self._index
+
+    def _pointer(self):
+        try:
+            with open(os.path.join(self.compiled_dir, "CURRENT")) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _pin(self, version):
+        """
+        Shared lock on <version>/.inuse for as long as this worker serves it, so
+        no publisher deletes it underneath; None if it was pruned meanwhile.
+        """
+        path = os.path.join(self.compiled_dir, version)
+        try:
+            fd = os.open(os.path.join(path, ".inuse"), os.O_RDONLY | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            return None
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            os.close(fd)
+            return None
+        return fd
+
+    def _refresh(self):
+        self._checked = time.monotonic()
+        mtime = os.stat(self.source).st_mtime_ns
+        if mtime != self._source_mtime or self._pointer() is None:
+            self._source_mtime = mtime
+            self._publish(force=False)
+        current = self._pointer()
+        if current != self._current:
+            pin = self._pin(current)
+            while pin is None:  # Superseded and pruned between reading CURRENT and pinning it
+                current = self._pointer()
+                pin = self._pin(current)
+            self._index = WatchlistIndex.load(os.path.join(self.compiled_dir, current))
+            if self._pinned is not None:
+                os.close(self._pinned)
+            self._current, self._pinned = current, pin
+
+    def _prune(self, keep):
+        """Delete versions no worker has pinned (a lagging worker keeps its own alive)."""
+        for version in os.listdir(self.compiled_dir):
+            if not version.startswith("v") or version == keep:
+                continue
+            try:
+                fd = os.open(os.path.join(self.compiled_dir, version, ".inuse"), os.O_RDONLY | os.O_CREAT, 0o644)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            shutil.rmtree(os.path.join(self.compiled_dir, version), ignore_errors=True)
+            os.close(fd)
+
+    def _publish(self, force):
+        """Compile the source into a new version unless CURRENT already matches it (one worker at a time)."""
+        os.makedirs(self.compiled_dir, exist_ok=True)
+        with open(os.path.join(self.compiled_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            sha = _sha256(self.source)
+            current = self._pointer()
+            if current and not force:
+                try:
+                    with open(os.path.join(self.compiled_dir, current, "manifest.json")) as f:
+                        if json.load(f).get("source_sha256") == sha:
+                            return current
+                except FileNotFoundError:
+                    pass
+
+            arrays = compile_watchlist(_read_rows(self.source))
+            version = f"v{time.time_ns()}"
+            staging = tempfile.mkdtemp(dir=self.compiled_dir, prefix=".build-")
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            manifest = {
+                "version": version,
+                "source": self.source,
+                "source_sha256": sha,
+                "compiled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "entries": int(len(arrays["entry_kind"])),
+                "names": int(len(arrays["pattern_entry"])),
+                "ip_intervals": int(len(arrays["ip_start"])),
+                "arrays": sorted(arrays)
+            }
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump(manifest, f)
+            os.rename(staging, os.path.join(self.compiled_dir, version))
+
+            pointer = os.path.join(self.compiled_dir, ".CURRENT.tmp")
+            with open(pointer, "w") as f:
+                f.write(version)
+            os.replace(pointer, os.path.join(self.compiled_dir, "CURRENT"))
+
+            self._prune(keep=version)
+            return version
+
+    def reload(self):
+        """Recompile the source now and swap it in; returns the new manifest."""
+        with self._lock:
+            self._source_mtime = os.stat(self.source).st_mtime_ns
+            self._publish(force=True)
+            self._checked = 0.0
+        return self.index.manifest
+
+    def screen(self, evidence):
+        """All watchlist hits for one transaction: location, IP, name fields, free text."""
+        index = self.index
+        hits = []
+        loc = evidence.get("loc")
+        if loc:
+            hits.extend(hit for hit in index.lookup(str(loc)) if hit.kind == "country")
+        ip = evidence.get("ip_address") or evidence.get("ip")
+        if ip:
+            hit = index.match_ip(str(ip))
+            if hit is not None:
+                hits.append(hit)
+        for field in self.NAME_FIELDS:
+            if evidence.get(field):
+                hits.extend(hit._replace(matched=f"{field}={evidence[field]}") for hit in index.screen_name(str(evidence[field])))
+        for field in self.TEXT_FIELDS:
+            if evidence.get(field):
+                hits.extend(index.scan(str(evidence[field])))
+        return hits
+
+SCREENING = WatchlistScreener()
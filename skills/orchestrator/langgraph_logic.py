@@ -1,4 +1,5 @@
 from typing import Dict, TypedDict, Any
+from gateway.metrics import timed, timed_node
 
 # TypedDict for the shared state
 class InvestigationState(TypedDict):
@@ -34,6 +35,7 @@ def generate_investigation_summary(temporal_res, compliance_res, tx_data):
     """
     return summary.strip()
 
+@timed_node("evidence")
 def evidence_node(state: InvestigationState):
     """
     Step 1: Evidence Collection
@@ -52,6 +54,7 @@ def evidence_node(state: InvestigationState):
         state['audit_trail'].append("EvidenceCollector: Received external transaction data.")
     return state
 
+@timed_node("temporal")
 def temporal_node(state: InvestigationState):
     """
     Step 2: Temporal Analysis
@@ -59,7 +62,11 @@ def temporal_node(state: InvestigationState):
     """
     from skills.temporal_analyst.temporal_engine import detect_behavioral_shift
     
-    # Use provided baseline or mock
+    result = detect_behavioral_shift(state['evidence'], _resolve_baseline(state))
+    return _apply_temporal_result(state, result)
+
+def _resolve_baseline(state: InvestigationState):
+    """Use provided baseline or mock"""
     baseline = state.get('baseline')
     if not baseline:
         baseline = {
@@ -68,15 +75,18 @@ def temporal_node(state: InvestigationState):
             "last_loc": "Dubai", 
             "last_time": "2026-02-04T10:00:00"
         }
-    
-    result = detect_behavioral_shift(state['evidence'], baseline)
+    return baseline
+
+def _apply_temporal_result(state: InvestigationState, result):
     state['temporal_result'] = result
     state['is_suspicious'] = result['is_suspicious']
     
-    state['audit_trail'].append(f"TemporalAnalyst: Shift detected? {result['is_suspicious']} (Reason: {result['reasoning']})")
+    reason = f" (Reason: {result['reasoning']})" if result.get('reasoning') is not None else ""
+    state['audit_trail'].append(f"TemporalAnalyst: Shift detected? {result['is_suspicious']}{reason}")
     
     return state
 
+@timed_node("compliance")
 def compliance_node(state: InvestigationState):
     """
     Step 3: Compliance Radar
@@ -121,11 +131,13 @@ import os
 
 # ... (existing imports)
 
-from skills.compliance_radar.radar import verify_compliance_live
+from skills.compliance_radar.radar import verify_compliance_live, verify_compliance_async, GroundingUnavailable
+from skills.temporal_analyst.fuzzy_rules import FUZZY_RULES
 
 def test_copilot_node(state): # Renamed to fit existing flow or I can just use get_soft_computing_narrative as wrapper
     pass
 
+@timed_node("narrative")
 def get_soft_computing_narrative(state):
     """
     Uses Gemini via Radar to explain the risk.
@@ -134,20 +146,14 @@ def get_soft_computing_narrative(state):
     fuzzy_score = temporal.get('score', 0)
     action = temporal.get('action', 'UNKNOWN')
     
-    # PERFORMANCE OPTIMIZATION: Only call Gemini for heavy suspects
-    if fuzzy_score < 0.6:
+    # PERFORMANCE OPTIMIZATION: Only call Gemini for heavy suspects (same cutoff as the live rules)
+    if fuzzy_score < FUZZY_RULES.rules.suspicious_cutoff:
         return f"**Automated Triage**: Low Risk ({fuzzy_score}). No GenAI analysis required."
         
-    # PERFORMANCE OPTIMIZATION: Removed Live Gemini Call for Demo Reliability
-    # We now strictly use the Deterministic Soft Computing Logic
-    
-    # try:
-    #     legal_analysis = verify_compliance_live(state['evidence'])
-    #     report = f"""..."""
-    #     return report
-    # except Exception:
+    # PERFORMANCE OPTIMIZATION: No Live Gemini Call on the triage path.
+    # Grounded SARs come from the async stage (get_grounded_narrative) off the hot path.
     
-    # FALLBACK / OFFLINE NARRATIVE (Always used now for speed)
+    # FALLBACK / OFFLINE NARRATIVE
     return f"""
     --- SENTINEL-NODE X INVESTIGATION REPORT ---
     Fuzzy Risk Score: {fuzzy_score}
@@ -163,6 +169,45 @@ def get_soft_computing_narrative(state):
     Status: EVIDENCE LOCKED.
     """
 
+def render_case_report(state):
+    """
+    On-demand case report for the read path (/cases/{id}/report): the
+    investigation summary, the Soft Computing narrative and any compliance
+    flags, rendered from the compact evidence stored with the case.
+    """
+    compliance = state.get('compliance_result', {})
+    parts = [
+        generate_investigation_summary(state['temporal_result'], compliance, state['evidence']),
+        get_soft_computing_narrative(state).strip()
+    ]
+    if compliance.get('flags'):
+        parts.append("**Compliance Flags**:\n" + "\n".join(f"- {flag}" for flag in compliance['flags']))
+    return "\n\n".join(parts)
+
+async def get_grounded_narrative(state):
+    """
+    Live-grounded SAR via the async Compliance Radar stage.
+    Falls back to the deterministic Soft Computing narrative when grounding
+    is slow, failing or circuit-broken.
+    """
+    temporal = state.get('temporal_result', {})
+    fuzzy_score = temporal.get('score', 0)
+    if fuzzy_score < FUZZY_RULES.rules.suspicious_cutoff:
+        return get_soft_computing_narrative(state)
+    
+    try:
+        legal_analysis = await verify_compliance_async(state['evidence'])
+    except GroundingUnavailable:
+        return get_soft_computing_narrative(state)
+    
+    return f"""
+    --- SENTINEL-NODE X GROUNDED SAR ---
+    Fuzzy Risk Score: {fuzzy_score}
+    Decision: {temporal.get('action', 'UNKNOWN')}
+    
+    {legal_analysis.strip()}
+    """
+
 # ... (existing functions)
 
 def run_orchestrator(alert_id):
@@ -187,8 +232,11 @@ def run_orchestrator(alert_id):
     
     return state
 
-def run_triage(transaction: dict, user_baseline: dict):
-    # ... (existing code)
+def run_triage(transaction: dict, user_baseline: dict, narrate: bool = False):
+    """
+    Hot-path triage. The narrative is NOT rendered here unless asked for:
+    flagged cases get their report on demand from /cases/{id}/report.
+    """
     state: InvestigationState = {
         "alert_id": "API-REQ-001",
         "evidence": transaction,
@@ -204,11 +252,54 @@ def run_triage(transaction: dict, user_baseline: dict):
     state = temporal_node(state)
     state = compliance_node(state)
     
-    # Generate Copilot Summary (Switched to Sort Computing Narrative)
-    state['summary'] = get_soft_computing_narrative(state)
+    if narrate:
+        state['summary'] = get_soft_computing_narrative(state)
     
     return state
 
+def run_triage_batch(transactions: list, user_baselines: list, narrate: bool = False, temporal_results: list = None,
+                     explain: str = "all"):
+    """
+    Batch variant of run_triage for gateway bursts.
+    The temporal stage runs as ONE vectorized pass; compliance stays per-item
+    (and only does real work for suspicious rows). No narratives unless asked.
+    Every row carries the same reasoning /triage returns (explain="suspicious"
+    renders it for flagged rows only).
+    temporal_results skips the temporal pass (callers that already scored the batch, e.g. backtests).
+    """
+    from skills.temporal_analyst.temporal_engine import detect_behavioral_shift_many
+
+    states = []
+    for idx, (transaction, user_baseline) in enumerate(zip(transactions, user_baselines), start=1):
+        state: InvestigationState = {
+            "alert_id": f"API-BATCH-{idx:04d}",
+            "evidence": transaction,
+            "baseline": user_baseline,
+            "temporal_result": {},
+            "compliance_result": {},
+            "audit_trail": ["Orchestrator: Received API Batch Request."],
+            "is_suspicious": False,
+            "summary": ""
+        }
+        states.append(evidence_node(state))
+
+    results = temporal_results
+    if results is None:
+        with timed("temporal_batch"):
+            results = detect_behavioral_shift_many(
+                [state['evidence'] for state in states],
+                [_resolve_baseline(state) for state in states],
+                explain=explain
+            )
+
+    for state, result in zip(states, results):
+        _apply_temporal_result(state, result)
+        compliance_node(state)
+        if narrate:
+            state['summary'] = get_soft_computing_narrative(state)
+
+    return states
+
 if __name__ == "__main__":
     # Test Run
     final_state = run_orchestrator("ALERT-7781")
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+from gateway.shared_state import SharedTable
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+# Longer location names are cut at this many UTF-8 bytes
+LOC_BYTES = 32
+
+FIELDS = [
+    ("count", "<i4"),
+    ("mean", "<f8"),
+    ("m2", "<f8"),
+    ("last_loc", f"S{LOC_BYTES}"),
+    ("last_time", "<i8"),  # microseconds since epoch
+    ("tz_aware", "?"),
+]
+
+class BaselineStore:
+    """
+    SERVER-SIDE BASELINES: Rolling per-user behavioral baselines.
+    Amount mean/variance are updated online with Welford's algorithm, and the
+    last location/time are tracked on every scored transaction.
+
+    Records are fixed-width (~70 bytes per user) in a SharedTable. Given a
+    state_dir (the server's group_dir()) every Uvicorn worker maps the same
+    file and updates it under one lock, so a user's history is never split
+    across workers; without one the store is private to this process.
+    """
+
+    def __init__(self, initial_capacity=1024, min_samples=2, std_floor=1.0, state_dir=None, name="baselines"):
+        self.min_samples = min_samples
+        self.std_floor = std_floor
+        self._table = SharedTable(FIELDS, name=name, state_dir=state_dir, initial_capacity=initial_capacity)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, user_id):
+        with self._table.locked(shared=True) as table:
+            return table.find(user_id) is not None
+
+    def get(self, user_id, prior=None):
+        """
+        Baseline dict for user_id in the temporal engine's format, or prior if the
+        user is unknown. Until min_samples observations exist, mean/std come from prior.
+        """
+        with self._table.locked(shared=True) as table:
+            row = table.find(user_id)
+            if row is None:
+                return prior
+            record = table.records[row].copy()
+
+        count = int(record["count"])
+        baseline = dict(prior) if prior else {}
+        if count >= self.min_samples or not prior:
+            std = (record["m2"] / (count - 1)) ** 0.5 if count > 1 else 0.0
+            baseline["mean_amt"] = float(record["mean"])
+            baseline["std_amt"] = max(float(std), self.std_floor)
+
+        last_time = _EPOCH + int(record["last_time"]) * _ONE_US
+        if record["tz_aware"]:
+            last_time = last_time.replace(tzinfo=timezone.utc)
+        baseline["last_loc"] = bytes(record["last_loc"]).decode("utf-8", "ignore")
+        baseline["last_time"] = last_time.isoformat()
+        baseline["samples"] = count
+        return baseline
+
+    def update(self, user_id, amount, loc, timestamp):
+        """Fold one scored transaction into the user's baseline (Welford update)."""
+        ts = datetime.fromisoformat(timestamp)
+        tz_aware = ts.tzinfo is not None
+        if tz_aware:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        ts_us = (ts - _EPOCH) // _ONE_US
+        loc = str(loc).encode("utf-8")[:LOC_BYTES]
+
+        with self._table.locked() as table:
+            row, _ = table.claim(user_id)
+            record = table.records[row:row + 1]
+            count = int(record["count"][0]) + 1
+            mean = float(record["mean"][0])
+            delta = amount - mean
+            mean += delta / count
+            record["m2"] += delta * (amount - mean)
+            record["mean"] = mean
+            record["count"] = count
+            record["last_loc"] = loc
+            record["last_time"] = ts_us
+            record["tz_aware"] = tz_aware
+
+    def reset(self):
+        self._table.reset()
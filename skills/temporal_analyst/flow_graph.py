@@ -0,0 +1,148 @@
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+# Fields a transaction may name its counterparty in
+RECEIVER_FIELDS = ("counterparty", "receiver", "beneficiary", "to_account")
+SENDER_FIELDS = ("user_id", "account_id", "sender")
+
+def _first(tx, fields):
+    for field in fields:
+        value = tx.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+def epoch_seconds(timestamp):
+    """ISO timestamp -> epoch seconds (naive timestamps are taken as UTC)."""
+    dt = datetime.fromisoformat(str(timestamp))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+class CircularFlowDetector:
+    """
+    ROUND-TRIP ENGINE: Sliding-window money-flow graph that spots short
+    cycles (A->B->A, A->B->C->A, A->B->C->D->A) the moment the closing edge
+    arrives.
+
+    Each node keeps at most max_fanout in- and out-neighbours (oldest evicted)
+    and edges expire window_seconds after they were last seen, so one update
+    costs O(max_fanout^2) set-intersection work in the worst case, whatever
+    the size of the graph.
+    """
+
+    # Shorter loops are the stronger laundering signal
+    LENGTH_WEIGHT = {2: 1.0, 3: 0.85, 4: 0.7}
+
+    def __init__(self, window_seconds=86400.0, max_cycle=4, max_fanout=64, max_edges=1_000_000, min_amount=1000.0):
+        self.window = window_seconds
+        self.max_cycle = max(2, min(4, max_cycle))
+        self.max_fanout = max_fanout
+        self.max_edges = max_edges
+        self.min_amount = min_amount
+        self.cycles_found = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._out = {}   # sender -> {receiver: (ts, amount)}, oldest first
+        self._in = {}    # receiver -> {sender: (ts, amount)}, oldest first
+        self._log = deque()  # (ts, sender, receiver) in arrival order, for expiry
+        self._clock = float("-inf")
+
+    @property
+    def edge_count(self):
+        return sum(len(receivers) for receivers in self._out.values())
+
+    def _unlink(self, u, v):
+        receivers, senders = self._out.get(u), self._in.get(v)
+        if receivers is not None:
+            receivers.pop(v, None)
+            if not receivers:
+                del self._out[u]
+        if senders is not None:
+            senders.pop(u, None)
+            if not senders:
+                del self._in[v]
+
+    def _expire(self, now):
+        horizon = now - self.window
+        while self._log and (self._log[0][0] < horizon or len(self._log) > self.max_edges):
+            ts, u, v = self._log.popleft()
+            edge = self._out.get(u, {}).get(v)
+            # Only drop the edge if it was not refreshed by a later transfer
+            if edge is not None and edge[0] == ts:
+                self._unlink(u, v)
+
+    def _cycles(self, u, v):
+        """
+        Paths v -> ... -> u (1 to max_cycle-1 hops) that the new edge u -> v would close.
+        Edges below min_amount are skipped: any cycle through one scores 0.
+        """
+        floor = self.min_amount
+        out_v = self._out.get(v, {})
+        in_u = {x for x, (_, amount) in self._in.get(u, {}).items() if amount >= floor}
+        if u in out_v and out_v[u][1] >= floor:
+            yield [u, v, u]
+        if self.max_cycle < 3:
+            return
+        hops = [w for w, (_, amount) in out_v.items() if amount >= floor and w != u]
+        for w in in_u.intersection(hops):
+            if w != v:
+                yield [u, v, w, u]
+        if self.max_cycle >= 4:
+            for w in hops:
+                out_w = self._out.get(w, {})
+                for x in out_w.keys() & in_u:
+                    if x not in (u, v, w) and out_w[x][1] >= floor:
+                        yield [u, v, w, x, u]
+
+    def _score(self, cycle, amount):
+        amounts = [amount] + [self._out[a][b][1] for a, b in zip(cycle[1:], cycle[2:])]
+        low, high = min(amounts), max(amounts)
+        if low < self.min_amount or high <= 0:
+            return 0.0
+        # Money that comes back nearly whole (minus "fees") is the laundering tell
+        return self.LENGTH_WEIGHT[len(cycle) - 1] * (low / high)
+
+    def _link(self, u, v, ts, amount):
+        receivers = self._out.setdefault(u, {})
+        receivers.pop(v, None)
+        receivers[v] = (ts, amount)
+        senders = self._in.setdefault(v, {})
+        senders.pop(u, None)
+        senders[u] = (ts, amount)
+        self._log.append((ts, u, v))
+        if len(receivers) > self.max_fanout:
+            self._unlink(u, next(iter(receivers)))
+        if len(senders) > self.max_fanout:
+            self._unlink(next(iter(senders)), v)
+
+    def observe(self, sender, receiver, amount, ts):
+        """
+        Fold one transfer into the graph. Returns (flow_risk, cycle) for the best
+        cycle the transfer closes, or (0.0, None).
+        """
+        if sender is None or receiver is None or sender == receiver:
+            return 0.0, None
+        with self._lock:
+            self._clock = max(self._clock, ts)
+            self._expire(self._clock)
+            best, best_cycle = 0.0, None
+            # A transfer below min_amount cannot close a scoring cycle
+            for cycle in self._cycles(sender, receiver) if amount >= self.min_amount else ():
+                risk = self._score(cycle, amount)
+                if risk > best:
+                    best, best_cycle = risk, cycle
+            self._link(sender, receiver, ts, amount)
+            if best_cycle is not None:
+                self.cycles_found += 1
+            return round(best, 4), best_cycle
+
+    def observe_tx(self, tx):
+        """observe() for a transaction dict (sender: user_id/account_id, receiver: counterparty/...)."""
+        sender, receiver = _first(tx, SENDER_FIELDS), _first(tx, RECEIVER_FIELDS)
+        if sender is None or receiver is None or not tx.get('timestamp'):
+            return 0.0, None
+        return self.observe(sender, receiver, float(tx.get('amount', 0)), epoch_seconds(tx['timestamp']))
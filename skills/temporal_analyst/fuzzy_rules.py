@@ -0,0 +1,238 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+import yaml
+
+# Lives next to agent.yaml at the repo root
+RULES_YAML = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "rules.yaml")
+
+log = logging.getLogger(__name__)
+
+RAMP, CRISP, IDENTITY = 0, 1, 2
+MEMBERSHIPS = {"ramp": RAMP, "crisp": CRISP, "identity": IDENTITY}
+
+class RuleError(ValueError):
+    """A rule file that does not compile."""
+
+class CompiledRules:
+    """
+    FUZZY RULE TABLES: A rules.yaml compiled into flat arrays.
+
+    Signal i has a membership kind, offset and width; rule scores are sums of
+    (signal, weight) terms; the final score is the max over rules, then the
+    first action cutoff it reaches. Scoring a transaction or a whole batch is
+    the same short loop over terms, whatever the rules say: no per-signal
+    branches on the hot path. Terms are accumulated left to right in both
+    paths, so scalar and vectorized scores are bit-identical.
+    """
+
+    def __init__(self, spec, sha256=None):
+        if not isinstance(spec, dict):
+            raise RuleError("rules file must be a mapping")
+        signals = spec.get("signals") or {}
+        rules = spec.get("rules") or []
+        if not signals or not rules:
+            raise RuleError("rules file needs 'signals' and 'rules'")
+
+        self.signals = tuple(signals)
+        self._ids = {name: i for i, name in enumerate(self.signals)}
+        kinds, lo, width = [], [], []
+        for name, definition in signals.items():
+            kind = MEMBERSHIPS.get((definition or {}).get("membership"))
+            if kind is None:
+                raise RuleError(f"signal '{name}': membership must be one of {', '.join(MEMBERSHIPS)}")
+            start, end = float(definition.get("from", 0.0)), float(definition.get("to", 1.0))
+            if kind == RAMP and end == start:
+                raise RuleError(f"signal '{name}': ramp needs from != to")
+            kinds.append(kind)
+            lo.append(start)
+            width.append(end - start)
+        self.kind = np.array(kinds, dtype=np.int8)
+        self.lo = np.array(lo, dtype=np.float64)
+        self.width = np.array(width, dtype=np.float64)
+
+        self.rule_names = []
+        term_rule, term_signal, term_weight = [], [], []
+        for r, rule in enumerate(rules):
+            name = rule.get("name") or f"rule_{r}"
+            weights = rule.get("weights") or {}
+            if not weights:
+                raise RuleError(f"rule '{name}' has no weights")
+            for signal, weight in weights.items():
+                if signal not in self._ids:
+                    raise RuleError(f"rule '{name}' uses undeclared signal '{signal}'")
+                term_rule.append(r)
+                term_signal.append(self._ids[signal])
+                term_weight.append(float(weight))
+            self.rule_names.append(name)
+        self.term_rule = np.array(term_rule, dtype=np.int32)
+        self.term_signal = np.array(term_signal, dtype=np.int32)
+        self.term_weight = np.array(term_weight, dtype=np.float64)
+
+        cutoffs, labels, default = [], [], None
+        for entry in spec.get("actions") or []:
+            if "default" in entry:
+                default = str(entry["default"])
+            else:
+                cutoffs.append(float(entry["min"]))
+                labels.append(str(entry["action"]))
+        if default is None:
+            raise RuleError("actions need a 'default'")
+        order = np.argsort(cutoffs, kind="stable")[::-1]
+        self.cutoffs = np.array(cutoffs, dtype=np.float64)[order]
+        self.labels = [labels[i] for i in order]
+        self.default_action = default
+        self.suspicious_cutoff = float(spec.get("suspicious_cutoff", 0.6))
+
+        self.version = str(spec.get("version", "unversioned"))
+        self.sha256 = sha256
+
+        # Plain-Python copies for the one-transaction path (no NumPy call overhead)
+        self._scalar_signals = [(name, int(k), float(a), float(w)) for name, k, a, w in zip(self.signals, kinds, lo, width)]
+        self._scalar_terms = [[] for _ in self.rule_names]
+        for r, s, w in zip(term_rule, term_signal, term_weight):
+            self._scalar_terms[r].append((s, float(w)))
+        self._scalar_actions = list(zip(self.cutoffs.tolist(), self.labels))
+
+    # --- one transaction ----------------------------------------------------
+
+    def score(self, signals):
+        """Raw (unrounded) fuzzy score from {signal name: value}; missing signals count as 0."""
+        memberships = []
+        for name, kind, lo, width in self._scalar_signals:
+            x = signals.get(name, 0.0)
+            if kind == RAMP:
+                memberships.append(min(1.0, max(0.0, (x - lo) / width)))
+            elif kind == CRISP:
+                memberships.append(1.0 if x else 0.0)
+            else:
+                memberships.append(min(1.0, max(0.0, x)))
+        best = 0.0
+        for terms in self._scalar_terms:
+            acc = 0.0
+            for s, w in terms:
+                acc = acc + memberships[s] * w
+            best = max(best, acc)
+        return best
+
+    def action(self, score):
+        for cutoff, label in self._scalar_actions:
+            if score >= cutoff:
+                return label
+        return self.default_action
+
+    # --- a whole batch ------------------------------------------------------
+
+    def rule_scores(self, columns, n):
+        """(rules x n) matrix of each rule's score, from {signal name: array}."""
+        memberships = np.zeros((len(self.signals), n))
+        for i, (name, kind, lo, width) in enumerate(self._scalar_signals):
+            x = columns.get(name)
+            if x is None:
+                continue
+            if kind == RAMP:
+                memberships[i] = np.minimum(1.0, np.maximum(0.0, (np.asarray(x, dtype=np.float64) - lo) / width))
+            elif kind == CRISP:
+                memberships[i] = np.asarray(x, dtype=bool).astype(np.float64)
+            else:
+                memberships[i] = np.minimum(1.0, np.maximum(0.0, np.asarray(x, dtype=np.float64)))
+        scores = np.zeros((len(self.rule_names), n))
+        for r, s, w in zip(self.term_rule.tolist(), self.term_signal.tolist(), self.term_weight.tolist()):
+            scores[r] = scores[r] + memberships[s] * w
+        return scores
+
+    def score_batch(self, columns, n):
+        """Raw scores for n rows from {signal name: array}; same arithmetic as score()."""
+        return np.maximum(0.0, self.rule_scores(columns, n).max(axis=0)) if n else np.zeros(0)
+
+    def actions(self, scores):
+        if not self.labels:
+            return np.full(len(scores), self.default_action)
+        return np.select([scores >= cutoff for cutoff in self.cutoffs], self.labels, default=self.default_action)
+
+    @property
+    def manifest(self):
+        return {
+            "version": self.version,
+            "sha256": self.sha256,
+            "signals": list(self.signals),
+            "rules": self.rule_names,
+            "actions": [{"min": c, "action": a} for c, a in self._scalar_actions] + [{"default": self.default_action}],
+            "suspicious_cutoff": self.suspicious_cutoff
+        }
+
+def load_rules(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        spec = yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        raise RuleError(f"invalid YAML: {e}")
+    try:
+        return CompiledRules(spec, sha256=hashlib.sha256(raw).hexdigest())
+    except RuleError:
+        raise
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise RuleError(f"malformed rules: {e}")
+
+class FuzzyRuleEngine:
+    """
+    Hot-swappable handle on the compiled rules. Each worker re-checks the
+    file's mtime at most every check_interval seconds and swaps in a freshly
+    compiled table with one reference assignment, so a scoring call always
+    sees one complete rule set. A file that fails to compile is reported and
+    the previous rules stay live.
+    """
+
+    def __init__(self, path=RULES_YAML, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._rules = load_rules(path)  # Fail loudly at startup
+        self._checked = time.monotonic()
+
+    @property
+    def rules(self):
+        if time.monotonic() - self._checked > self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked > self.check_interval:
+                    self._refresh()
+        return self._rules
+
+    def _refresh(self):
+        self._checked = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                self._rules = load_rules(self.path)
+                self.last_error = None
+            except (RuleError, OSError) as e:
+                self.last_error = str(e)
+                log.warning("fuzzy rules not reloaded, keeping %s: %s", self._rules.version, e)
+
+    def reload(self):
+        """Recompile now; raises RuleError (old rules stay live) if the file is bad."""
+        with self._lock:
+            rules = load_rules(self.path)
+            self._rules, self._mtime, self.last_error = rules, os.stat(self.path).st_mtime_ns, None
+            self._checked = time.monotonic()
+        return self.manifest
+
+    def swap(self, rules):
+        """Install an already compiled rule set (e.g. for experiments/backtests)."""
+        self._rules = rules
+
+    @property
+    def manifest(self):
+        return {**self._rules.manifest, "source": self.path, "last_error": self.last_error}
+
+FUZZY_RULES = FuzzyRuleEngine(os.getenv("SENTINEL_RULES", RULES_YAML))
@@ -0,0 +1,61 @@
+import os
+import csv
+import numpy as np
+
+LOCATIONS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locations.csv")
+EARTH_RADIUS_KM = 6371.0088
+
+def _key(name):
+    return " ".join(str(name).split()).casefold()
+
+class LocationIndex:
+    """
+    GEO INDEX: City/country names resolved to coordinates once, with the full
+    great-circle distance matrix precomputed. Scoring a pair is then two dict
+    lookups and one array read, and the scalar and vectorized paths read the
+    very same float out of the matrix.
+    """
+
+    def __init__(self, rows):
+        self.names = [row["name"] for row in rows]
+        self._ids = {_key(row["name"]): i for i, row in enumerate(rows)}
+        self.country = [row["country"] for row in rows]
+        lat = np.radians(np.array([float(row["lat"]) for row in rows]))
+        lon = np.radians(np.array([float(row["lon"]) for row in rows]))
+
+        # Haversine over every pair (n is small: a few hundred entries at most)
+        dlat = lat[:, None] - lat[None, :]
+        dlon = lon[:, None] - lon[None, :]
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+        self.distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    @classmethod
+    def load(cls, path=LOCATIONS_CSV):
+        with open(path, newline="") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return _key(name) in self._ids
+
+    def lookup(self, name):
+        """Row id for a location name (case/whitespace-insensitive), -1 if unknown."""
+        return self._ids.get(_key(name), -1)
+
+    def lookup_many(self, names):
+        """Vectorized lookup: each distinct name is resolved once."""
+        uniques, inverse = np.unique(np.asarray(names, dtype=object).astype(str), return_inverse=True)
+        ids = np.array([self.lookup(name) for name in uniques], dtype=np.int64)
+        return ids[inverse.reshape(-1)]
+
+    def distance(self, a, b):
+        """Great-circle km between two names, None if either is unknown."""
+        i, j = self.lookup(a), self.lookup(b)
+        if i < 0 or j < 0:
+            return None
+        return self.distance_km[i, j].item()
+
+# Built once at import (i.e. at server startup)
+LOCATIONS = LocationIndex.load()
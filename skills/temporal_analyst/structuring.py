@@ -0,0 +1,139 @@
+import numpy as np
+
+from gateway.shared_state import SharedTable
+
+def _label(seconds):
+    if seconds % 86400 == 0 and seconds >= 7 * 86400:
+        return f"{seconds // 86400}d"
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 60}m"
+
+def default_saturation(seconds):
+    """Near-threshold amounts that make a window fully suspicious: longer windows need more."""
+    if seconds <= 3600:
+        return 3
+    if seconds <= 86400:
+        return 4
+    return 6
+
+class StructuringDetector:
+    """
+    STRUCTURING ENGINE: Per-account rolling aggregates (count, sum, and how
+    many amounts landed just below the reporting threshold) over several
+    windows at once, e.g. 1h / 24h / 7d.
+
+    Every window is a ring of `buckets` time buckets, one fixed-shape record
+    (windows x buckets) per account in a SharedTable. A bucket is recycled
+    lazily when its stamp is older than the ring, so an update touches one
+    bucket per window (O(1)) and memory grows with accounts, never with events.
+    Given a state_dir (the server's group_dir()) every worker updates the same
+    records, so deposits for one account add up whichever worker took them;
+    without one the detector is private to this process.
+
+    `saturation` (near-threshold amounts that max out a window) defaults per
+    window from its length, so any SENTINEL_STRUCTURING_WINDOWS list works.
+    """
+
+    def __init__(self, threshold=10000.0, band=0.1, windows=(3600, 86400, 604800), buckets=12,
+                 saturation=None, initial_capacity=1024, state_dir=None, name="structuring"):
+        self.windows = tuple(int(w) for w in windows)
+        if saturation is None:
+            saturation = tuple(default_saturation(w) for w in self.windows)
+        if len(saturation) != len(self.windows):
+            raise ValueError(
+                f"structuring: {len(saturation)} saturation counts for {len(self.windows)} windows "
+                f"{self.windows}; pass one per window or leave saturation unset"
+            )
+        self.threshold = float(threshold)
+        self.floor = self.threshold * (1.0 - band)
+        self.labels = [_label(w) for w in self.windows]
+        self.buckets = buckets
+        self._width = np.array(self.windows, dtype=np.float64) / buckets
+        self._k = np.arange(len(self.windows))
+        self._saturation = np.array(saturation, dtype=np.float64)
+        shape = (len(self.windows), buckets)
+        self._table = SharedTable(
+            [("stamp", "<i8", shape), ("count", "<i4", shape), ("sum", "<f8", shape),
+             ("near", "<i4", shape), ("near_sum", "<f8", shape)],
+            name=name, state_dir=state_dir, initial_capacity=initial_capacity
+        )
+
+    def __len__(self):
+        return len(self._table)
+
+    def _totals(self, records, row, now_idx):
+        # Buckets still inside each window relative to now
+        stamps = records["stamp"][row]
+        live = (stamps > (now_idx - self.buckets)[:, None]) & (stamps <= now_idx[:, None])
+        return (
+            (records["count"][row] * live).sum(axis=1),
+            (records["sum"][row] * live).sum(axis=1),
+            (records["near"][row] * live).sum(axis=1),
+            (records["near_sum"][row] * live).sum(axis=1),
+        )
+
+    def aggregates(self, account, ts):
+        """{window: {count, sum, near_threshold, near_sum}} for an account as of ts (epoch seconds)."""
+        now_idx = np.floor(ts / self._width).astype(np.int64)
+        with self._table.locked(shared=True) as table:
+            row = table.find(account)
+            if row is None:
+                return None
+            count, total, near, near_sum = self._totals(table.records, row, now_idx)
+        return {
+            label: {"count": int(c), "sum": round(float(s), 2), "near_threshold": int(n), "near_sum": round(float(ns), 2)}
+            for label, c, s, n, ns in zip(self.labels, count, total, near, near_sum)
+        }
+
+    def observe(self, account, amount, ts):
+        """
+        Fold one transaction in and score it. Returns (structuring_risk, detail):
+        risk is 0 unless this amount itself sits just below the threshold.
+        """
+        is_near = self.floor <= amount < self.threshold
+        idx = np.floor(ts / self._width).astype(np.int64)
+        slots = idx % self.buckets
+        k = self._k
+
+        with self._table.locked() as table:
+            row, created = table.claim(account)
+            records = table.records
+            stamp, count, total = records["stamp"][row], records["count"][row], records["sum"][row]
+            near, near_sum = records["near"][row], records["near_sum"][row]
+            if created:
+                stamp[...] = np.iinfo(np.int64).min
+
+            stamps = stamp[k, slots]
+            recycle = stamps < idx
+            if recycle.any():
+                kr, sr = k[recycle], slots[recycle]
+                stamp[kr, sr] = idx[recycle]
+                count[kr, sr] = 0
+                total[kr, sr] = 0.0
+                near[kr, sr] = 0
+                near_sum[kr, sr] = 0.0
+            # A late event whose bucket was already recycled is past its window
+            keep = stamp[k, slots] == idx
+            ka, sa = k[keep], slots[keep]
+            count[ka, sa] += 1
+            total[ka, sa] += amount
+            if is_near:
+                near[ka, sa] += 1
+                near_sum[ka, sa] += amount
+
+            if not is_near:
+                return 0.0, None
+            _, _, near, near_sum = self._totals(records, row, idx)
+
+        # Membership per window: 1 near-threshold amount = 0, `saturation` of them = 1
+        membership = np.clip((near - 1) / (self._saturation - 1), 0.0, 1.0)
+        best = int(np.argmax(membership))
+        risk = float(membership[best])
+        if risk <= 0.0:
+            return 0.0, None
+        detail = f"{int(near[best])}x just below {self.threshold:,.0f} in {self.labels[best]}, total {float(near_sum[best]):,.0f}"
+        return round(risk, 4), detail
+
+    def reset(self):
+        self._table.reset()
@@ -1,31 +1,54 @@
+import warnings
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 
-def calculate_fuzzy_risk(z_score, velocity_conflict):
+from skills.temporal_analyst.geo_index import LOCATIONS
+from skills.compliance_radar.watchlist import SCREENING
+from skills.temporal_analyst.fuzzy_rules import FUZZY_RULES
+
+def calculate_fuzzy_risk(z_score, velocity_conflict, flow_risk=0.0, structuring_risk=0.0, rules=None):
     """
     SOFT COMPUTING: Fuzzy Risk Inference Engine.
     Handles uncertainty rather than binary thresholds.
+    Memberships, rule weights and action cutoffs come from rules.yaml
+    (see fuzzy_rules.py); flow_risk / structuring_risk are OR-ed in by their own rules.
     """
-    # 1. Fuzzification of Z-Score (0.0 to 1.0 risk)
-    z_risk = min(1.0, max(0.0, (z_score - 1.0) / 4.0)) 
-    
-    # 2. Fuzzification of Velocity (Binary weight in Soft Computing)
-    vel_risk = 1.0 if velocity_conflict else 0.0
-    
-    # 3. Soft Weighted Inference
-    # Balances statistical anomaly and physical impossibility
-    fuzzy_score = (z_risk * 0.4) + (vel_risk * 0.6)
-    
-    # 4. Defuzzification (Decision)
-    if fuzzy_score >= 0.85:
-        action = "AUTONOMOUS_FREEZE"
-    elif fuzzy_score >= 0.6:
-        action = "SOFT_RESTRICTION"
-    else:
-        action = "MONITOR_INTENSELY"
-        
+    rules = rules or FUZZY_RULES.rules
+    fuzzy_score = rules.score({
+        'z_score': z_score, 'velocity': velocity_conflict,
+        'flow_risk': flow_risk, 'structuring_risk': structuring_risk
+    })
+    # Defuzzification (Decision)
+    action = rules.action(fuzzy_score)
     return round(fuzzy_score, 2), action
 
+# Faster than a commercial flight between two indexed places = impossible travel
+MAX_TRAVEL_KMH = 800.0
+# Legacy rule window, still applied when either location is missing from the index
+VELOCITY_WINDOW_HOURS = 4
+
+def _velocity_violation(loc, last_loc, hours):
+    """Great-circle speed check; falls back to loc-changed-within-4h for unknown places."""
+    i, j = LOCATIONS.lookup(loc), LOCATIONS.lookup(last_loc)
+    if i < 0 or j < 0:
+        return loc != last_loc and hours < VELOCITY_WINDOW_HOURS
+    return LOCATIONS.distance_km[i, j].item() > MAX_TRAVEL_KMH * max(hours, 0.0)
+
+def _format_reasoning(fuzzy_score, action, z_score, mean_amt, std_amt, velocity_violation, last_loc, loc, hours,
+                      flow_risk=0.0, flow_cycle=None, structuring_risk=0.0, structuring_detail=None):
+    """Builds the human-readable reasoning string (parsed by the dashboard regex)."""
+    vel_tag = "Vel:True" if velocity_violation else "Vel:False"
+    reason_str = f"Fuzzy Score: {fuzzy_score}, Action: {action}"
+    reason_str += f" [Z:{z_score:.2f}, Mean:{mean_amt}, Std:{std_amt}, {vel_tag}]"
+
+    if velocity_violation:
+        reason_str += f", Loc:{last_loc}->{loc}, Time:{hours:.2f}h"
+    if flow_risk and flow_cycle:
+        reason_str += f", Circular Flow ({'->'.join(flow_cycle)}): {flow_risk:.2f}"
+    if structuring_risk and structuring_detail:
+        reason_str += f", Structuring ({structuring_detail}): {structuring_risk:.2f}"
+    return reason_str
+
 def detect_behavioral_shift(current_tx, baseline):
     # Z-Score for amount anomaly
     z_score = abs((current_tx['amount'] - baseline.get('mean_amt', 0)) / baseline.get('std_amt', 1))
@@ -36,22 +59,28 @@ def detect_behavioral_shift(current_tx, baseline):
     hours = (t2 - t1).total_seconds() / 3600
     
     # 🚨 FORCE DETECTION for Demo Strings (North Korea, Russia)
-    is_bad_actor_loc = current_tx['loc'] in ["North Korea", "Russia", "Iran"]
+    is_bad_actor_loc = SCREENING.index.is_sanctioned_jurisdiction(current_tx['loc'])
     
-    velocity_violation = (current_tx['loc'] != baseline['last_loc'] and hours < 4) or is_bad_actor_loc
+    velocity_violation = _velocity_violation(current_tx['loc'], baseline['last_loc'], hours) or is_bad_actor_loc
     
     if is_bad_actor_loc and not hours < 4:
          hours = 0.5 # Fake short time if needed for demo narrative
     
     # --- SOFT COMPUTING INTEGRATION ---
-    fuzzy_score, action = calculate_fuzzy_risk(z_score, velocity_violation)
-    is_suspicious = fuzzy_score >= 0.6 # Cutoff for "Suspicious" flag in legacy system
+    # Circular-flow / structuring memberships, filled in by the gateway's streaming detectors
+    flow_risk = current_tx.get('flow_risk', 0.0)
+    structuring_risk = current_tx.get('structuring_risk', 0.0)
+    rules = FUZZY_RULES.rules  # One rule set for the whole decision, even mid-swap
+    fuzzy_score, action = calculate_fuzzy_risk(z_score, velocity_violation, flow_risk, structuring_risk, rules)
+    is_suspicious = fuzzy_score >= rules.suspicious_cutoff
     
-    reason_str = f"Fuzzy Score: {fuzzy_score}, Action: {action}"
-    reason_str += f" [Z:{z_score:.2f}, Mean:{baseline.get('mean_amt', 0)}, Std:{baseline.get('std_amt', 1)}, {"Vel:True" if velocity_violation else "Vel:False"}]"
-    
-    if velocity_violation:
-        reason_str += f", Loc:{baseline['last_loc']}->{current_tx['loc']}, Time:{hours:.2f}h"
+    reason_str = _format_reasoning(
+        fuzzy_score, action, z_score,
+        baseline.get('mean_amt', 0), baseline.get('std_amt', 1),
+        velocity_violation, baseline['last_loc'], current_tx['loc'], hours,
+        flow_risk, current_tx.get('flow_cycle'),
+        structuring_risk, current_tx.get('structuring_detail')
+    )
         
     return {
         'is_suspicious': is_suspicious, 
@@ -59,3 +88,154 @@ def detect_behavioral_shift(current_tx, baseline):
         'action': action,
         'reasoning': reason_str
     }
+
+def _as_list(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+def _parse_timestamps(values):
+    """
+    Bulk ISO-8601 parse into datetime64[us].
+    Strings NumPy rejects (UTC offsets, 'Z') fall back to datetime.fromisoformat.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            return np.array(values, dtype='datetime64[us]')
+    except (ValueError, DeprecationWarning, UserWarning):
+        parsed = []
+        for value in values:
+            dt = datetime.fromisoformat(value)
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            parsed.append(dt)
+        return np.array(parsed, dtype='datetime64[us]')
+
+def _round2(values):
+    """
+    np.round(values, 2), except near-ties are re-rounded with the built-in round
+    so scores stay bit-identical to calculate_fuzzy_risk.
+    """
+    scaled = values * 100
+    rounded = np.round(values, 2)
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_tie.tolist():
+        rounded[i] = round(values[i].item(), 2)
+    return rounded
+
+def detect_behavioral_shift_batch(amounts, locs, timestamps, mean_amts, std_amts, last_locs, last_times, explain="suspicious",
+                                  flow_risks=None, flow_cycles=None, structuring_risks=None, structuring_details=None,
+                                  rules=None, with_signals=False):
+    """
+    VECTORIZED SHIFT ENGINE: Columnar variant of detect_behavioral_shift.
+    Takes one array per field and scores the whole burst with array operations.
+    Reasoning is only rendered for rows over the suspicion cutoff
+    (explain="all" renders every row, explain="none" skips it entirely).
+    flow_risks / flow_cycles and structuring_risks / structuring_details optionally
+    carry each row's circular-flow and structuring results.
+    rules overrides the live rule set (backtests); with_signals=True also returns
+    the fuzzy input columns under 'signals' (for per-rule attribution).
+
+    Returns a dict of columns: is_suspicious, score, action, reasoning.
+    """
+    n = len(amounts)
+    if not all(len(col) == n for col in (locs, timestamps, mean_amts, std_amts, last_locs, last_times)):
+        raise ValueError("all batch columns must have the same length")
+
+    mean_vals = _as_list(mean_amts)
+    std_vals = _as_list(std_amts)
+    means = np.asarray(mean_vals, dtype=np.float64)
+    stds = np.asarray(std_vals, dtype=np.float64)
+    if np.any(stds == 0):
+        raise ZeroDivisionError("std_amt must be non-zero")
+
+    # 1. Z-Scores for the whole batch
+    z_scores = np.abs((np.asarray(amounts, dtype=np.float64) - means) / stds)
+
+    # 2. Geographic Velocity (bulk datetime64 parse)
+    delta_us = (_parse_timestamps(timestamps) - _parse_timestamps(last_times)).astype(np.int64)
+    hours = delta_us / 1e6 / 3600
+    loc_arr = np.asarray(locs, dtype=object)
+    last_loc_arr = np.asarray(last_locs, dtype=object)
+    loc_ids = LOCATIONS.lookup_many(loc_arr)
+    last_ids = LOCATIONS.lookup_many(last_loc_arr)
+    known = (loc_ids >= 0) & (last_ids >= 0)
+    # Sanctioned jurisdictions always trip the velocity rule (screened once per distinct name)
+    screening = SCREENING.index
+    uniques, inverse = np.unique(loc_arr.astype(str), return_inverse=True)
+    is_bad_actor_loc = np.array([screening.is_sanctioned_jurisdiction(name) for name in uniques], dtype=bool)[inverse.reshape(-1)]
+    # Speed check against the precomputed distance matrix (unknown pairs: legacy rule)
+    too_fast = LOCATIONS.distance_km[loc_ids, last_ids] > MAX_TRAVEL_KMH * np.maximum(hours, 0.0)
+    legacy = (loc_arr != last_loc_arr) & (hours < VELOCITY_WINDOW_HOURS)
+    velocity = np.where(known, too_fast, legacy) | is_bad_actor_loc
+    hours = np.where(is_bad_actor_loc & ~(hours < 4), 0.5, hours)
+
+    # 3. Fuzzy Inference (same compiled rules and arithmetic as calculate_fuzzy_risk)
+    rules = rules or FUZZY_RULES.rules
+    flow = np.zeros(n) if flow_risks is None else np.asarray(flow_risks, dtype=np.float64)
+    structuring = np.zeros(n) if structuring_risks is None else np.asarray(structuring_risks, dtype=np.float64)
+    signals = {
+        'z_score': z_scores, 'velocity': velocity,
+        'flow_risk': flow, 'structuring_risk': structuring
+    }
+    raw_scores = rules.score_batch(signals, n)
+    actions = rules.actions(raw_scores)
+    scores = _round2(raw_scores)
+    is_suspicious = scores >= rules.suspicious_cutoff
+
+    # 4. Reasoning: only pay for string formatting where a human will read it
+    reasoning = [None] * n
+    if explain == "all":
+        rows = range(n)
+    elif explain == "suspicious":
+        rows = np.flatnonzero(is_suspicious).tolist()
+    else:
+        rows = []
+    for i in rows:
+        reasoning[i] = _format_reasoning(
+            scores[i].item(), str(actions[i]), z_scores[i].item(), mean_vals[i], std_vals[i],
+            bool(velocity[i]), last_loc_arr[i], loc_arr[i], hours[i].item(),
+            flow[i].item(), flow_cycles[i] if flow_cycles is not None else None,
+            structuring[i].item(), structuring_details[i] if structuring_details is not None else None
+        )
+
+    columns = {
+        'is_suspicious': is_suspicious,
+        'score': scores,
+        'action': actions,
+        'reasoning': reasoning
+    }
+    if with_signals:
+        columns['signals'] = signals
+    return columns
+
+def detect_behavioral_shift_many(transactions, baselines, explain="suspicious"):
+    """
+    Record-level adapter over detect_behavioral_shift_batch.
+    Takes lists of transaction/baseline dicts and returns one result dict per row.
+    """
+    if len(transactions) != len(baselines):
+        raise ValueError("transactions and baselines must have the same length")
+    if not transactions:
+        return []
+
+    columns = detect_behavioral_shift_batch(
+        amounts=[tx['amount'] for tx in transactions],
+        locs=[tx['loc'] for tx in transactions],
+        timestamps=[tx['timestamp'] for tx in transactions],
+        mean_amts=[b.get('mean_amt', 0) for b in baselines],
+        std_amts=[b.get('std_amt', 1) for b in baselines],
+        last_locs=[b['last_loc'] for b in baselines],
+        last_times=[b['last_time'] for b in baselines],
+        explain=explain,
+        flow_risks=[tx.get('flow_risk', 0.0) for tx in transactions],
+        flow_cycles=[tx.get('flow_cycle') for tx in transactions],
+        structuring_risks=[tx.get('structuring_risk', 0.0) for tx in transactions],
+        structuring_details=[tx.get('structuring_detail') for tx in transactions]
+    )
+    return [
+        {'is_suspicious': flag, 'score': score, 'action': action, 'reasoning': reason}
+        for flag, score, action, reason in zip(
+            columns['is_suspicious'].tolist(), columns['score'].tolist(),
+            columns['action'].tolist(), columns['reasoning']
+        )
+    ]
@@ -0,0 +1,77 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from gateway.admission import AdmissionController, Overloaded, PRIORITY, STANDARD
+from main import app
+
+def test_priority_lane_goes_first_and_standard_is_shed_past_the_slo():
+    async def scenario():
+        admission = AdmissionController(slots=1, slo_ms=50, queue_limits={STANDARD: 2})
+        assert await admission.acquire(STANDARD) == 0.0  # Free slot: straight in
+
+        order = []
+        async def request(lane, name):
+            try:
+                await admission.acquire(lane)
+            except Overloaded as e:
+                order.append((name, e.reason, e.retry_after))
+                return
+            order.append((name, "admitted"))
+            await asyncio.sleep(0.001)
+            admission.release(0.001)
+
+        standard = asyncio.create_task(request(STANDARD, "pos"))
+        await asyncio.sleep(0)
+        priority = asyncio.create_task(request(PRIORITY, "wire"))
+        await asyncio.sleep(0)
+        assert admission.queue_depth(STANDARD) == 1 and admission.queue_depth(PRIORITY) == 1
+
+        admission.release(0.01)
+        await asyncio.gather(priority, standard)
+        # The priority request overtook the standard one queued before it
+        assert order == [("wire", "admitted"), ("pos", "admitted")]
+
+        # Slot held: standard waiters are shed once they queue past the SLO (or find the queue full)
+        await admission.acquire(PRIORITY)
+        order.clear()
+        await asyncio.gather(*(request(STANDARD, f"pos{i}") for i in range(3)))
+        assert sorted(outcome[1] for outcome in order) == ["shed_full", "shed_slo", "shed_slo"]
+        assert all(outcome[2] >= 1 for outcome in order)
+        admission.release()
+        assert admission.in_flight == 0 and admission.queue_depth(STANDARD) == 0
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.counts[(STANDARD, "shed_slo")] == 2
+    assert admission.counts[(PRIORITY, "admitted")] == 2
+    assert 'sentinel_admission_total{lane="standard",outcome="shed_full"} 1' in admission.metric_lines()
+
+def test_pre_classification():
+    assert main._lane({"amount": 90, "loc": "Dubai"}) == STANDARD
+    assert main._lane({"amount": 1250000, "loc": "Dubai"}) == PRIORITY
+    assert main._lane({"amount": 90, "loc": "North Korea"}) == PRIORITY
+
+def test_overloaded_triage_returns_429_with_retry_after(monkeypatch):
+    # No free slots at all: a low-risk request waits out the SLO and is deferred
+    monkeypatch.setattr(main, "ADMISSION", AdmissionController(slots=0, slo_ms=20))
+    client = TestClient(app)
+    body = {"transaction": {"amount": 90, "loc": "Dubai", "timestamp": "2024-05-01T12:00:00"}}
+    response = client.post("/triage", json=body)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "standard" in response.json()["detail"]
+
+    assert client.get("/stats/admission").json()["lanes"]["standard"]["shed_slo"] == 1
+    metrics = client.get("/metrics").text
+    assert 'sentinel_admission_total{lane="standard",outcome="shed_slo"} 1' in metrics
+    assert "# TYPE sentinel_admission_wait_seconds histogram" in metrics
+
+def test_admitted_requests_record_queue_time_per_lane():
+    client = TestClient(app)
+    body = {"transaction": {"amount": 50000, "loc": "Dubai", "timestamp": "2024-05-01T12:00:00"}}
+    assert client.post("/triage", json=body).status_code == 200
+    metrics = client.get("/metrics").text
+    assert 'sentinel_admission_wait_seconds_count{lane="priority"}' in metrics
+    assert main.ADMISSION.in_flight == 0
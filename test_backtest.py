@@ -0,0 +1,68 @@
+import json
+from datetime import datetime
+
+from benchmarks.backtest import backtest, compare, main
+from generate_chaos import iter_chunks, write_chunks, parse_mix
+
+def _dataset(tmp_path, fmt="ndjson", rows=3000):
+    path = str(tmp_path / f"labelled.{fmt}")
+    chunks = iter_chunks(rows=rows, chunk_size=1000, seed=5, attack_rate=0.1, extended=True,
+                         start=datetime(2026, 1, 1), mix=parse_mix("impossible_travel=1,whale=1,round_trip=1"))
+    write_chunks(chunks, path, fmt)
+    return path
+
+def _counts(report):
+    return {key: report[key] for key in ("rows", "positives", "overall", "rules", "actions", "scenarios")}
+
+def test_sharded_replay_matches_in_process(tmp_path):
+    path = _dataset(tmp_path)
+    inline = backtest(path, processes=0, chunk_size=700)
+    pooled = backtest(path, processes=2, chunk_size=700)
+    assert _counts(pooled) == _counts(inline)
+
+    assert inline["rows"] == 3000
+    overall = inline["overall"]
+    assert overall["tp"] + overall["fp"] + overall["fn"] + overall["tn"] == 3000
+    assert overall["tp"] + overall["fn"] == inline["positives"]
+    # Every row lands in exactly one action tier
+    assert sum(tier["rows"] for tier in inline["actions"].values()) == 3000
+    assert inline["scenarios"]["impossible_travel"]["flag_rate"] == 1.0
+    assert inline["rules"]["circular_flow"]["tp"] > 0
+    assert set(inline["stages"]) == {"read", "flows", "structuring", "temporal", "evaluate"}
+    assert set(pooled["stages"]) == set(inline["stages"])
+
+def test_candidate_rules_and_triage_pipeline(tmp_path):
+    path = _dataset(tmp_path, "csv", rows=1000)
+    live = backtest(path, processes=0, patterns=False)
+    assert live["rules"]["circular_flow"]["tp"] == 0
+
+    candidate = tmp_path / "strict.yaml"
+    candidate.write_text(
+        "version: strict\n"
+        "signals: {z_score: {membership: ramp, from: 1.0, to: 5.0}, velocity: {membership: crisp}}\n"
+        "rules: [{name: velocity_only, weights: {velocity: 1.0}}]\n"
+        "actions: [{min: 0.9, action: AUTONOMOUS_FREEZE}, {default: MONITOR_INTENSELY}]\n"
+        "suspicious_cutoff: 0.9\n"
+    )
+    strict = backtest(path, processes=0, rules_path=str(candidate), pipeline="triage", limit=600)
+    assert strict["rows"] == 600 and strict["rules_version"] == "strict"
+    assert list(strict["rules"]) == ["velocity_only"]
+    assert set(strict["actions"]) == {"AUTONOMOUS_FREEZE", "MONITOR_INTENSELY"}
+    assert strict["compliance"]["checked"] == strict["overall"]["tp"] + strict["overall"]["fp"]
+
+    delta = compare(strict, live)
+    assert delta["rules_changed"] == {"added": ["velocity_only"], "removed": ["behavioral_shift", "circular_flow", "structuring"]}
+    assert delta["actions_changed"]["removed"] == ["SOFT_RESTRICTION"]
+    assert set(delta["actions"]) == {"AUTONOMOUS_FREEZE", "MONITOR_INTENSELY"}
+
+def test_cli_report_on_the_chaos_dataset(tmp_path, capsys):
+    out = tmp_path / "run.json"
+    main(["--dataset", "chaos", "--processes", "0", "--out", str(out)])
+    report = json.loads(out.read_text())
+    assert report["rows"] == 2000 and report["positives"] > 0
+    assert report["config"]["pipeline"] == "temporal"
+
+    delta = compare(report, dict(report, rows_per_s=report["rows_per_s"] / 2))
+    assert delta["recall"] == 0.0 and delta["rows_per_s_pct"] == 100.0
+    assert set(delta["rules"]) == set(report["rules"]) and "rules_changed" not in delta
+    assert all(change.get("f1", 0.0) == 0.0 for change in delta["actions"].values())
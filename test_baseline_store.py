@@ -0,0 +1,61 @@
+from skills.temporal_analyst.baseline_store import BaselineStore
+import numpy as np
+import multiprocessing
+
+# Mock Data
+amounts = [120.0, 80.0, 100.0, 140.0, 60.0]
+prior = {"mean_amt": 500, "std_amt": 200, "last_loc": "Dubai", "last_time": "2024-01-01T00:00:00"}
+
+def test_welford_matches_numpy():
+    store = BaselineStore(initial_capacity=1)
+    for i, amt in enumerate(amounts):
+        store.update("user_8842", amt, "Dubai", f"2026-02-04T1{i}:00:00")
+
+    baseline = store.get("user_8842")
+    assert np.isclose(baseline["mean_amt"], np.mean(amounts))
+    assert np.isclose(baseline["std_amt"], np.std(amounts, ddof=1))
+    assert baseline["last_time"] == "2026-02-04T14:00:00"
+    assert baseline["samples"] == len(amounts)
+
+def test_prior_until_min_samples():
+    store = BaselineStore(min_samples=2)
+    assert store.get("user_1", prior) is prior
+
+    store.update("user_1", 90.0, "London", "2026-02-04T12:00:00+04:00")
+    baseline = store.get("user_1", prior)
+    assert baseline["mean_amt"] == 500
+    assert baseline["last_loc"] == "London"
+    assert baseline["last_time"] == "2026-02-04T08:00:00+00:00"
+
+def test_grows_past_initial_capacity():
+    store = BaselineStore(initial_capacity=2)
+    for i in range(10):
+        store.update(f"user_{i}", 100.0 + i, "Dubai", "2026-02-04T12:00:00")
+    assert len(store) == 10
+    assert store.get("user_9")["mean_amt"] == 109.0
+
+def _worker_updates(state_dir, offset, n):
+    store = BaselineStore(initial_capacity=8, state_dir=state_dir)
+    for i in range(n):
+        store.update("user_shared", amounts[(offset + i) % len(amounts)], "London", f"2026-02-04T12:00:{offset:02d}")
+        store.update(f"user_{offset}_{i}", 100.0, "Dubai", "2026-02-04T12:00:00")
+
+def test_workers_share_one_baseline_per_user(tmp_path):
+    state_dir = str(tmp_path)
+    store = BaselineStore(initial_capacity=8, state_dir=state_dir)
+    store.update("user_shared", 1000.0, "Dubai", "2026-02-04T11:00:00")
+
+    # Two workers fold into the same user while growing the table under each other
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_worker_updates, args=(state_dir, offset, 200)) for offset in (0, 1)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    seen = [1000.0] + [amounts[(offset + i) % len(amounts)] for offset in (0, 1) for i in range(200)]
+    baseline = store.get("user_shared")
+    assert baseline["samples"] == 401 and len(store) == 401
+    assert np.isclose(baseline["mean_amt"], np.mean(seen)) and np.isclose(baseline["std_amt"], np.std(seen, ddof=1))
+    assert baseline["last_loc"] == "London"
+    assert BaselineStore(state_dir=state_dir).get("user_1_199")["mean_amt"] == 100.0
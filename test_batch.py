@@ -0,0 +1,126 @@
+from skills.temporal_analyst.temporal_engine import (
+    detect_behavioral_shift, detect_behavioral_shift_batch, detect_behavioral_shift_many
+)
+from datetime import datetime, timedelta
+
+# Mock Data
+dp_iso = datetime(2023, 10, 27, 10, 0, 0).isoformat()
+baseline = {
+    'mean_amt': 100,
+    'std_amt': 20.0,
+    'last_loc': 'Dubai',
+    'last_time': dp_iso
+}
+
+transactions = [
+    {'amount': 110.0, 'loc': 'Dubai', 'timestamp': datetime(2023, 10, 27, 11, 0, 0).isoformat()},      # Normal
+    {'amount': 5000.0, 'loc': 'Dubai', 'timestamp': datetime(2023, 10, 27, 12, 0, 0).isoformat()},     # Spike
+    {'amount': 100.0, 'loc': 'London', 'timestamp': datetime(2023, 10, 27, 11, 0, 0).isoformat()},     # Travel
+    {'amount': 190, 'loc': 'London', 'timestamp': datetime(2023, 10, 27, 11, 30, 0).isoformat()},      # Travel + Drift
+    {'amount': 90.0, 'loc': 'Iran', 'timestamp': (datetime(2023, 10, 27, 10) + timedelta(days=2)).isoformat()},
+]
+
+def test_batch_matches_scalar():
+    baselines = [baseline] * len(transactions)
+    expected = [detect_behavioral_shift(tx, baseline) for tx in transactions]
+    assert detect_behavioral_shift_many(transactions, baselines, explain="all") == expected
+
+def test_batch_reasoning_only_for_suspicious_rows():
+    columns = detect_behavioral_shift_batch(
+        amounts=[tx['amount'] for tx in transactions],
+        locs=[tx['loc'] for tx in transactions],
+        timestamps=[tx['timestamp'] for tx in transactions],
+        mean_amts=[baseline['mean_amt']] * len(transactions),
+        std_amts=[baseline['std_amt']] * len(transactions),
+        last_locs=[baseline['last_loc']] * len(transactions),
+        last_times=[baseline['last_time']] * len(transactions),
+    )
+    for i, tx in enumerate(transactions):
+        expected = detect_behavioral_shift(tx, baseline)
+        assert columns['score'][i] == expected['score']
+        assert columns['action'][i] == expected['action']
+        assert columns['reasoning'][i] == (expected['reasoning'] if expected['is_suspicious'] else None)
+
+def test_batch_parses_utc_offsets():
+    tx = {'amount': 100.0, 'loc': 'London', 'timestamp': '2023-10-27T11:00:00+00:00'}
+    base = dict(baseline, last_time='2023-10-27T12:00:00+02:00')
+    assert detect_behavioral_shift_many([tx], [base], explain="all") == [detect_behavioral_shift(tx, base)]
+
+def test_batch_empty():
+    assert detect_behavioral_shift_many([], []) == []
+
+def test_triage_batch_endpoint(monkeypatch):
+    import random
+    from fastapi.testclient import TestClient
+    from main import app
+
+    monkeypatch.setattr(random, "random", lambda: 0.5)  # No random demo hits
+    monkeypatch.setattr(random, "choice", lambda options: options[0])  # Same scenario for the sanctioned row
+    client = TestClient(app)
+    items = [{"transaction": tx, "user_baseline": baseline} for tx in transactions]
+    response = client.post("/triage/batch", json={"items": items})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["count"] == len(transactions)
+    assert [r["evidence"]["timestamp"] for r in body["results"]] == [tx["timestamp"] for tx in transactions]
+
+    # Same verdicts, reasoning and audit trail as one-at-a-time /triage, flagged or not
+    for item, batched in zip(items, body["results"]):
+        single = client.post("/triage", json=item).json()
+        assert batched["temporal_result"] == single["temporal_result"]
+        assert batched["audit_trail"][1:] == single["audit_trail"][1:]
+        assert "None" not in " ".join(batched["audit_trail"])
+
+def test_triage_batch_reports_a_bad_row_without_failing_the_rest():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    rows = [transactions[0], dict(transactions[1], timestamp="not-a-time"), transactions[2]]
+    response = client.post("/triage/batch", json={"items": [{"transaction": tx, "user_baseline": baseline} for tx in rows]})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["count"] == 3 and body["errors"] == 1
+    assert body["results"][1]["error"].startswith("Triage Engine Error")
+    assert [r["evidence"]["timestamp"] for r in body["results"][::2]] == [rows[0]["timestamp"], rows[2]["timestamp"]]
+
+def test_micro_batcher_resolves_each_caller():
+    from gateway.micro_batch import MicroBatcher
+    from concurrent.futures import ThreadPoolExecutor
+    from skills.temporal_analyst.temporal_engine import detect_behavioral_shift_many
+
+    batcher = MicroBatcher(detect_behavioral_shift_many, max_wait_ms=20, max_items=8, processes=1)
+    try:
+        with ThreadPoolExecutor(len(transactions)) as pool:
+            futures = list(pool.map(lambda tx: batcher.submit(tx, baseline), transactions))
+        results = [future.result(timeout=60) for future in futures]
+        assert [r['score'] for r in results] == [detect_behavioral_shift(tx, baseline)['score'] for tx in transactions]
+
+        stats = batcher.stats()
+        assert stats["items"] == len(transactions) and stats["batches"] < len(transactions)
+    finally:
+        batcher.shutdown()
+
+def test_micro_batcher_isolates_a_bad_transaction_and_keeps_stage_timings():
+    import pytest
+    from gateway.micro_batch import MicroBatcher
+    from gateway.metrics import STAGE_SECONDS
+    from concurrent.futures import ThreadPoolExecutor
+    from skills.orchestrator.langgraph_logic import run_triage_batch
+
+    items = transactions[:3] + [dict(transactions[0], timestamp="not-a-time")]
+    before = STAGE_SECONDS.snapshot()
+    batcher = MicroBatcher(run_triage_batch, max_wait_ms=200, max_items=8, processes=1)
+    try:
+        with ThreadPoolExecutor(len(items)) as pool:
+            futures = list(pool.map(lambda tx: batcher.submit(tx, baseline), items))
+        good = [future.result(timeout=60) for future in futures[:3]]
+        assert [r['temporal_result']['score'] for r in good] == [detect_behavioral_shift(tx, baseline)['score'] for tx in items[:3]]
+        with pytest.raises(ValueError):
+            futures[3].result(timeout=60)
+    finally:
+        batcher.shutdown()
+    # Timings recorded inside the pool show up in this process
+    assert "temporal_batch" in STAGE_SECONDS.delta(before)
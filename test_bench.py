@@ -0,0 +1,29 @@
+import json
+import asyncio
+
+from benchmarks.bench_triage import load_payloads, benchmark, compare, main, DATASETS
+
+def test_payloads_follow_the_stress_test_mapping():
+    attack = load_payloads(DATASETS["attack"])
+    assert attack[0]["user_baseline"]["std_amt"] > 0
+    assert attack[0]["transaction"]["type"]
+    chaos = load_payloads(DATASETS["chaos"])
+    assert chaos[0]["user_baseline"] == {}
+
+def test_closed_and_open_loop_in_process():
+    payloads = load_payloads(DATASETS["chaos"])[:50]
+    closed = asyncio.run(benchmark(payloads, "closed", concurrency=4, requests=40, warmup=4))
+    assert closed["ok"] == 40 and closed["errors"] == 0
+    assert set(closed["latency_ms"]) >= {"p50", "p95", "p99", "p999"}
+
+    opened = asyncio.run(benchmark(payloads, "open", rate=200, duration=0.2, warmup=0))
+    assert opened["requests"] == 40
+
+def test_report_is_json_and_comparable(tmp_path, capsys):
+    out = tmp_path / "run.json"
+    main(["--dataset", "chaos", "--requests", "20", "--concurrency", "2", "--warmup", "0", "--out", str(out)])
+    report = json.loads(out.read_text())
+    assert report["config"]["transport"] == "asgi"
+
+    delta = compare(report, dict(report, throughput_rps=report["throughput_rps"] / 2))
+    assert delta["throughput_rps"] == 100.0
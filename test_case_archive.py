@@ -0,0 +1,164 @@
+import time
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from gateway.case_archive import CaseArchive
+from gateway.shared_state import CaseJournal
+
+TYPES = ["STRUCTURING", "SANCTIONS", "WHALE_ALERT", "VELOCITY"]
+
+def _case(i):
+    return {
+        "id": f"CASE-{i:03d}", "timestamp": f"2024-05-01T{i % 24:02d}:{i % 60:02d}:00",
+        "amount": 1000.0 + (i * 37) % 5000, "type": TYPES[i % 4], "ip": f"10.0.0.{i % 7}",
+        "loc": "Dubai", "score": round((i % 100) / 100, 2), "action": "AUTONOMOUS_FREEZE", "reason": "test"
+    }
+
+def test_group_commit_and_filters(tmp_path):
+    archive = CaseArchive(str(tmp_path / "cases.db"))
+    for i in range(1, 2001):
+        archive.append(_case(i))
+    assert archive.flush()
+    assert archive.count() == 2000
+    # Bursts share transactions
+    assert archive.batches < 2000
+
+    cases, _ = archive.query(type="SANCTIONS", ip="10.0.0.3", limit=1000)
+    expected = [i for i in range(1, 2001) if i % 4 == 1 and i % 7 == 3]
+    assert [case["id"] for case in cases] == [f"CASE-{i:03d}" for i in reversed(expected)]
+
+    cases, _ = archive.query(min_amount=5900, sort="amount", order="asc", limit=1000)
+    assert cases and all(case["amount"] >= 5900 for case in cases)
+    assert [case["amount"] for case in cases] == sorted(case["amount"] for case in cases)
+
+    cases, _ = archive.query(start="2024-05-01T05:00:00", end="2024-05-01T06:00:00", limit=1000)
+    assert cases and all(case["timestamp"].startswith("2024-05-01T05") for case in cases)
+
+def test_keyset_pagination_covers_everything_once(tmp_path):
+    archive = CaseArchive(str(tmp_path / "cases.db"))
+    archive.append_many([_case(i) for i in range(1, 501)])
+    archive.flush()
+    for sort, order in [("archive_id", "desc"), ("amount", "asc"), ("amount", "desc"), ("timestamp", "asc")]:
+        seen, cursor = [], None
+        while True:
+            page, cursor = archive.query(sort=sort, order=order, limit=37, cursor=cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+        assert sorted(case["archive_id"] for case in seen) == list(range(1, 501))
+        if sort != "archive_id":
+            keys = [(case[sort], case["archive_id"]) for case in seen]
+            assert keys == sorted(keys, reverse=order == "desc")
+
+    with pytest.raises(ValueError):
+        archive.query(sort="reason")
+    with pytest.raises(ValueError):
+        archive.query(cursor="not-a-cursor")
+
+def test_archive_survives_journal_reset_and_restart(tmp_path):
+    path = str(tmp_path / "cases.db")
+    journal = CaseJournal(state_dir=str(tmp_path))
+    archive = CaseArchive(path)
+    journal.add_sink(archive)
+    fresh = lambda i: {k: v for k, v in _case(i).items() if k != "id"}
+    journal.append_many([fresh(i) for i in range(1, 11)])
+    journal.reset()
+    journal.append(fresh(11))
+    archive.flush()
+    archive.close()
+
+    reopened = CaseArchive(path)
+    assert journal.count() == 1 and reopened.count() == 11
+    # Ids restart with the journal; the archive keeps both generations apart by archive_id
+    assert len(reopened.query(case_id="CASE-001")[0]) == 2
+
+def test_failed_batches_are_retried_and_bad_cases_isolated(tmp_path, caplog):
+    import sqlite3
+    path = str(tmp_path / "cases.db")
+    archive = CaseArchive(path, retry_delay=0.05, busy_timeout=0.05)
+    admin = sqlite3.connect(path, isolation_level=None)
+    # Another writer holds the lock: the batch waits and is retried until it is released
+    admin.execute("BEGIN EXCLUSIVE")
+    archive.append_many([_case(i) for i in range(1, 6)])
+    deadline = time.time() + 10
+    while archive.retries == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert archive.retries >= 1 and archive.pending == 5
+    admin.execute("COMMIT")
+    assert archive.flush()
+    assert archive.count() == 5 and archive.dropped == 0
+
+    # A case SQLite rejects is dropped on its own, the rest of its batch lands
+    admin.execute("CREATE TRIGGER no_666 BEFORE INSERT ON cases WHEN NEW.amount = 666 BEGIN SELECT RAISE(ABORT, 'bad amount'); END")
+    archive.append_many([_case(6), dict(_case(7), amount=666), _case(8)])
+    assert archive.flush()
+    assert archive.count() == 7 and archive.dropped == 1
+    assert "CASE-007 rejected" in caplog.text and "retrying" in caplog.text
+    archive.close()
+
+def test_permanent_errors_and_a_full_queue_drop_instead_of_stalling(tmp_path, caplog):
+    import sqlite3
+    path = str(tmp_path / "cases.db")
+    archive = CaseArchive(path, retry_delay=0.01, busy_timeout=0.01, max_retries=2, max_pending=4)
+    admin = sqlite3.connect(path, isolation_level=None)
+    # No such table: never retried
+    admin.execute("ALTER TABLE cases RENAME TO cases_away")
+    archive.append_many([_case(i) for i in range(1, 4)])
+    assert archive.flush(timeout=5)
+    assert archive.dropped == 3 and archive.retries == 0
+    admin.execute("ALTER TABLE cases_away RENAME TO cases")
+
+    # Locked for good: a few retries, then the batch is dropped
+    admin.execute("BEGIN EXCLUSIVE")
+    archive.append_many([_case(i) for i in range(4, 10)])
+    assert archive.flush(timeout=5)
+    admin.execute("COMMIT")
+    assert archive.retries == 2 and archive.dropped == 3 + 6
+    # Only max_pending of those 6 were queued at all
+    assert "dropping new cases" in caplog.text and "giving up after 3 attempts" in caplog.text
+    archive.close()
+
+def test_older_archive_schema_is_migrated(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "cases.db")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE cases (archive_id INTEGER PRIMARY KEY, case_id TEXT, run TEXT, archived REAL,"
+                " timestamp TEXT, amount REAL, type TEXT, ip TEXT, reason TEXT, payload TEXT)")
+    old.execute("INSERT INTO cases (case_id, payload) VALUES ('CASE-001', '{}')")
+    old.commit()
+    old.close()
+
+    archive = CaseArchive(path)
+    archive.append(_case(2))
+    assert archive.flush() and archive.dropped == 0
+    assert [case["id"] for case in archive.query(loc="Dubai")[0]] == ["CASE-002"]
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == 2
+
+    sqlite3.connect(path, isolation_level=None).execute("PRAGMA user_version = 99")
+    with pytest.raises(ValueError):
+        CaseArchive(path)
+
+def test_cases_endpoint(monkeypatch):
+    from main import app, ARCHIVE
+
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    client = TestClient(app)
+    ip = f"203.0.113.{int(time.time() * 1000) % 250}"
+    client.post("/reset")
+    for amount in (40000, 60000, 80000):
+        tx = {"amount": amount, "loc": "London", "timestamp": "2024-05-01T12:00:00", "ip_address": ip}
+        baseline = {"mean_amt": 100, "std_amt": 10, "last_loc": "Dubai", "last_time": "2024-05-01T11:30:00"}
+        client.post("/triage", json={"transaction": tx, "user_baseline": baseline})
+    ARCHIVE.flush()
+
+    page = client.get("/cases", params={"ip": ip, "sort": "amount", "limit": 2}).json()
+    assert [case["amount"] for case in page["cases"]] == [80000, 60000]
+    rest = client.get("/cases", params={"ip": ip, "sort": "amount", "limit": 2, "cursor": page["next"]}).json()
+    assert [case["amount"] for case in rest["cases"]] == [40000] and rest["next"] is None
+
+    # /reset clears the live journal, not the archive
+    client.post("/reset")
+    assert client.get("/cases", params={"ip": ip}).json()["count"] == 3
+    assert client.get("/cases", params={"sort": "reason"}).status_code == 400
@@ -0,0 +1,54 @@
+from gateway.shared_state import CaseJournal
+from gateway.case_export import csv_chunks, arrow_chunks, parquet_chunks
+import csv
+import io
+import pytest
+
+# Mock Data
+cases = [
+    {"timestamp": "2026-02-04T12:00:00", "amount": 9500 + i, "type": "STRUCTURING",
+     "reason": "CRITICAL: High-Freq Structuring (<$10k) | Z:3.12 | Fuzzy Score: 0.88", "ip": "192.168.1.5"}
+    for i in range(25)
+]
+
+def _journal(tmp_path):
+    journal = CaseJournal(state_dir=str(tmp_path))
+    journal.append_many([dict(case) for case in cases])
+    return journal
+
+def test_csv_export_streams_in_chunks(tmp_path):
+    chunks = list(csv_chunks(_journal(tmp_path).iter_chunks(chunk_size=10, block_size=512)))
+    assert len(chunks) == 3
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [row["id"] for row in rows] == [f"CASE-{i:03d}" for i in range(1, 26)]
+    assert rows[-1]["amount"] == "9524"
+
+def test_columnar_exports_round_trip(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    journal = _journal(tmp_path)
+    table = pa.ipc.open_stream(b"".join(arrow_chunks(journal.iter_chunks(chunk_size=10)))).read_all()
+    assert table.num_rows == 25 and table.column("amount")[0].as_py() == 9500.0
+
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(parquet_chunks(journal.iter_chunks(chunk_size=10)))))
+    assert parquet.metadata.num_rows == 25 and parquet.num_row_groups == 3
+
+def test_flagged_case_exports_score_action_and_flags(tmp_path):
+    journal = CaseJournal(state_dir=str(tmp_path))
+    journal.append_many([
+        dict(cases[0], loc="Iran", score=0.97, action="AUTONOMOUS_FREEZE",
+             flags=["SANCTIONED_JURISDICTION: Iran", "REPORTING_THRESHOLD: 9500 >= 10000"]),
+        dict(cases[1])
+    ])
+    rows = list(csv.DictReader(io.StringIO(b"".join(csv_chunks(journal.iter_chunks())).decode())))
+    assert rows[0]["score"] == "0.97" and rows[0]["action"] == "AUTONOMOUS_FREEZE" and rows[0]["loc"] == "Iran"
+    assert rows[0]["flags"] == "SANCTIONED_JURISDICTION: Iran; REPORTING_THRESHOLD: 9500 >= 10000"
+    assert rows[1]["score"] == "" and rows[1]["flags"] == ""
+
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(b"".join(arrow_chunks(journal.iter_chunks()))).read_all()
+    first = table.to_pylist()[0]
+    assert first["score"] == 0.97 and first["action"] == "AUTONOMOUS_FREEZE"
+    assert first["flags"] == ["SANCTIONED_JURISDICTION: Iran", "REPORTING_THRESHOLD: 9500 >= 10000"]
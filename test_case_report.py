@@ -0,0 +1,42 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from main import app, _render_report
+
+client = TestClient(app)
+
+def _flag(monkeypatch):
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    body = {
+        "transaction": {"amount": 90000, "loc": "London", "timestamp": "2024-05-01T12:00:00", "ip_address": "45.33.22.9"},
+        "user_baseline": {"mean_amt": 100, "std_amt": 10, "last_loc": "Dubai", "last_time": "2024-05-01T11:30:00"}
+    }
+    return client.post("/triage", json=body).json()
+
+def test_triage_response_carries_no_rendered_narrative(monkeypatch):
+    result = _flag(monkeypatch)
+    assert result["is_suspicious"] and result["summary"] == ""
+    assert result["report_url"].startswith("/cases/CASE-")
+
+def test_report_is_rendered_on_demand_and_memoized(monkeypatch):
+    url = _flag(monkeypatch)["report_url"]
+    before = _render_report.cache_info()
+    first = client.get(url).json()
+    assert "Investigation Report" in first["report"]
+    assert "SENTINEL-NODE X INVESTIGATION REPORT" in first["report"]
+    assert "WATCHLIST_IP: 45.33.22.9" in first["report"]
+    assert first["sar"].endswith("/sar")
+
+    markdown = client.get(url, params={"format": "markdown"})
+    assert markdown.headers["content-type"].startswith("text/markdown")
+    assert markdown.text == first["report"]
+    after = _render_report.cache_info()
+    assert after.misses == before.misses + 1 and after.hits == before.hits + 1
+
+def test_unknown_and_reset_cases_are_404(monkeypatch):
+    url = _flag(monkeypatch)["report_url"]
+    client.get(url)
+    client.post("/reset")
+    assert client.get(url).status_code == 404
+    assert client.get("/cases/CASE-999999/report").status_code == 404
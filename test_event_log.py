@@ -0,0 +1,93 @@
+import json
+import time
+import random
+
+from fastapi.testclient import TestClient
+
+from gateway.event_log import EventLog, parse_rates
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_records_are_batched_to_json_lines(tmp_path):
+    log = EventLog(str(tmp_path / "events.jsonl"), flush_interval=60)
+    for i in range(100):
+        assert log.log("suspicious", "case_flagged", case={"id": f"CASE-{i:03d}", "amount": 9500.5})
+    assert log.pending == 100
+    log.flush()
+    records = _records(tmp_path / "events.jsonl")
+    assert len(records) == 100 and log.pending == 0
+    assert records[-1]["cat"] == "suspicious" and records[-1]["case"]["id"] == "CASE-099"
+    assert log.counts[("*", "written")] == 100
+
+def test_sampling_rate_limits_and_bounded_queue(tmp_path):
+    log = EventLog(str(tmp_path / "events.jsonl"), sampling=parse_rates("debug=0.1,noise=0"),
+                   rate_limits=parse_rates("burst=20"), queue_size=50, flush_interval=60)
+    log._start = lambda: None  # Writer stalled
+    kept = sum(log.log("debug", "incoming") for _ in range(5000))
+    assert 300 < kept < 700
+    assert not log.log("noise", "x") and not log.enabled("noise")
+    # Token bucket: a burst gets its capacity, then is throttled
+    assert sum(log.log("burst", "x") for _ in range(1000)) <= 25
+    assert log.counts[("burst", "rate_limited")] >= 975
+    # Queue full: oldest records go, the caller never blocks
+    assert log.pending == 50 and log.counts[("debug", "dropped")] > 0
+
+def test_rotation_keeps_n_backups(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), max_bytes=2000, backups=2, flush_interval=60)
+    for i in range(30):
+        for _ in range(10):
+            log.log("suspicious", "case_flagged", n=i, pad="x" * 50)
+        log.flush()
+    assert path.with_name("events.jsonl.1").exists() and path.with_name("events.jsonl.2").exists()
+    assert not path.with_name("events.jsonl.3").exists()
+    assert all(p.stat().st_size < 4000 for p in tmp_path.iterdir())
+
+def test_background_writer_and_hot_path_cost(tmp_path):
+    log = EventLog(str(tmp_path / "events.jsonl"), flush_interval=0.05)
+    start = time.perf_counter()
+    for i in range(10000):
+        log.log("suspicious", "case_flagged", n=i)
+    assert (time.perf_counter() - start) / 10000 < 50e-6
+    deadline = time.time() + 5
+    while log.counts.get(("*", "written"), 0) < 10000 and time.time() < deadline:
+        time.sleep(0.05)
+    assert len(_records(tmp_path / "events.jsonl")) == 10000
+
+def test_flagged_triage_is_logged(monkeypatch):
+    from main import app, EVENTS
+
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    ip = f"198.51.100.{int(time.time() * 1000) % 250}"
+    body = {
+        "transaction": {"amount": 90000, "loc": "London", "timestamp": "2024-05-01T12:00:00", "ip_address": ip},
+        "user_baseline": {"mean_amt": 100, "std_amt": 10, "last_loc": "Dubai", "last_time": "2024-05-01T11:30:00"}
+    }
+    case_id = TestClient(app).post("/triage", params={"view": "compact"}, json=body).json()["case_id"]
+    EVENTS.flush()
+    flagged = [r for r in _records(EVENTS.path) if r["event"] == "case_flagged" and r["case"]["ip"] == ip]
+    assert flagged[-1]["case"]["id"] == case_id
+    assert 'sentinel_log_records_total{category="suspicious",outcome="queued"}' in TestClient(app).get("/metrics").text
+
+def test_counts_and_buckets_hold_up_under_threads(tmp_path):
+    import sys
+    import threading
+
+    log = EventLog(str(tmp_path / "events.jsonl"), rate_limits={"x": 1000}, queue_size=1 << 20, flush_interval=60)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+    started = time.monotonic()
+    try:
+        threads = [threading.Thread(target=lambda: [log.log("x", "e") for _ in range(2000)]) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    elapsed = time.monotonic() - started
+    assert log.counts[("x", "queued")] + log.counts.get(("x", "rate_limited"), 0) == 16000
+    # Never more than the burst plus what refilled meanwhile
+    assert log.counts[("x", "queued")] <= 1000 + elapsed * 1000 + 1
@@ -0,0 +1,83 @@
+import time
+import random
+
+from fastapi.testclient import TestClient
+
+from skills.temporal_analyst.flow_graph import CircularFlowDetector
+from skills.temporal_analyst.temporal_engine import (
+    calculate_fuzzy_risk, detect_behavioral_shift, detect_behavioral_shift_many
+)
+
+def test_detects_two_three_and_four_cycles():
+    flows = CircularFlowDetector()
+    assert flows.observe("A", "B", 50000, 0) == (0.0, None)
+    risk, cycle = flows.observe("B", "A", 48500, 60)
+    assert cycle == ["B", "A", "B"] and risk == 0.97
+
+    flows.observe("C", "D", 20000, 100)
+    flows.observe("D", "E", 20000, 110)
+    risk, cycle = flows.observe("E", "C", 19000, 120)
+    assert cycle == ["E", "C", "D", "E"] and risk == round(0.85 * 0.95, 4)
+
+    for u, v in [("P", "Q"), ("Q", "R"), ("R", "S")]:
+        flows.observe(u, v, 10000, 200)
+    risk, cycle = flows.observe("S", "P", 10000, 210)
+    assert cycle == ["S", "P", "Q", "R", "S"] and risk == 0.7
+
+def test_small_or_lopsided_loops_and_expired_edges_score_low():
+    flows = CircularFlowDetector(window_seconds=3600, min_amount=1000)
+    flows.observe("A", "B", 50, 0)
+    assert flows.observe("B", "A", 50, 10) == (0.0, None)
+
+    flows.observe("C", "D", 100000, 0)
+    assert flows.observe("D", "C", 10000, 10)[0] == 0.1
+
+    flows.observe("E", "F", 5000, 0)
+    assert flows.observe("F", "E", 5000, 7200) == (0.0, None)
+    assert flows.edge_count <= 6
+
+def test_update_cost_is_bounded_by_fanout():
+    flows = CircularFlowDetector(max_fanout=32)
+    # A hub paying thousands of accounts only ever keeps 32 neighbours
+    for i in range(5000):
+        flows.observe("HUB", f"U{i}", 2000, i)
+        flows.observe(f"U{i}", f"V{i % 50}", 2000, i)
+    assert len(flows._out["HUB"]) == 32
+    start = time.perf_counter()
+    for i in range(1000):
+        flows.observe(f"V{i % 50}", "HUB", 2000, 6000 + i)
+    assert (time.perf_counter() - start) / 1000 < 2e-3
+
+def test_flow_risk_is_a_fuzzy_or():
+    assert calculate_fuzzy_risk(0.5, False) == calculate_fuzzy_risk(0.5, False, 0.0) == (0.0, "MONITOR_INTENSELY")
+    assert calculate_fuzzy_risk(0.5, False, 0.97) == (0.97, "AUTONOMOUS_FREEZE")
+    assert calculate_fuzzy_risk(9.0, True, 0.2) == (1.0, "AUTONOMOUS_FREEZE")
+
+def test_batch_matches_scalar_with_flow_inputs():
+    rng = random.Random(3)
+    txs, bases = [], []
+    for i in range(500):
+        tx = {"amount": rng.uniform(10, 500), "loc": "Dubai", "timestamp": "2024-05-01T12:00:00"}
+        if i % 3 == 0:
+            tx["flow_risk"] = rng.choice([0.35, 0.6, 0.7, 0.85, 0.97, 1.0])
+            tx["flow_cycle"] = ["A", "B", "A"]
+        txs.append(tx)
+        bases.append({"mean_amt": 100.0, "std_amt": 50.0, "last_loc": "Dubai", "last_time": "2024-05-01T10:00:00"})
+    for tx, base, row in zip(txs, bases, detect_behavioral_shift_many(txs, bases, explain="all")):
+        assert row == detect_behavioral_shift(tx, base)
+    assert "Circular Flow (A->B->A)" in detect_behavioral_shift(txs[0], bases[0])["reasoning"]
+
+def test_triage_flags_round_trip_between_accounts(monkeypatch):
+    from main import app, FLOWS
+
+    # Keep the 5% demo override out of the way
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    FLOWS.reset()
+    client = TestClient(app)
+    baseline = {"mean_amt": 60000, "std_amt": 20000, "last_loc": "Dubai", "last_time": "2024-05-01T00:00:00"}
+    out = {"amount": 75000, "loc": "Dubai", "timestamp": "2024-05-01T10:00:00", "user_id": "acct-1", "counterparty": "acct-2"}
+    back = {"amount": 73500, "loc": "Dubai", "timestamp": "2024-05-01T10:20:00", "user_id": "acct-2", "counterparty": "acct-1"}
+    client.post("/triage", json={"transaction": out, "user_baseline": baseline})
+    result = client.post("/triage", json={"transaction": back, "user_baseline": baseline}).json()
+    assert result["is_suspicious"]
+    assert "Circular Flow (acct-2->acct-1->acct-2)" in result["temporal_result"]["reasoning"]
@@ -0,0 +1,108 @@
+import os
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from skills.temporal_analyst import temporal_engine
+from skills.temporal_analyst.fuzzy_rules import FUZZY_RULES, RULES_YAML, FuzzyRuleEngine, RuleError, load_rules
+from main import app
+
+def _legacy(z_score, velocity, flow_risk, structuring_risk):
+    # The hard-coded inference rules.yaml replaced
+    z_risk = min(1.0, max(0.0, (z_score - 1.0) / 4.0))
+    score = max((z_risk * 0.4) + ((1.0 if velocity else 0.0) * 0.6), flow_risk, structuring_risk)
+    action = "AUTONOMOUS_FREEZE" if score >= 0.85 else "SOFT_RESTRICTION" if score >= 0.6 else "MONITOR_INTENSELY"
+    return score, action
+
+def test_shipped_rules_reproduce_the_legacy_engine_exactly():
+    rules = load_rules(RULES_YAML)
+    rng = random.Random(7)
+    rows = [(rng.uniform(0, 8), rng.random() < 0.5, rng.choice([0.0, rng.random()]), rng.choice([0.0, rng.random()]))
+            for _ in range(2000)]
+    rows += [(5.0, False, 0.0, 0.0), (1.0, True, 0.0, 0.0), (3.0, False, 0.6, 0.0), (0.0, False, 0.0, 0.85)]
+    for z, vel, flow, structuring in rows:
+        expected = _legacy(z, vel, flow, structuring)
+        score = rules.score({"z_score": z, "velocity": vel, "flow_risk": flow, "structuring_risk": structuring})
+        assert (score, rules.action(score)) == expected
+        assert temporal_engine.calculate_fuzzy_risk(z, vel, flow, structuring) == (round(expected[0], 2), expected[1])
+
+    z, vel, flow, structuring = (np.array(col) for col in zip(*rows))
+    scores = rules.score_batch({"z_score": z, "velocity": vel, "flow_risk": flow, "structuring_risk": structuring}, len(rows))
+    assert scores.tolist() == [_legacy(*row)[0] for row in rows]
+    assert rules.actions(scores).tolist() == [_legacy(*row)[1] for row in rows]
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))  # Make sure the mtime moves
+
+RULES = """
+version: "{version}"
+signals:
+  z_score:  {{membership: ramp, from: 1.0, to: 5.0}}
+  velocity: {{membership: crisp}}
+  night:    {{membership: crisp}}
+rules:
+  - {{name: behavioral_shift, weights: {{z_score: 0.4, velocity: 0.6}}}}
+  - {{name: night_velocity, weights: {{velocity: {night_weight}, night: 0.5}}}}
+actions:
+  - {{min: {freeze}, action: AUTONOMOUS_FREEZE}}
+  - {{default: MONITOR_INTENSELY}}
+suspicious_cutoff: 0.5
+"""
+
+def test_rules_hot_swap_and_new_signals_need_no_code(tmp_path, caplog):
+    path = str(tmp_path / "rules.yaml")
+    _write(path, RULES.format(version="a", night_weight=0.1, freeze=0.9))
+    engine = FuzzyRuleEngine(path, check_interval=0.0)
+    signals = {"z_score": 1.0, "velocity": True, "night": True}
+    assert engine.rules.score(signals) == 0.6
+    assert engine.rules.action(0.6) == "MONITOR_INTENSELY"
+
+    # An edited file is picked up on the next check, no restart
+    _write(path, RULES.format(version="b", night_weight=0.5, freeze=0.95))
+    rules = engine.rules
+    assert rules.version == "b" and rules.score(signals) == 1.0 and rules.action(0.9) == "MONITOR_INTENSELY"
+    assert rules.score_batch({"velocity": np.array([True, False]), "night": np.array([True, True])}, 2).tolist() == [1.0, 0.5]
+
+    # A broken edit is reported and the live rules stay
+    _write(path, RULES.format(version="c", night_weight=0.5, freeze=0.95).replace("night: 0.5", "daylight: 0.5"))
+    assert engine.rules.version == "b"
+    assert "undeclared signal 'daylight'" in engine.manifest["last_error"]
+    assert "not reloaded, keeping b" in caplog.text
+    with pytest.raises(RuleError):
+        engine.reload()
+    assert engine.rules.version == "b"
+
+def test_narratives_follow_the_live_cutoff(tmp_path):
+    from skills.orchestrator.langgraph_logic import get_soft_computing_narrative
+
+    state = {"temporal_result": {"score": 0.55, "action": "MONITOR_INTENSELY"}}
+    assert "Low Risk" in get_soft_computing_narrative(state)
+    path = str(tmp_path / "rules.yaml")
+    _write(path, RULES.format(version="low", night_weight=0.1, freeze=0.9))
+    live = FUZZY_RULES.rules
+    FUZZY_RULES.swap(load_rules(path))  # suspicious_cutoff: 0.5
+    try:
+        assert "INVESTIGATION REPORT" in get_soft_computing_narrative(state)
+    finally:
+        FUZZY_RULES.swap(live)
+
+def test_rules_endpoints(tmp_path):
+    client = TestClient(app)
+    manifest = client.get("/rules").json()
+    assert manifest["rules"] == ["behavioral_shift", "circular_flow", "structuring"]
+    assert manifest["actions"][-1] == {"default": "MONITOR_INTENSELY"}
+
+    path = str(tmp_path / "rules.yaml")
+    _write(path, "signals: [not, a, mapping]")
+    live, FUZZY_RULES.path = FUZZY_RULES.path, path
+    try:
+        response = client.post("/rules/reload")
+        assert response.status_code == 400
+        assert client.get("/rules").json()["version"] == manifest["version"]
+    finally:
+        FUZZY_RULES.path = live
+    assert client.post("/rules/reload").json()["sha256"] == manifest["sha256"]
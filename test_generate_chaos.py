@@ -0,0 +1,107 @@
+import json
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from generate_chaos import (
+    BAD_ACTOR_LOCS, BLOCK_ROWS, COLUMNS, DEFAULT_OUTPUT, DEMO_ATTACKS, EXTENDED_COLUMNS, NORMAL_TYPES, TOTAL_ALERTS,
+    iter_chunks, write_chunks, parse_mix, main
+)
+
+START = "2026-01-01T00:00:00"
+
+def test_demo_dataset_keeps_the_hammer_layout(tmp_path, monkeypatch):
+    # `python generate_chaos.py` with no arguments, run from the repo root
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["generate_chaos.py"])
+    main()
+    df = pd.read_csv(tmp_path / DEFAULT_OUTPUT)
+    assert list(df.columns) == COLUMNS
+    assert len(df) == TOTAL_ALERTS
+    # The first 100 rows are the legacy attacks, the rest is ordinary traffic
+    attacks, normal = df.iloc[:DEMO_ATTACKS], df.iloc[DEMO_ATTACKS:]
+    assert (attacks["type"] == "WITHDRAWAL_QUICK_FLIP").all()
+    assert attacks["loc"].isin(BAD_ACTOR_LOCS).all() and (attacks["last_loc"] == "Dubai").all()
+    assert (attacks["ip_address"] == "89.14.22.11").all() and (attacks["mean_amt"] == 100).all()
+    assert normal["type"].isin(NORMAL_TYPES).all()
+
+def test_seeded_output_is_reproducible_and_chunked():
+    start = datetime.fromisoformat(START)
+    a = list(iter_chunks(rows=2500, chunk_size=1000, seed=3, start=start, extended=True))
+    b = list(iter_chunks(rows=2500, chunk_size=1000, seed=3, start=start, extended=True))
+    assert [len(c) for c in a] == [1000, 1000, 500]
+    pd.testing.assert_frame_equal(pd.concat(a), pd.concat(b))
+
+    df = pd.concat(a, ignore_index=True)
+    assert list(df.columns) == EXTENDED_COLUMNS
+    # Timestamps keep increasing across chunk boundaries
+    assert df["timestamp"].is_monotonic_increasing
+    assert (df["last_time"] < df["timestamp"]).all()
+
+def test_attack_mix_and_round_trips():
+    df = pd.concat(iter_chunks(rows=20000, seed=1, attack_rate=0.2, extended=True,
+                               mix=parse_mix("structuring=1,round_trip=1")))
+    assert set(df["scenario"]) == {"normal", "structuring", "round_trip"}
+    assert (df["expected_suspicious"] == (df["scenario"] != "normal")).all()
+    assert df.loc[df["scenario"] == "structuring", "amount"].between(9000, 9990).all()
+
+    trips = df.reset_index(drop=True)
+    starts = trips.index[(trips["scenario"] == "round_trip")][::2]
+    out, back = trips.loc[starts], trips.loc[starts + 1]
+    assert (out["user_id"].values == back["counterparty"].values).all()
+    assert (out["counterparty"].values == back["user_id"].values).all()
+
+def test_output_does_not_depend_on_chunk_size():
+    start = datetime.fromisoformat(START)
+    rows = 2 * BLOCK_ROWS + 500
+    generate = lambda chunk_size: pd.concat(
+        iter_chunks(rows=rows, chunk_size=chunk_size, seed=5, start=start, attack_rate=0.5, extended=True,
+                    mix=parse_mix("round_trip=1")),
+        ignore_index=True
+    )
+    df = generate(BLOCK_ROWS)
+    for chunk_size in (333, 7000, rows + 1):
+        pd.testing.assert_frame_equal(generate(chunk_size), df)
+
+    # Every round trip keeps its return leg, including the ones that straddle a block
+    trips = df.index[df["scenario"] == "round_trip"]
+    starts = trips[::2]
+    assert len(trips) % 2 == 0 and ((starts + 1) % BLOCK_ROWS == 0).any()
+    out, back = df.loc[starts], df.loc[starts + 1]
+    assert (back["scenario"] == "round_trip").all()
+    assert (out["user_id"].values == back["counterparty"].values).all()
+    assert (out["counterparty"].values == back["user_id"].values).all()
+    assert (back["last_time"].values == out["timestamp"].values).all()
+
+def test_structuring_rows_come_in_bursts_the_detector_scores():
+    from skills.temporal_analyst.flow_graph import epoch_seconds
+    from skills.temporal_analyst.structuring import StructuringDetector
+
+    df = pd.concat(iter_chunks(rows=20000, seed=2, attack_rate=0.05, extended=True,
+                               start=datetime.fromisoformat(START), mix=parse_mix("structuring=1")), ignore_index=True)
+    smurfs = df[df["scenario"] == "structuring"]
+    per_account = smurfs.groupby("user_id").size()
+    assert per_account.min() >= 3 or (per_account < 3).sum() <= 1  # Only the final burst may be cut short
+
+    detector = StructuringDetector()
+    scores = [detector.observe(row.user_id, row.amount, epoch_seconds(row.timestamp))[0] for row in df.itertuples()]
+    flagged = [score > 0 for score, scenario in zip(scores, df["scenario"]) if scenario == "structuring"]
+    # Only the first deposit of each burst goes unscored
+    assert sum(flagged) >= 0.6 * len(flagged)
+
+def test_unknown_scenario_is_rejected():
+    with pytest.raises(ValueError):
+        parse_mix("phishing=1")
+
+@pytest.mark.parametrize("fmt", ["ndjson", "parquet"])
+def test_streaming_writers(tmp_path, fmt):
+    path = tmp_path / f"out.{fmt}"
+    written = write_chunks(iter_chunks(rows=1500, chunk_size=400, seed=2), str(path), fmt)
+    assert written == 1500
+    if fmt == "ndjson":
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1500 and set(json.loads(lines[0])) == set(COLUMNS)
+    else:
+        assert len(pd.read_parquet(path)) == 1500
@@ -0,0 +1,49 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from skills.temporal_analyst.geo_index import LOCATIONS
+from skills.temporal_analyst.temporal_engine import detect_behavioral_shift, detect_behavioral_shift_many
+
+BASE_TIME = datetime(2024, 5, 1, 12, 0, 0)
+
+def _score(loc, last_loc, hours, amount=100.0):
+    tx = {"amount": amount, "loc": loc, "timestamp": (BASE_TIME + timedelta(hours=hours)).isoformat()}
+    baseline = {"mean_amt": 100.0, "std_amt": 20.0, "last_loc": last_loc, "last_time": BASE_TIME.isoformat()}
+    return detect_behavioral_shift(tx, baseline)
+
+def test_distances_are_great_circle_km():
+    assert 5400 < LOCATIONS.distance("Dubai", "London") < 5600
+    assert 100 < LOCATIONS.distance("dubai", "ABU  DHABI") < 140
+    assert LOCATIONS.distance("Dubai", "Atlantis") is None
+
+def test_short_hops_are_not_impossible_travel():
+    assert "Vel:False" in _score("Abu Dhabi", "Dubai", 1)["reasoning"]
+    assert "Vel:True" in _score("London", "Dubai", 1)["reasoning"]
+    # ~5,500 km: 6.5h beats a commercial flight, 8h does not
+    assert "Vel:True" in _score("London", "Dubai", 6.5)["reasoning"]
+    assert "Vel:False" in _score("London", "Dubai", 8)["reasoning"]
+
+def test_unknown_places_keep_the_legacy_rule():
+    assert "Vel:True" in _score("Atlantis", "Dubai", 1)["reasoning"]
+    assert "Vel:False" in _score("Atlantis", "Dubai", 5)["reasoning"]
+    assert _score("North Korea", "Dubai", 48)["action"] == "SOFT_RESTRICTION"
+
+def test_batch_matches_scalar_geo_velocity():
+    rng = random.Random(11)
+    places = LOCATIONS.names + ["Atlantis", "El Dorado", "dubai"]
+    txs, bases = [], []
+    for _ in range(3000):
+        hours = rng.choice([0.0, 0.5, 1.0, 3.99, 4.0, 6.875, 12.0, 30.0, -2.0]) + rng.random() * rng.choice([0, 1])
+        txs.append({"amount": rng.uniform(10, 5000), "loc": rng.choice(places),
+                    "timestamp": (BASE_TIME + timedelta(hours=hours)).isoformat()})
+        bases.append({"mean_amt": rng.uniform(50, 500), "std_amt": rng.uniform(1, 200),
+                      "last_loc": rng.choice(places), "last_time": BASE_TIME.isoformat()})
+    batch = detect_behavioral_shift_many(txs, bases, explain="all")
+    for tx, base, row in zip(txs, bases, batch):
+        assert row == detect_behavioral_shift(tx, base)
+
+def test_lookup_many_resolves_each_name():
+    ids = LOCATIONS.lookup_many(np.array(["Dubai", "Nowhere", "dubai"], dtype=object))
+    assert ids[0] == ids[2] == LOCATIONS.lookup("Dubai") and ids[1] == -1
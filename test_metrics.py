@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from gateway.metrics import Histogram, timed, STAGE_SECONDS, set_enabled, enabled
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("demo_seconds", "demo", label="stage", buckets=(0.1, 1.0))
+    hist.observe(0.05, "a")
+    hist.observe(0.5, "a")
+    hist.observe(5.0, "a")
+    lines = hist.render()
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+
+def test_disabled_instrumentation_records_nothing():
+    was = enabled()
+    set_enabled(False)
+    try:
+        before = STAGE_SECONDS.render()
+        with timed("disabled_probe"):
+            pass
+        assert STAGE_SECONDS.render() == before
+    finally:
+        set_enabled(was)
+
+def test_metrics_endpoint_exposes_node_timings():
+    from main import app
+
+    client = TestClient(app)
+    payload = {
+        "transaction": {"amount": 90000, "loc": "Russia", "timestamp": "2024-01-01T03:00:00", "type": "WIRE", "ip": "10.0.0.1"},
+        "user_baseline": {"mean_amt": 100, "std_amt": 20, "last_loc": "London", "last_time": "2024-01-01T02:00:00"}
+    }
+    result = client.post("/triage", json=payload)
+    assert result.status_code == 200
+    # Narratives are rendered on the read path only
+    assert client.get(result.json()["report_url"]).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for stage in ("parse", "evidence", "temporal", "compliance", "narrative", "stats", "serialize"):
+        assert f'sentinel_stage_seconds_count{{stage="{stage}"}}' in body
+    assert "sentinel_triage_requests_total" in body
+    assert "sentinel_processed_total" in body
+    assert "sentinel_instrumentation_overhead_seconds" in body
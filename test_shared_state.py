@@ -0,0 +1,195 @@
+from gateway.shared_state import SharedCounters, CaseJournal
+import multiprocessing
+import threading
+
+# Mock Data
+case = {"timestamp": "2026-02-04T12:00:00", "amount": 50000, "type": "SANCTIONS", "reason": "Fuzzy Score: 1.0", "ip": "89.14.22.11"}
+
+def _hammer(state_dir, n):
+    counters = SharedCounters(["processed"], state_dir=state_dir)
+    journal = CaseJournal(state_dir=state_dir)
+    for _ in range(n):
+        counters.incr("processed")
+    journal.append(dict(case))
+
+def test_counters_and_journal_across_workers(tmp_path):
+    state_dir = str(tmp_path)
+    counters = SharedCounters(["processed"], state_dir=state_dir)
+    journal = CaseJournal(state_dir=state_dir)
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_hammer, args=(state_dir, 1000)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert counters.value("processed") == 4000
+    assert journal.count() == 4
+    assert [c["id"] for c in journal.cases()] == ["CASE-001", "CASE-002", "CASE-003", "CASE-004"]
+
+def _hammer_few_slots(state_dir, n):
+    counters = SharedCounters(["processed"], max_slots=2, state_dir=state_dir)
+    threads = [threading.Thread(target=lambda: [counters.incr("processed") for _ in range(n)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def test_workers_beyond_the_slot_limit_share_the_overflow_row(tmp_path):
+    state_dir = str(tmp_path)
+    counters = SharedCounters(["processed"], max_slots=2, state_dir=state_dir)
+    counters.incr("processed")  # Claims the only private row
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_hammer_few_slots, args=(state_dir, 2000)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert counters.value("processed") == 1 + 3 * 4 * 2000
+
+def test_thread_increments_are_not_lost(tmp_path):
+    counters = SharedCounters(["processed"], state_dir=str(tmp_path))
+    threads = [threading.Thread(target=lambda: [counters.incr("processed") for _ in range(5000)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counters.value("processed") == 40000
+
+def test_reset(tmp_path):
+    counters = SharedCounters(["processed"], state_dir=str(tmp_path))
+    journal = CaseJournal(state_dir=str(tmp_path))
+    counters.incr("processed", 5)
+    journal.append(dict(case))
+
+    counters.reset()
+    journal.reset()
+    counters.incr("processed")
+    assert counters.value("processed") == 1
+    assert journal.append(dict(case))["id"] == "CASE-001"
+
+def test_ring_cursor_and_history(tmp_path):
+    journal = CaseJournal(state_dir=str(tmp_path), ring_capacity=4)
+    journal.append_many([dict(case, amount=i) for i in range(3)])
+
+    cases, cursor, truncated = journal.since(0)
+    assert [c["amount"] for c in cases] == [0, 1, 2] and cursor == 3 and not truncated
+
+    journal.append_many([dict(case, amount=i) for i in range(3, 10)])
+    cases, cursor, truncated = journal.since(cursor)
+    assert [c["amount"] for c in cases] == [6, 7, 8, 9] and cursor == 10 and truncated
+    assert journal.since(cursor)[0] == []
+
+    assert [c["id"] for c in journal.history(start=2, limit=3)] == ["CASE-003", "CASE-004", "CASE-005"]
+    assert len(journal.history(start=8, limit=100)) == 2
+
+def test_graph_index_is_incremental(tmp_path):
+    from gateway.graph_index import CaseGraph
+
+    journal = CaseJournal(state_dir=str(tmp_path))
+    journal.append(dict(case))
+    graph = CaseGraph()
+    journal.add_view(graph)  # Backfills what is already in the journal
+    journal.append_many([dict(case), dict(case, ip="10.0.0.55"), dict(case, ip="N/A")])
+    journal.sync()
+
+    assert graph.version == 4
+    nodes, links = graph.since(1)
+    assert [n["id"] for n in nodes] == ["CASE-002", "CASE-003", "10.0.0.55", "CASE-004"]
+    assert len(links) == 2
+    assert graph.top_hubs(1) == [{"id": "89.14.22.11", "degree": 2}]
+
+    journal.reset()
+    journal.sync()
+    assert graph.version == 0 and graph.nodes == []
+
+def test_graph_endpoint_etag():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    client.post("/reset")
+    client.post("/force_inject")
+    first = client.get("/graph")
+    assert first.status_code == 200 and first.json()["version"] == 50
+
+    assert client.get("/graph", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    delta = client.get("/graph", params={"since": 50, "epoch": first.json()["epoch"]})
+    assert delta.json()["nodes"] == [] and delta.json()["links"] == [] and not delta.json()["full"]
+    # Different query, different body: the validator must differ too
+    assert delta.headers["etag"] != first.headers["etag"]
+    assert client.get("/graph", params={"since": 50, "epoch": first.json()["epoch"]},
+                      headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+    assert client.get("/graph", params={"hubs": 1}, headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+def test_graph_keeps_only_the_newest_cases():
+    from gateway.graph_index import CaseGraph
+
+    graph = CaseGraph(max_cases=3)
+    for i in range(1, 7):
+        graph.append({"id": f"CASE-{i:03d}", "type": "T", "ip": "10.0.0.1" if i <= 2 else f"10.0.1.{i}"})
+    assert graph.version == 6 and graph.tail == 3
+    assert graph.top_hubs(10) == [{"id": ip, "degree": 1} for ip in ("10.0.1.4", "10.0.1.5", "10.0.1.6")]
+    nodes, links = graph.since(0)
+    assert [n["id"] for n in nodes if n["group"] == "case"] == ["CASE-004", "CASE-005", "CASE-006"]
+    assert {link["target"] for link in links} == {n["id"] for n in nodes if n["group"] == "ip"}
+    assert graph.since(1) == graph.since(0)  # Expired version: whole graph
+    assert [n["id"] for n in graph.since(5)[0]] == ["CASE-006", "10.0.1.6"]
+
+    # Past the compaction point the lists really shrink, and a long-lived hub stays
+    graph = CaseGraph(max_cases=10)
+    for i in range(1, 3001):
+        graph.append({"id": f"CASE-{i}", "type": "T", "ip": "10.9.9.9" if i % 2 else f"10.0.{i // 250}.{i % 250}"})
+    nodes, links = graph.since(0)
+    assert len(graph.nodes) <= 2 * (1024 + 10) and len(links) == 10  # Bounded by the compaction block
+    assert "10.9.9.9" in {n["id"] for n in nodes} and graph.hub_degree["10.9.9.9"] == 5
+    assert [n["id"] for n in graph.since(2999)[0]] == ["CASE-3000", "10.0.12.0"]
+
+def test_server_groups_keep_separate_state(tmp_path, monkeypatch):
+    import os
+    from gateway.shared_state import group_dir, server_group
+
+    monkeypatch.setenv("SENTINEL_STATE_GROUP", "101")
+    live = CaseJournal(state_dir=group_dir(str(tmp_path)))
+    SharedCounters(["processed"], state_dir=group_dir(str(tmp_path))).incr("processed", 7)
+    live.append(dict(case))
+
+    # A second instance on the same host starts alongside: it must not wipe the live one
+    monkeypatch.setenv("SENTINEL_STATE_GROUP", "202")
+    other = CaseJournal(state_dir=group_dir(str(tmp_path)))
+    assert other.count() == 0
+    assert SharedCounters(["processed"], state_dir=group_dir(str(tmp_path))).value("processed") == 0
+    assert live.count() == 1 and live.cases()[0]["id"] == "CASE-001"
+
+    # Pre-fork workers (plain fork, no multiprocessing parent) land in their supervisor's group
+    monkeypatch.delenv("SENTINEL_STATE_GROUP")
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, str(server_group()).encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 64).decode() == server_group()
+
+def test_stale_groups_are_pruned(tmp_path):
+    import os
+    from gateway import shared_state
+    from gateway.shared_state import group_dir, prune_groups, server_group
+
+    pgid, boot, ticks = server_group().split("-")
+    # A restarted container: same pgid, but its leader started at another time
+    stale = tmp_path / f"group-{pgid}-{boot}-{int(ticks) + 1}"
+    stale.mkdir()
+    (stale / "cases.jsonl").write_text("{}\n")
+    # A group whose leader is gone but whose orphaned workers still hold it
+    orphaned = group_dir(str(tmp_path / "other"))
+    os.rename(orphaned, tmp_path / f"group-{pgid}-{boot}-{int(ticks) + 2}")
+
+    live = group_dir(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == sorted(["other", os.path.basename(live), f"group-{pgid}-{boot}-{int(ticks) + 2}"])
+    assert os.path.isdir(live) and prune_groups(str(tmp_path)) == []
+    # Once the last holder lets go, the next startup removes it
+    os.close(shared_state._HELD.pop(orphaned))
+    assert prune_groups(str(tmp_path)) == [f"group-{pgid}-{boot}-{int(ticks) + 2}"]
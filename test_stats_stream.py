@@ -0,0 +1,107 @@
+import json
+import asyncio
+import threading
+
+from gateway.stats_broadcast import StatsBroadcaster
+
+class FakeStats:
+    def __init__(self):
+        self.processed = 0
+        self.cases = []
+        self.epoch = 0
+        self.polls = 0
+        self.threads = set()
+
+    def poll(self, since, epoch=None):
+        self.polls += 1
+        self.threads.add(threading.current_thread())
+        if epoch is not None and epoch != self.epoch:
+            since = 0
+        return {
+            "processed": self.processed,
+            "suspicious": len(self.cases),
+            "cursor": len(self.cases),
+            "epoch": self.epoch,
+            "truncated": False,
+            "cases": self.cases[since:]
+        }
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+def test_burst_is_coalesced_into_one_delta_per_tick():
+    async def scenario():
+        stats = FakeStats()
+        feed = StatsBroadcaster(stats.poll, max_hz=1000)
+        a, b = feed.subscribe(), feed.subscribe()
+        await feed.tick()
+        assert [kind for kind, _ in _drain(a)] == ["snapshot"]
+        _drain(b)
+
+        # 2,000 triages between two ticks -> one push to each dashboard
+        for i in range(2000):
+            stats.processed += 1
+            if i % 100 == 0:
+                stats.cases.append({"id": f"CASE-{i}"})
+        await feed.tick()
+        await feed.tick()  # nothing changed: nothing pushed
+
+        events_a, events_b = _drain(a), _drain(b)
+        assert len(events_a) == 1 and events_a == events_b
+        kind, delta = events_a[0]
+        assert kind == "delta"
+        assert delta["processed"] == 2000 and len(delta["cases"]) == 20
+        assert feed.pushes == 1
+        feed.unsubscribe(a)
+        feed.unsubscribe(b)
+
+    asyncio.run(scenario())
+
+def test_late_joiner_gets_snapshot_and_existing_only_new_cases():
+    async def scenario():
+        stats = FakeStats()
+        feed = StatsBroadcaster(stats.poll, max_hz=1000)
+        early = feed.subscribe()
+        stats.cases.append({"id": "CASE-001"})
+        await feed.tick()
+        _drain(early)
+
+        stats.cases.append({"id": "CASE-002"})
+        late = feed.subscribe()
+        await feed.tick()
+
+        (kind, delta), = _drain(early)
+        assert kind == "delta" and [c["id"] for c in delta["cases"]] == ["CASE-002"]
+        (kind, snapshot), = _drain(late)
+        assert kind == "snapshot" and [c["id"] for c in snapshot["cases"]] == ["CASE-001", "CASE-002"]
+
+        stats.cases, stats.epoch = [], 1
+        await feed.tick()
+        (kind, delta), = _drain(early)
+        assert delta["reset"] and delta["cases"] == [] and delta["epoch"] == 1
+
+    asyncio.run(scenario())
+
+def test_poller_stops_when_idle():
+    async def scenario():
+        stats = FakeStats()
+        feed = StatsBroadcaster(stats.poll, max_hz=200)
+        events = feed.events()
+        first = await events.__anext__()
+        assert first.startswith(b"retry:")
+        chunk = await events.__anext__()
+        assert b"event: snapshot" in chunk
+        assert json.loads(chunk.split(b"data: ")[1])["processed"] == 0
+
+        await events.aclose()
+        await asyncio.sleep(0.05)
+        polls = stats.polls
+        await asyncio.sleep(0.05)
+        assert feed.listeners == 0 and stats.polls == polls
+        # Polls read shared files: never on the event loop's thread
+        assert threading.main_thread() not in stats.threads
+
+    asyncio.run(scenario())
@@ -0,0 +1,108 @@
+import json
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from gateway.stream_ingest import IngestStream, RecordError
+
+from main import app
+
+def _record(amount, loc="London"):
+    return {
+        "transaction": {"amount": amount, "loc": loc, "timestamp": "2024-01-01T10:00:00", "type": "WIRE"},
+        "user_baseline": {"mean_amt": 100, "std_amt": 20, "last_loc": "London", "last_time": "2024-01-01T02:00:00"}
+    }
+
+def test_stream_keeps_order_and_bounds_in_flight():
+    in_flight = []
+
+    def score(records):
+        in_flight.append(len(records))
+        return [{"value": r["n"]} for r in records]
+
+    async def source():
+        for n in range(50):
+            yield {"n": n} if n != 7 else RecordError("bad record")
+
+    async def drive():
+        stream = IngestStream(score, window=8, max_batch=4)
+        out = []
+        async for results in stream.run(source()):
+            out.extend(results)
+        return out
+
+    out = asyncio.run(drive())
+    assert [r["seq"] for r in out] == list(range(50))
+    assert out[7] == {"error": "bad record", "seq": 7}
+    assert all(r["value"] == r["seq"] for r in out if "value" in r)
+    assert max(in_flight) <= 4
+
+def test_ndjson_ingest_streams_results_in_order():
+    client = TestClient(app)
+    lines = [json.dumps(_record(100 + i)) for i in range(20)]
+    lines.insert(5, "{not json")
+    response = client.post("/ingest/ndjson", content="\n".join(lines) + "\n")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["seq"] for r in results] == list(range(21))
+    assert "error" in results[5]
+    assert all("temporal_result" in r for i, r in enumerate(results) if i != 5)
+
+def test_websocket_ingest_grants_and_returns_credit():
+    client = TestClient(app)
+    with client.websocket_connect("/ingest/ws") as ws:
+        window = ws.receive_json()["credit"]
+        assert window > 0
+
+        ws.send_text(json.dumps([_record(100 + i) for i in range(10)]))
+        ws.send_text(json.dumps({"transaction": "not a dict"}))
+        ws.send_text(json.dumps({"end": True}))
+
+        results, returned = [], 0
+        while True:
+            frame = ws.receive_json()
+            if frame.get("done"):
+                break
+            results.extend(frame["results"])
+            returned += frame["credit"]
+
+        assert [r["seq"] for r in results] == list(range(11))
+        assert returned == 11
+        assert "error" in results[10]
+        assert frame["completed"] == 11
+
+def test_websocket_ingest_rejects_sends_beyond_credit():
+    client = TestClient(app)
+    with client.websocket_connect("/ingest/ws") as ws:
+        window = ws.receive_json()["credit"]
+        ws.send_text(json.dumps([{"bad": i} for i in range(window + 1)]))
+        message = ws.receive()
+        assert message["type"] == "websocket.close"
+        assert message["code"] == 1008
+
+def test_a_record_that_fails_scoring_only_errors_itself():
+    def score(records):
+        if any(r["n"] == 1 for r in records):
+            raise ValueError("Invalid isoformat string")
+        return [{"value": r["n"]} for r in records]
+
+    async def source():
+        for n in range(3):
+            yield {"n": n}
+
+    async def drive():
+        return [r async for results in IngestStream(score, window=8, max_batch=8).run(source()) for r in results]
+
+    out = asyncio.run(drive())
+    assert out[0] == {"value": 0, "seq": 0} and out[2] == {"value": 2, "seq": 2}
+    assert out[1]["error"] == "Triage Engine Error: Invalid isoformat string"
+
+    client = TestClient(app)
+    bad = _record(150)
+    bad["transaction"]["timestamp"] = "not-a-time"
+    body = "\n".join(json.dumps(r) for r in (_record(100), bad, _record(200))) + "\n"
+    results = [json.loads(line) for line in client.post("/ingest/ndjson", content=body).text.splitlines()]
+    assert "temporal_result" in results[0] and "temporal_result" in results[2]
+    assert "isoformat" in results[1]["error"]
@@ -0,0 +1,125 @@
+import time
+import random
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from skills.temporal_analyst.structuring import StructuringDetector
+from skills.temporal_analyst.temporal_engine import (
+    calculate_fuzzy_risk, detect_behavioral_shift, detect_behavioral_shift_many
+)
+
+HOUR = 3600
+DAY = 86400
+
+def test_rolling_aggregates_per_window():
+    s = StructuringDetector()
+    s.observe("A", 120.0, 0)
+    s.observe("A", 9500.0, 30 * 60)
+    s.observe("A", 9800.0, 5 * HOUR)
+    s.observe("A", 15000.0, 3 * DAY)
+    agg = s.aggregates("A", 3 * DAY)
+    assert agg["1h"] == {"count": 1, "sum": 15000.0, "near_threshold": 0, "near_sum": 0.0}
+    assert agg["24h"]["count"] == 1
+    assert agg["7d"] == {"count": 4, "sum": 34420.0, "near_threshold": 2, "near_sum": 19300.0}
+    assert s.aggregates("A", 20 * DAY)["7d"]["count"] == 0
+    assert s.aggregates("nobody", 0) is None
+
+def test_near_threshold_runs_raise_structuring_risk():
+    s = StructuringDetector()
+    assert s.observe("A", 9500.0, 0) == (0.0, None)
+    risk, detail = s.observe("A", 9700.0, 10 * 60)
+    assert risk == 0.5 and detail == "2x just below 10,000 in 1h, total 19,200"
+    risk, detail = s.observe("A", 9900.0, 20 * 60)
+    assert risk == 1.0 and detail.startswith("3x just below 10,000 in 1h")
+    # Ordinary amounts are never scored, even on a flagged account
+    assert s.observe("A", 250.0, 30 * 60) == (0.0, None)
+    # Spread over a day: the 24h window carries it
+    s.observe("B", 9100.0, 0)
+    s.observe("B", 9200.0, 6 * HOUR)
+    risk, detail = s.observe("B", 9300.0, 12 * HOUR)
+    assert risk == round(2 / 3, 4) and "in 24h" in detail
+
+def test_old_buckets_expire_and_late_events_are_dropped():
+    s = StructuringDetector()
+    s.observe("A", 9500.0, 0)
+    s.observe("A", 9500.0, 10 * DAY)
+    assert s.aggregates("A", 10 * DAY)["7d"]["near_threshold"] == 1
+    # Event from before the ring's horizon: counted in no window
+    s.observe("A", 9500.0, 0)
+    assert s.aggregates("A", 10 * DAY)["7d"]["count"] == 1
+
+def test_memory_is_per_account_and_updates_are_constant_time():
+    s = StructuringDetector(initial_capacity=4)
+    for i in range(20000):
+        s.observe(f"U{i % 100}", 9500.0, i * 60)
+    assert len(s) == 100
+    assert s._table.records["count"].shape == (256, 3, 12)
+    start = time.perf_counter()
+    for i in range(2000):
+        s.observe("U1", 9500.0, 2_000_000 + i)
+    assert (time.perf_counter() - start) / 2000 < 1e-3
+
+def _deposit(state_dir, amount, ts):
+    StructuringDetector(state_dir=state_dir).observe("A", amount, ts)
+
+def test_workers_add_up_one_accounts_deposits(tmp_path):
+    import multiprocessing
+    state_dir = str(tmp_path)
+    s = StructuringDetector(state_dir=state_dir)
+    # Two deposits land on two other workers, the third on this one
+    ctx = multiprocessing.get_context("spawn")
+    for amount, ts in ((9500.0, 0), (9600.0, 10 * 60)):
+        worker = ctx.Process(target=_deposit, args=(state_dir, amount, ts))
+        worker.start()
+        worker.join()
+    risk, detail = s.observe("A", 9700.0, 20 * 60)
+    assert risk == 1.0 and detail == "3x just below 10,000 in 1h, total 28,800"
+    assert s.aggregates("A", 20 * 60)["1h"]["count"] == 3
+
+def test_any_window_list_gets_a_saturation_per_window():
+    s = StructuringDetector(windows=(1800, 4 * HOUR))
+    assert s.labels == ["30m", "4h"] and list(s._saturation) == [3, 4]
+    s.observe("A", 9500.0, 0)
+    risk, detail = s.observe("A", 9600.0, 60)
+    assert risk == 0.5 and "in 30m" in detail
+    with pytest.raises(ValueError, match="2 saturation counts for 3 windows"):
+        StructuringDetector(saturation=(3, 4))
+
+def test_structuring_risk_is_a_fuzzy_or():
+    assert calculate_fuzzy_risk(0.5, False, 0.0, 0.0) == (0.0, "MONITOR_INTENSELY")
+    assert calculate_fuzzy_risk(0.5, False, 0.0, 0.67) == (0.67, "SOFT_RESTRICTION")
+    assert calculate_fuzzy_risk(0.5, False, 0.3, 1.0) == (1.0, "AUTONOMOUS_FREEZE")
+
+def test_batch_matches_scalar_with_structuring_inputs():
+    rng = random.Random(5)
+    txs, bases = [], []
+    for i in range(500):
+        tx = {"amount": rng.uniform(10, 500), "loc": "Dubai", "timestamp": "2024-05-01T12:00:00"}
+        if i % 4 == 0:
+            tx["structuring_risk"] = rng.choice([0.2, 0.5, 0.6667, 1.0])
+            tx["structuring_detail"] = "3x just below 10,000 in 24h, total 28,500"
+        txs.append(tx)
+        bases.append({"mean_amt": 100.0, "std_amt": 50.0, "last_loc": "Dubai", "last_time": "2024-05-01T10:00:00"})
+    for tx, base, row in zip(txs, bases, detect_behavioral_shift_many(txs, bases, explain="all")):
+        assert row == detect_behavioral_shift(tx, base)
+    assert "Structuring (3x just below 10,000 in 24h" in detect_behavioral_shift(txs[0], bases[0])["reasoning"]
+
+def test_triage_flags_structuring_run(monkeypatch):
+    from main import app, STRUCTURING
+
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    STRUCTURING.reset()
+    client = TestClient(app)
+    baseline = {"mean_amt": 9000, "std_amt": 3000, "last_loc": "Dubai", "last_time": "2024-05-01T00:00:00"}
+    for minute, amount in [(0, 9400), (15, 9650), (30, 9900)]:
+        tx = {"amount": amount, "loc": "Dubai", "timestamp": f"2024-05-01T10:{minute:02d}:00",
+              "user_id": "smurf-1", "structuring_risk": 0.0}
+        result = client.post("/triage", json={"transaction": tx, "user_baseline": baseline}).json()
+    assert result["is_suspicious"]
+    assert "Structuring (3x just below 10,000 in 1h" in result["temporal_result"]["reasoning"]
+
+    agg = client.get("/accounts/smurf-1/aggregates", params={"at": "2024-05-01T10:30:00"}).json()
+    assert agg["windows"]["1h"]["near_threshold"] == 3
+    assert client.get("/accounts/nobody/aggregates").status_code == 404
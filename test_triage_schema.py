@@ -0,0 +1,55 @@
+import re
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+import gateway.fast_json as fast_json
+from main import app
+
+client = TestClient(app)
+
+BASELINE = {"mean_amt": 100, "std_amt": 10, "last_loc": "Dubai", "last_time": "2024-05-01T11:30:00"}
+
+def _tx(**overrides):
+    return {"amount": 40000, "loc": "London", "timestamp": "2024-05-01T12:00:00", **overrides}
+
+def test_compact_view_returns_only_the_decision(monkeypatch):
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    body = {"transaction": _tx(ip_address="198.51.100.7", channel="mobile"), "user_baseline": BASELINE}
+    compact = client.post("/triage", params={"view": "compact"}, json=body).json()
+    assert set(compact) == {"is_suspicious", "score", "action", "case_id"}
+    assert compact["is_suspicious"] and compact["action"] == "AUTONOMOUS_FREEZE"
+    assert compact["case_id"].startswith("CASE-")
+
+    full = client.post("/triage", json=body).json()
+    # Typed, but ints stay ints and unknown fields pass through untouched
+    assert "Mean:100, Std:10, Vel:True]" in full["temporal_result"]["reasoning"]
+    assert full["evidence"]["channel"] == "mobile"
+
+    batch = client.post("/triage/batch", params={"view": "compact"}, json={"items": [body, body]}).json()
+    assert batch["count"] == 2 and set(batch["results"][0]) == {"is_suspicious", "score", "action", "case_id"}
+
+def test_schema_rejects_bad_requests_with_422():
+    assert client.post("/triage", json={"transaction": _tx(amount="lots")}).status_code == 422
+    assert client.post("/triage", json={"transaction": {"amount": 5}}).status_code == 422
+    response = client.post("/triage", content=b"{not json", headers={"content-type": "application/json"})
+    assert response.status_code == 422 and response.json()["detail"][0]["type"] == "json_invalid"
+    assert client.post("/triage", params={"view": "tiny"}, json={"transaction": _tx()}).status_code == 422
+
+    spec = client.get("/openapi.json").json()
+    body = spec["paths"]["/triage"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert body == {"$ref": "#/components/schemas/TriageRequest"}
+    assert "transaction" in spec["components"]["schemas"]["TriageRequest"]["properties"]
+    # Every $ref in the document resolves
+    refs = re.findall(r'"\$ref": "#/components/schemas/([^"]+)"', json.dumps(spec))
+    assert refs and all(name in spec["components"]["schemas"] for name in refs)
+
+def test_fast_json_matches_stdlib_with_and_without_orjson(monkeypatch):
+    import numpy as np
+    content = {"score": np.float64(0.5), "flags": ("A",), "name": "Zürich", "n": 3}
+    expected = {"score": 0.5, "flags": ["A"], "name": "Zürich", "n": 3}
+    assert json.loads(fast_json.dumps(content)) == expected
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert json.loads(fast_json.dumps(content)) == expected
+    assert fast_json.loads(b'{"a": 1}') == {"a": 1}
@@ -0,0 +1,106 @@
+import os
+import time
+import random
+import string
+
+import numpy as np
+
+from skills.compliance_radar.watchlist import WatchlistIndex, WatchlistScreener, compile_watchlist, normalize
+from skills.compliance_radar.radar import ComplianceRadar
+
+ROWS = [
+    {"kind": "country", "value": "North Korea", "aliases": "DPRK|Pyongyang", "program": "UN-1718"},
+    {"kind": "entity", "value": "Bank Melli Iran", "aliases": "Melli Bank", "program": "UN-2231"},
+    {"kind": "entity", "value": "Société Générale Fictive", "aliases": "", "program": "TEST"},
+    {"kind": "ip", "value": "10.0.0.0/8", "aliases": "", "program": "WIDE"},
+    {"kind": "ip", "value": "10.1.2.0/24", "aliases": "", "program": "NARROW"},
+]
+
+def test_exact_alias_and_normalization():
+    index = WatchlistIndex.from_rows(ROWS)
+    assert index.lookup("north   KOREA")[0].how == "exact"
+    assert index.lookup("dprk")[0].entry == "North Korea"
+    assert index.lookup("d.p.r.k") == ()
+    assert index.lookup("SOCIETE generale fictive")[0].entry == "Société Générale Fictive"
+    assert normalize("  Pyong-yang!! ") == "pyong yang"
+    # Verdicts key on the listed country name only; aliases are screening hits
+    assert index.is_sanctioned_jurisdiction("North Korea")
+    assert not index.is_sanctioned_jurisdiction("Pyongyang") and index.lookup("Pyongyang")[0].how == "alias"
+    assert not index.is_sanctioned_jurisdiction("Bank Melli Iran")
+
+def test_fuzzy_names_and_text_scan():
+    index = WatchlistIndex.from_rows(ROWS)
+    hits = index.fuzzy("Bank Meli Iran")
+    assert hits and hits[0].entry == "Bank Melli Iran" and 0.8 <= hits[0].score < 1
+    assert index.fuzzy("Totally Unrelated Ltd") == []
+
+    found = {hit.entry for hit in index.scan("Payment routed via melli bank, beneficiary in DPRK")}
+    assert found == {"Bank Melli Iran", "North Korea"}
+    # Whole words only: 'dprks' is not 'dprk'
+    assert index.scan("dprks") == []
+
+def test_ip_ranges_pick_the_most_specific():
+    index = WatchlistIndex.from_rows(ROWS)
+    assert index.match_ip("10.1.2.3").program == "NARROW"
+    assert index.match_ip("10.9.9.9").program == "WIDE"
+    assert index.match_ip("11.0.0.1") is None
+    assert index.match_ip("not-an-ip") is None
+
+def test_large_list_stays_fast():
+    rng = random.Random(5)
+    rows = [{"kind": "entity", "value": "".join(rng.choices(string.ascii_lowercase + " ", k=18)), "aliases": "", "program": "P"}
+            for _ in range(20000)]
+    rows.append({"kind": "entity", "value": "Rosoboronexport", "aliases": "", "program": "EU"})
+    index = WatchlistIndex.from_rows(rows)
+
+    start = time.perf_counter()
+    for i in range(2000):
+        index._lookup(f"no such entity {i}")
+    assert (time.perf_counter() - start) / 2000 < 100e-6
+    assert index.fuzzy("Rosoboronexpor")[0].entry == "Rosoboronexport"
+
+def test_compiled_form_is_mmapped_and_hot_reloads(tmp_path):
+    source = tmp_path / "watchlist.csv"
+    source.write_text("kind,value,aliases,program\ncountry,Iran,Tehran,UN-2231\n")
+    screener = WatchlistScreener(str(source), str(tmp_path / "compiled"), check_interval=0)
+    index = screener.index
+    assert isinstance(index._exact_hash, np.memmap)
+    assert screener.screen({"loc": "Tehran"})[0].entry == "Iran"
+    assert screener.screen({"loc": "Atlantis"}) == []
+
+    # A second worker on the same directory attaches without recompiling
+    other = WatchlistScreener(str(source), str(tmp_path / "compiled"), check_interval=0)
+    assert other.index.manifest["version"] == index.manifest["version"]
+
+    source.write_text("kind,value,aliases,program\ncountry,Iran,Tehran,UN-2231\ncountry,Atlantis,,TEST\n")
+    os.utime(source, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert screener.screen({"loc": "Atlantis"})[0].entry == "Atlantis"
+    assert other.index.manifest["version"] == screener.index.manifest["version"]
+
+def test_versions_in_use_survive_a_publish(tmp_path):
+    source = tmp_path / "watchlist.csv"
+    compiled = tmp_path / "compiled"
+    source.write_text("kind,value,aliases,program\ncountry,Iran,Tehran,UN-2231\n")
+    lagging = WatchlistScreener(str(source), str(compiled), check_interval=3600)
+    first = lagging.index.manifest["version"]
+
+    # Two publishes later the lagging worker still serves, and can still load, its version
+    publisher = WatchlistScreener(str(source), str(compiled), check_interval=0)
+    publisher.reload()
+    second = publisher.reload()["version"]
+    assert (compiled / first / "manifest.json").exists()
+    assert WatchlistScreener(str(source), str(compiled)).index.manifest["version"] == second
+
+    # Once it has moved on, the next publish clears what nobody uses
+    lagging._checked = 0.0
+    lagging.check_interval = 0
+    assert lagging.index.manifest["version"] == second
+    third = publisher.reload()["version"]
+    assert sorted(d for d in os.listdir(compiled) if d.startswith("v")) == sorted({second, third})
+
+def test_radar_flags_watchlist_hits():
+    result = ComplianceRadar().check_regulations({"loc": "North Korea", "amount": 100, "ip_address": "89.14.22.11"})
+    assert not result["is_compliant"]
+    assert "SANCTIONED_JURISDICTION: North Korea" in result["flags"]
+    assert any(flag.startswith("WATCHLIST_IP") for flag in result["flags"])
+    assert ComplianceRadar().check_regulations({"loc": "Dubai", "amount": 100})["is_compliant"]